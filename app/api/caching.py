@@ -0,0 +1,42 @@
+"""Conditional request (ETag) helpers."""
+
+import hashlib
+
+from fastapi import Request, Response
+
+# Let clients keep a copy but revalidate it on every use, so edits made
+# through other endpoints are never served stale.
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(*parts: object) -> str:
+    """Build a quoted ETag from the values that identify a resource version."""
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode(), digest_size=8
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def is_not_modified(request: Request, response: Response, etag: str) -> bool:
+    """
+    Set caching headers on the response and check If-None-Match.
+
+    Returns True when the client already holds this version, in which
+    case the handler should return ``not_modified_response(etag)``.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def not_modified_response(etag: str) -> Response:
+    """Build an empty 304 response for the given ETag."""
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
@@ -0,0 +1,11 @@
+"""Shared API dependencies."""
+
+from typing import Optional
+from fastapi import Header
+
+
+async def get_reviewer(
+    x_reviewer: Optional[str] = Header(None, description="ID/name of reviewer")
+) -> Optional[str]:
+    """Dependency to get the reviewer identity from the request."""
+    return x_reviewer
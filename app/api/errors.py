@@ -0,0 +1,59 @@
+"""Shared API error handling."""
+
+import functools
+import logging
+from typing import Any, Awaitable, Callable, Tuple, Type, TypeVar, Union
+
+from fastapi import HTTPException, status
+
+from app.core.exceptions import RFPAgentException
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+ErrorMapping = Union[
+    Tuple[Type[RFPAgentException], int],
+    Tuple[Type[RFPAgentException], int, str]
+]
+
+
+def handle_errors(
+    detail: str,
+    *mapping: ErrorMapping,
+    include_error: bool = False
+) -> Callable[[F], F]:
+    """
+    Translate exceptions raised by a route handler into HTTP errors.
+
+    Args:
+        detail: Error detail returned for unexpected exceptions
+        mapping: (exception type, status code[, detail prefix]) tuples,
+            checked in order; matching exceptions are returned with their
+            own message, after the prefix if one is given
+        include_error: Append the exception message to ``detail``
+
+    HTTPExceptions raised by the handler pass through unchanged. Anything
+    else is logged with its traceback and returned as a 500 with ``detail``.
+    """
+    def decorator(func: F) -> F:
+        logger = logging.getLogger(func.__module__)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except HTTPException:
+                raise
+            except Exception as e:
+                for exc_type, status_code, *prefix in mapping:
+                    if isinstance(e, exc_type):
+                        message = f"{prefix[0]}: {e.message}" if prefix else e.message
+                        raise HTTPException(status_code=status_code, detail=message)
+                logger.exception("%s (%s)", detail, func.__name__)
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"{detail}: {str(e)}" if include_error else detail
+                )
+
+        return wrapper
+
+    return decorator
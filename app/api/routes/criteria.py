@@ -1,7 +1,8 @@
-from typing import List, Optional, Dict, Any
+import base64
+from datetime import datetime
+from typing import Annotated, List, Optional, Tuple
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, Field
 
 from app.models.criteria import (
@@ -9,34 +10,65 @@ from app.models.criteria import (
     CriteriaResponse,
     CriteriaUpdateRequest,
     CriteriaBulkUpdateRequest,
-    CriteriaStatistics,
-    CriteriaCategory,
-    CriteriaStatus,
-    CriteriaPriority
+    CriteriaListFilter,
+    CriteriaBulkUpdateResponse,
+    CriteriaBatchExtractionResponse,
+    CriteriaCategorizationResponse,
+    CriteriaStatistics
 )
 from app.services.criteria_service import CriteriaServiceInterface, CriteriaService
-from app.api.routes.documents import get_document_service
+from app.api.caching import compute_etag, is_not_modified, not_modified_response
+from app.api.dependencies import get_reviewer
+from app.api.errors import handle_errors
+from app.api.routes.documents import _document_service_instance
+from app.core.config import get_settings
 from app.core.exceptions import CriteriaExtractionError
 
 router = APIRouter()
 
-# Create a single instance of the criteria service
-_criteria_service_instance = None
+# Create a single instance of the service to be shared
+_criteria_service_instance = CriteriaService(document_service=_document_service_instance)
 
 
-def get_criteria_service() -> CriteriaServiceInterface:
+async def get_criteria_service() -> CriteriaServiceInterface:
     """Dependency to get criteria service instance."""
-    global _criteria_service_instance
-    if _criteria_service_instance is None:
-        _criteria_service_instance = CriteriaService(document_service=get_document_service())
     return _criteria_service_instance
 
 
+CriteriaSvc = Annotated[CriteriaServiceInterface, Depends(get_criteria_service)]
+
+
+def _encode_cursor(criterion: Criterion) -> str:
+    """Encode the keyset position of a criterion as an opaque cursor."""
+    raw = f"{criterion.created_at.isoformat()}|{criterion.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        created_at, criterion_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        position = datetime.fromisoformat(created_at)
+        # Stored timestamps are UTC-aware and cannot be compared with naive ones
+        if position.tzinfo is None:
+            raise ValueError("Cursor timestamp has no timezone")
+        return position, UUID(criterion_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 @router.post("/extract/{document_id}", response_model=CriteriaResponse)
+@handle_errors(
+    "Failed to extract criteria",
+    (CriteriaExtractionError, status.HTTP_422_UNPROCESSABLE_ENTITY, "Criteria extraction failed")
+)
 async def extract_criteria(
     document_id: UUID,
-    auto_categorize: bool = Query(True, description="Automatically categorize extracted criteria"),
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc,
+    auto_categorize: bool = Query(True, description="Automatically categorize extracted criteria")
 ) -> CriteriaResponse:
     """
     Extract criteria from a processed document.
@@ -46,50 +78,57 @@ async def extract_criteria(
     
     Returns extracted and structured criteria from the document.
     """
-    try:
-        # Extract raw criteria
-        extractions = await service.extract_criteria_from_document(
-            document_id, auto_categorize=auto_categorize
-        )
-        
-        # Convert to structured criteria
-        extraction_ids = [extraction.id for extraction in extractions]
-        criteria = await service.process_extractions_to_criteria(extraction_ids)
-        
-        # Get statistics
-        statistics = await service.get_criteria_statistics(document_id=document_id)
-        
-        return CriteriaResponse(
-            criteria=criteria,
-            statistics=statistics,
-            total_count=len(criteria),
-            message=f"Successfully extracted {len(criteria)} criteria from document",
-            success=True
-        )
-    except CriteriaExtractionError as e:
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"Criteria extraction failed: {e.message}"
-        )
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to extract criteria"
-        )
+    # Extract raw criteria
+    extractions = await service.extract_criteria_from_document(
+        document_id,
+        auto_categorize=auto_categorize,
+        max_concurrency=get_settings().EXTRACTION_CONCURRENCY
+    )
+    
+    # Convert to structured criteria
+    extraction_ids = [extraction.id for extraction in extractions]
+    criteria = await service.process_extractions_to_criteria(extraction_ids)
+    
+    # Get statistics. This must not run concurrently with the conversion
+    # above: the statistics count the criteria that step has just stored.
+    statistics = await service.get_criteria_statistics(document_id=document_id)
+    
+    return CriteriaResponse(
+        criteria=criteria,
+        statistics=statistics,
+        total_count=len(criteria),
+        message=f"Successfully extracted {len(criteria)} criteria from document",
+        success=True
+    )
+
+
+@router.post("/extract-batch", response_model=CriteriaBatchExtractionResponse, status_code=status.HTTP_202_ACCEPTED)
+@handle_errors("Failed to start batch extraction")
+async def extract_criteria_batch(
+    service: CriteriaSvc,
+    document_ids: List[UUID] = Query(..., description="Documents to extract criteria from")
+) -> CriteriaBatchExtractionResponse:
+    """
+    Extract criteria from several processed documents in the background.
+    
+    Uses the Azure OpenAI Batch API, which is cheaper than realtime
+    extraction but may take up to 24 hours to complete. Documents that are
+    not processed requirements documents are skipped.
+    """
+    queued = await service.extract_criteria_offline(document_ids)
+    return CriteriaBatchExtractionResponse(
+        document_ids=queued,
+        queued_count=len(queued),
+        message=f"Queued {len(queued)} documents for batch extraction",
+        success=True
+    )
 
 
 @router.get("/", response_model=CriteriaResponse)
+@handle_errors("Failed to retrieve criteria")
 async def get_criteria(
-    document_id: Optional[UUID] = Query(None, description="Filter by document ID"),
-    category: Optional[CriteriaCategory] = Query(None, description="Filter by category"),
-    status_filter: Optional[CriteriaStatus] = Query(None, alias="status", description="Filter by status"),
-    priority: Optional[CriteriaPriority] = Query(None, description="Filter by priority"),
-    search: Optional[str] = Query(None, description="Search in criterion text"),
-    page: int = Query(1, ge=1, description="Page number"),
-    page_size: int = Query(50, ge=1, le=100, description="Items per page"),
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc,
+    filters: Annotated[CriteriaListFilter, Query()]
 ) -> CriteriaResponse:
     """
     Retrieve criteria with optional filtering and pagination.
@@ -99,61 +138,63 @@ async def get_criteria(
     - **status**: Filter by review status
     - **priority**: Filter by priority level
     - **search**: Search text in criterion content
-    - **page**: Page number for pagination
+    - **page**: Page number for pagination (ignored when a cursor is given)
     - **page_size**: Number of items per page
+    - **cursor**: Resume after the last item of a previous page
     
     Returns paginated list of criteria matching the filters.
+    Prefer following `next_cursor` over incrementing `page`.
     """
-    try:
-        offset = (page - 1) * page_size
-        
-        criteria = await service.get_criteria(
-            document_id=document_id,
-            category=category,
-            status=status_filter,
-            priority=priority,
-            search_query=search,
-            limit=page_size + 1,  # Get one extra to check if there's a next page
-            offset=offset
-        )
-        
-        has_next = len(criteria) > page_size
-        if has_next:
-            criteria = criteria[:-1]  # Remove the extra item
-        
-        # Get overall statistics
-        statistics = await service.get_criteria_statistics(document_id=document_id)
-        
-        return CriteriaResponse(
-            criteria=criteria,
-            statistics=statistics,
-            total_count=statistics.total_count,
-            page=page,
-            page_size=page_size,
-            has_next=has_next,
-            message=f"Retrieved {len(criteria)} criteria",
-            success=True
-        )
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to retrieve criteria"
-        )
+    after = _decode_cursor(filters.cursor) if filters.cursor else None
+    page_size = filters.page_size
+    
+    offset = 0 if after else (filters.page - 1) * page_size
+    
+    criteria = await service.get_criteria(
+        document_id=filters.document_id,
+        category=filters.category,
+        status=filters.status,
+        priority=filters.priority,
+        search_query=filters.search,
+        limit=page_size + 1,  # Get one extra to check if there's a next page
+        offset=offset,
+        after=after
+    )
+    
+    has_next = len(criteria) > page_size
+    if has_next:
+        criteria = criteria[:-1]  # Remove the extra item
+    
+    # Get overall statistics
+    statistics = await service.get_criteria_statistics(document_id=filters.document_id)
+    
+    return CriteriaResponse(
+        criteria=criteria,
+        statistics=statistics,
+        total_count=statistics.total_count,
+        page=filters.page,
+        page_size=page_size,
+        has_next=has_next,
+        next_cursor=_encode_cursor(criteria[-1]) if has_next else None,
+        message=f"Retrieved {len(criteria)} criteria",
+        success=True
+    )
 
 
 @router.get("/{criterion_id}", response_model=Criterion)
 async def get_criterion(
     criterion_id: UUID,
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc,
+    request: Request,
+    response: Response
 ) -> Criterion:
     """
     Retrieve a single criterion by ID.
     
     - **criterion_id**: UUID of the criterion to retrieve
     
-    Returns complete criterion details.
+    Returns complete criterion details. Supports conditional requests
+    via ETag/If-None-Match.
     """
     criterion = await service.get_criterion(criterion_id)
     if not criterion:
@@ -161,14 +202,19 @@ async def get_criterion(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Criterion not found"
         )
+    
+    etag = compute_etag(criterion.id, criterion.updated_at or criterion.created_at)
+    if is_not_modified(request, response, etag):
+        return not_modified_response(etag)
     return criterion
 
 
-@router.put("/bulk", response_model=Dict[str, Any])
+@router.put("/bulk", response_model=CriteriaBulkUpdateResponse)
+@handle_errors("Failed to bulk update criteria")
 async def bulk_update_criteria(
     update_request: CriteriaBulkUpdateRequest,
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
-) -> Dict[str, Any]:
+    service: CriteriaSvc
+) -> CriteriaBulkUpdateResponse:
     """
     Bulk update multiple criteria.
     
@@ -176,41 +222,31 @@ async def bulk_update_criteria(
     
     Returns summary of update results.
     """
-    try:
-        results = await service.bulk_update_criteria(update_request)
-        
-        success_count = sum(1 for success in results.values() if success)
-        failure_count = len(results) - success_count
-        
-        return {
-            "success": True,
-            "message": f"Updated {success_count} criteria, {failure_count} failed",
-            "results": {str(k): v for k, v in results.items()},
-            "success_count": success_count,
-            "failure_count": failure_count
-        }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to bulk update criteria"
-        )
+    success_ids, failure_ids = await service.bulk_update_criteria(update_request)
+    
+    return CriteriaBulkUpdateResponse(
+        success_ids=success_ids,
+        failure_ids=failure_ids,
+        success_count=len(success_ids),
+        failure_count=len(failure_ids),
+        message=f"Updated {len(success_ids)} criteria, {len(failure_ids)} failed",
+        success=True
+    )
 
 
 @router.put("/{criterion_id}", response_model=Criterion)
 async def update_criterion(
     criterion_id: UUID,
     update_request: CriteriaUpdateRequest,
-    reviewed_by: Optional[str] = Query(None, description="ID/name of reviewer"),
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc,
+    reviewed_by: Annotated[Optional[str], Depends(get_reviewer)]
 ) -> Criterion:
     """
     Update a criterion.
     
     - **criterion_id**: UUID of the criterion to update
     - **update_request**: Fields to update
-    - **reviewed_by**: Optional reviewer identifier
+    - **X-Reviewer** header: Optional reviewer identifier
     
     Returns the updated criterion.
     """
@@ -228,14 +264,14 @@ async def update_criterion(
 @router.post("/{criterion_id}/approve", response_model=Criterion)
 async def approve_criterion(
     criterion_id: UUID,
-    reviewed_by: Optional[str] = Query(None, description="ID/name of reviewer"),
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc,
+    reviewed_by: Annotated[Optional[str], Depends(get_reviewer)]
 ) -> Criterion:
     """
     Approve a criterion.
     
     - **criterion_id**: UUID of the criterion to approve
-    - **reviewed_by**: Optional reviewer identifier
+    - **X-Reviewer** header: Optional reviewer identifier
     
     Returns the approved criterion.
     """
@@ -251,16 +287,16 @@ async def approve_criterion(
 @router.post("/{criterion_id}/reject", response_model=Criterion)
 async def reject_criterion(
     criterion_id: UUID,
-    reason: str = Query(..., description="Reason for rejection"),
-    reviewed_by: Optional[str] = Query(None, description="ID/name of reviewer"),
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc,
+    reviewed_by: Annotated[Optional[str], Depends(get_reviewer)],
+    reason: str = Query(..., description="Reason for rejection")
 ) -> Criterion:
     """
     Reject a criterion.
     
     - **criterion_id**: UUID of the criterion to reject
     - **reason**: Reason for rejection
-    - **reviewed_by**: Optional reviewer identifier
+    - **X-Reviewer** header: Optional reviewer identifier
     
     Returns the rejected criterion.
     """
@@ -277,8 +313,8 @@ async def reject_criterion(
 
 @router.get("/statistics/overview", response_model=CriteriaStatistics)
 async def get_criteria_statistics(
-    document_id: Optional[UUID] = Query(None, description="Filter by document ID"),
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc,
+    document_id: Optional[UUID] = Query(None, description="Filter by document ID")
 ) -> CriteriaStatistics:
     """
     Get criteria statistics overview.
@@ -290,11 +326,12 @@ async def get_criteria_statistics(
     return await service.get_criteria_statistics(document_id=document_id)
 
 
-@router.post("/auto-categorize")
+@router.post("/auto-categorize", response_model=CriteriaCategorizationResponse)
+@handle_errors("Failed to auto-categorize criteria", include_error=True)
 async def auto_categorize_criteria(
     criteria_ids: List[UUID],
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
-):
+    service: CriteriaSvc
+) -> CriteriaCategorizationResponse:
     """
     Auto-categorize criteria into 6 predefined categories using AI.
     
@@ -302,29 +339,21 @@ async def auto_categorize_criteria(
     
     Returns categorization results for each criterion.
     """
-    try:
-        if not criteria_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No criteria IDs provided"
-            )
-        
-        results = await service.auto_categorize_criteria(criteria_ids)
-        
-        return {
-            "categorization_results": results,
-            "processed_count": len(results),
-            "total_requested": len(criteria_ids),
-            "message": f"Successfully categorized {len(results)} criteria",
-            "success": True
-        }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    if not criteria_ids:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to auto-categorize criteria: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No criteria IDs provided"
         )
+    
+    results = await service.auto_categorize_criteria(criteria_ids)
+    
+    return CriteriaCategorizationResponse(
+        categorization_results=results,
+        processed_count=len(results),
+        total_requested=len(criteria_ids),
+        message=f"Successfully categorized {len(results)} criteria",
+        success=True
+    )
 
 
 class CriterionValidationRequest(BaseModel):
@@ -333,11 +362,45 @@ class CriterionValidationRequest(BaseModel):
     use_deep_research: bool = Field(False, description="Use deep research for validation")
 
 
+class CriteriaBatchValidationRequest(CriterionValidationRequest):
+    """Request model for validating several criteria at once."""
+    criteria_ids: List[UUID] = Field(..., description="Criteria to validate")
+
+
+@router.post("/validate", response_model=List[Criterion])
+@handle_errors("Failed to validate criteria", include_error=True)
+async def validate_criteria_batch(
+    request: CriteriaBatchValidationRequest,
+    service: CriteriaSvc
+) -> List[Criterion]:
+    """
+    Validate several criteria using AI agent with web research.
+    
+    Each source document is summarized once for all of its criteria.
+    
+    - **request**: Criteria IDs, product name and research options
+    
+    Returns the criteria that were validated.
+    """
+    if not request.criteria_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No criteria IDs provided"
+        )
+    
+    return await service.validate_criteria_batch(
+        criteria_ids=request.criteria_ids,
+        product_name=request.product_name,
+        use_deep_research=request.use_deep_research
+    )
+
+
 @router.post("/{criterion_id}/validate", response_model=Criterion)
+@handle_errors("Failed to validate criterion", include_error=True)
 async def validate_criterion_with_agent(
     criterion_id: UUID,
     request: CriterionValidationRequest,
-    service: CriteriaServiceInterface = Depends(get_criteria_service)
+    service: CriteriaSvc
 ) -> Criterion:
     """
     Validate a criterion using AI agent with web research.
@@ -347,28 +410,16 @@ async def validate_criterion_with_agent(
     
     Returns the criterion with validation results.
     """
-    try:
-        criterion = await service.validate_criterion_with_agent(
-            criterion_id=criterion_id,
-            product_name=request.product_name,
-            use_deep_research=request.use_deep_research
-        )
-
-        print ("=== Validated Criterion ===")
-        print (criterion)
-        
-        if not criterion:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Criterion not found"
-            )
-        
-        return criterion
-        
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    criterion = await service.validate_criterion_with_agent(
+        criterion_id=criterion_id,
+        product_name=request.product_name,
+        use_deep_research=request.use_deep_research
+    )
+    
+    if not criterion:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to validate criterion: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Criterion not found"
         )
+    
+    return criterion
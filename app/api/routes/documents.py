@@ -1,17 +1,21 @@
-from typing import List, Optional
+from json.encoder import encode_basestring
+from typing import Annotated, AsyncIterator, List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.models.document import (
     DocumentMetadata,
-    DocumentProcessingResult,
+    DocumentReclassifyResponse,
     DocumentResponse,
     DocumentStatus,
-    DocumentType
+    DocumentType,
+    parse_document_type
 )
 from app.services.document_service import DocumentServiceInterface, DocumentService
-from app.core.exceptions import DocumentProcessingError, FileValidationError
+from app.api.caching import compute_etag, is_not_modified, not_modified_response
+from app.api.errors import handle_errors
+from app.core.exceptions import DocumentProcessingError, RFPAgentException
 
 router = APIRouter()
 
@@ -19,58 +23,64 @@ router = APIRouter()
 _document_service_instance = DocumentService()
 
 
-def get_document_service() -> DocumentServiceInterface:
+async def get_document_service() -> DocumentServiceInterface:
     """Dependency to get document service instance."""
     return _document_service_instance
 
 
-@router.post("/upload")
+DocumentSvc = Annotated[DocumentServiceInterface, Depends(get_document_service)]
+
+
+def parse_doctype(
+    document_type: str = Query(default="other", description="Document type")
+) -> DocumentType:
+    """Dependency to resolve a document type, falling back to OTHER if unknown."""
+    return parse_document_type(document_type)
+
+
+@router.post("/upload", response_model=DocumentResponse)
+@handle_errors("Failed to upload document", (RFPAgentException, status.HTTP_400_BAD_REQUEST))
 async def upload_document(
+    service: DocumentSvc,
     file: UploadFile = File(...),
-    document_type: str = Query(default="other", description="Document type")
-):
+    doc_type: DocumentType = Depends(parse_doctype)
+) -> DocumentResponse:
     """Upload a document for processing."""
+    # Upload the document
+    document = await service.upload_document(file, doc_type)
+    
+    # Immediately process the document to get classification
     try:
-        # Convert string to enum if valid
-        try:
-            doc_type = DocumentType(document_type.lower())
-        except ValueError:
-            doc_type = DocumentType.OTHER
+        processing_result = await service.process_document(document.id)
         
-        # Upload the document
-        document = await _document_service_instance.upload_document(file, doc_type)
+        # Get the updated document after processing
+        updated_document = await service.get_document(document.id)
         
-        # Immediately process the document to get classification
-        try:
-            processing_result = await _document_service_instance.process_document(document.id)
-            
-            # Get the updated document after processing
-            updated_document = await _document_service_instance.get_document(document.id)
-            
-            return {
-                "success": True,
-                "message": "Document uploaded and processed successfully",
-                "document": updated_document.model_dump() if updated_document else document.model_dump(),
-                "processing_result": processing_result.model_dump() if processing_result else None
-            }
-        except Exception as processing_error:
-            # Return the uploaded document even if processing failed
-            return {
-                "success": True,
-                "message": "Document uploaded successfully (processing failed)",
-                "document": document.model_dump(),
-                "processing_result": None,
-                "processing_error": str(processing_error)
-            }
-        
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return DocumentResponse(
+            document=updated_document or document,
+            processing_result=processing_result,
+            message="Document uploaded and processed successfully",
+            success=True
+        )
+    except Exception as processing_error:
+        # Return the uploaded document even if processing failed
+        return DocumentResponse(
+            document=document,
+            processing_error=str(processing_error),
+            message="Document uploaded successfully (processing failed)",
+            success=True
+        )
 
 
 @router.post("/{document_id}/process", response_model=DocumentResponse)
+@handle_errors(
+    "Failed to process document",
+    (DocumentProcessingError, status.HTTP_422_UNPROCESSABLE_ENTITY, "Document processing failed"),
+    include_error=True
+)
 async def process_document(
     document_id: UUID,
-    service: DocumentServiceInterface = Depends(get_document_service)
+    service: DocumentSvc
 ) -> DocumentResponse:
     """
     Process an uploaded document to extract text and structure.
@@ -79,74 +89,69 @@ async def process_document(
     
     Returns processing results including page count, word count, and extracted sections.
     """
-    try:
-        # Get document metadata first
-        document = await service.get_document(document_id)
-        if not document:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Document not found"
-            )
-        
-        # Check if document is in uploadable state
-        if document.status not in [DocumentStatus.UPLOADED, DocumentStatus.FAILED]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Document cannot be processed. Current status: {document.status.value}"
-            )
-        
-        # Process the document
-        processing_result = await service.process_document(document_id)
-        
-        # Get updated document metadata
-        updated_document = await service.get_document(document_id)
-        
-        return DocumentResponse(
-            document=updated_document,
-            processing_result=processing_result,
-            message="Document processed successfully",
-            success=True
-        )
-    except HTTPException:
-        raise
-    except DocumentProcessingError as e:
+    # Get document metadata first
+    document = await service.get_document(document_id)
+    if not document:
         raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"Document processing failed: {e.message}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
         )
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    
+    # Check if document is in uploadable state
+    if document.status not in [DocumentStatus.UPLOADED, DocumentStatus.FAILED]:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process document: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Document cannot be processed. Current status: {document.status.value}"
         )
+    
+    # Process the document
+    processing_result = await service.process_document(document_id)
+    
+    # Get updated document metadata
+    updated_document = await service.get_document(document_id)
+    
+    return DocumentResponse(
+        document=updated_document,
+        processing_result=processing_result,
+        message="Document processed successfully",
+        success=True
+    )
+
+
+@router.post("/reclassify", response_model=DocumentReclassifyResponse, status_code=status.HTTP_202_ACCEPTED)
+@handle_errors("Failed to start reclassification")
+async def reclassify_documents(
+    service: DocumentSvc,
+    document_ids: Optional[List[UUID]] = Query(None, description="Documents to reclassify (all processed documents if omitted)")
+) -> DocumentReclassifyResponse:
+    """
+    Reclassify processed documents in the background.
+    
+    Uses the Azure OpenAI Batch API, which is cheaper than realtime
+    classification but may take up to 24 hours to complete.
+    """
+    queued = await service.reclassify_documents(document_ids)
+    return DocumentReclassifyResponse(document_ids=queued, queued_count=len(queued), success=True)
 
 
 @router.get("/stats")
+@handle_errors("Failed to get statistics")
 async def get_document_statistics(
-    service: DocumentServiceInterface = Depends(get_document_service)
+    service: DocumentSvc
 ):
     """Get document processing statistics."""
-    try:
-        stats = service.get_document_statistics()
-        return {"success": True, "statistics": stats}
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get statistics"
-        )
+    stats = service.get_document_statistics()
+    return {"success": True, "statistics": stats}
 
 
 @router.get("/", response_model=List[DocumentMetadata])
+@handle_errors("Failed to list documents")
 async def list_documents(
+    service: DocumentSvc,
     status_filter: Optional[DocumentStatus] = Query(None, alias="status", description="Filter by document status"),
     type_filter: Optional[DocumentType] = Query(None, alias="type", description="Filter by document type"),
     limit: int = Query(50, ge=1, le=100, description="Number of documents to return"),
-    offset: int = Query(0, ge=0, description="Number of documents to skip"),
-    service: DocumentServiceInterface = Depends(get_document_service)
+    offset: int = Query(0, ge=0, description="Number of documents to skip")
 ) -> List[DocumentMetadata]:
     """
     List documents with optional filtering.
@@ -158,27 +163,21 @@ async def list_documents(
     
     Returns list of document metadata matching the filters.
     """
-    try:
-        documents = await service.get_documents(
-            status=status_filter,
-            document_type=type_filter,
-            limit=limit,
-            offset=offset
-        )
-        return documents
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to list documents"
-        )
+    documents = await service.get_documents(
+        status=status_filter,
+        document_type=type_filter,
+        limit=limit,
+        offset=offset
+    )
+    return documents
 
 
 @router.get("/{document_id}", response_model=DocumentMetadata)
 async def get_document(
     document_id: UUID,
-    service: DocumentServiceInterface = Depends(get_document_service)
+    service: DocumentSvc,
+    request: Request,
+    response: Response
 ) -> DocumentMetadata:
     """
     Retrieve document metadata by ID.
@@ -186,6 +185,7 @@ async def get_document(
     - **document_id**: UUID of the document
     
     Returns document metadata including processing status and results.
+    Supports conditional requests via ETag/If-None-Match.
     """
     document = await service.get_document(document_id)
     if not document:
@@ -193,57 +193,69 @@ async def get_document(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Document not found"
         )
+    
+    # Documents have no modification timestamp, so the ETag covers the
+    # whole serialized document
+    etag = compute_etag(document.model_dump_json())
+    if is_not_modified(request, response, etag):
+        return not_modified_response(etag)
     return document
 
 
+async def _stream_content_json(
+    document_id: UUID,
+    content_length: int,
+    chunks: AsyncIterator[str]
+) -> AsyncIterator[str]:
+    """Encode streamed document content as a JSON object, chunk by chunk."""
+    yield f'{{"document_id": "{document_id}", "content": "'
+    async for chunk in chunks:
+        # Strip the surrounding quotes added by the encoder
+        yield encode_basestring(chunk)[1:-1]
+    yield f'", "content_length": {content_length}, "success": true}}'
+
+
 @router.get("/{document_id}/content")
+@handle_errors("Failed to get document content")
 async def get_document_content(
     document_id: UUID,
-    service: DocumentServiceInterface = Depends(get_document_service)
-) -> JSONResponse:
+    service: DocumentSvc
+) -> StreamingResponse:
     """
     Get processed document content.
     
     - **document_id**: UUID of the document
     
-    Returns the extracted and processed document content in JSON format.
+    Returns the extracted and processed document content in JSON format,
+    streamed so large documents are never encoded in one piece.
     """
-    try:
-        document = await service.get_document(document_id)
-        if not document:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Document not found"
-            )
-        
-        content = await service.get_document_content(document_id)
-        if content is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Document content not available. Document may not be processed yet."
-            )
-        
-        return JSONResponse(content={
-            "document_id": str(document_id),
-            "content": content,
-            "content_length": len(content),
-            "success": True
-        })
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    document = await service.get_document(document_id)
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    
+    # Open the content before responding, so a missing or unreadable file
+    # is an error status rather than a truncated 200 body
+    chunks = await service.stream_document_content(document_id) if document.markdown_path else None
+    if chunks is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to get document content"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document content not available. Document may not be processed yet."
         )
+    
+    return StreamingResponse(
+        _stream_content_json(document_id, document.extracted_text_length, chunks),
+        media_type="application/json"
+    )
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+@handle_errors("Failed to delete document")
 async def delete_document(
     document_id: UUID,
-    service: DocumentServiceInterface = Depends(get_document_service)
+    service: DocumentSvc
 ):
     """
     Delete a document and its associated data.
@@ -252,19 +264,9 @@ async def delete_document(
     
     Returns 204 No Content on successful deletion.
     """
-    try:
-        success = await service.delete_document(document_id)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Document not found"
-            )
-    except HTTPException:
-        raise
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    success = await service.delete_document(document_id)
+    if not success:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete document"
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
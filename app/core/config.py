@@ -1,9 +1,9 @@
 """Application configuration settings."""
 
 import os
-from typing import List
+from typing import FrozenSet, Tuple
 from functools import lru_cache
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -17,7 +17,8 @@ class Settings(BaseSettings):
     # File Upload Configuration
     MAX_FILE_SIZE: int = 52428800  # 50MB
     UPLOAD_DIR: str = "uploads"
-    ALLOWED_EXTENSIONS: List[str] = [".pdf", ".xlsx", ".xls"]
+    ALLOWED_EXTENSIONS: FrozenSet[str] = frozenset({".pdf", ".xlsx", ".xls"})
+    DOCUMENT_CONTENT_CACHE_SIZE: int = 32  # Processed documents' markdown kept in memory (0 disables)
     
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./rfp_agent.db"
@@ -25,14 +26,33 @@ class Settings(BaseSettings):
     # Azure OpenAI Configuration
     AZURE_OPENAI_ENDPOINT: str = ""
     AZURE_OPENAI_API_KEY: str = ""
-    AZURE_OPENAI_API_VERSION: str = "2024-02-15-preview"
+    AZURE_OPENAI_API_VERSION: str = "2024-10-21"  # Structured outputs need 2024-08-01 or later
     AZURE_OPENAI_MODEL: str = "gpt-4.1"
     AZURE_OPENAI_DEPLOYMENT_NAME: str = ""
+    AZURE_OPENAI_BATCH_DEPLOYMENT_NAME: str = ""  # Global-Batch deployment for Batch API jobs
     MAX_CRITERIA_PER_DOCUMENT: int = 1000
+    EXTRACTION_CONCURRENCY: int = 8
+    EXTRACTION_CHUNK_TOKENS: int = 10000  # Approximate input tokens per extraction chunk
+    EXTRACTION_SKIP_KEYWORDLESS_CHUNKS: bool = True  # Skip the LLM for chunks without requirement keywords
+    EXTRACTION_MAX_TOKENS: int = 16384  # Output budget per chunk; must fit every criterion of a dense chunk
+    OPENAI_MAX_CONNECTIONS: int = 64  # Shared HTTP pool for async Azure OpenAI calls
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 32
+    OPENAI_REQUEST_TIMEOUT: float = 600.0  # seconds
+    CLASSIFICATION_BATCH_SIZE: int = 8  # Documents classified per LLM call
+    CLASSIFICATION_BATCH_WINDOW: float = 0.2  # seconds to wait for more documents to join a batch
+    MAX_CONCURRENT_CLASSIFICATION_REQUESTS: int = 8
+    CLASSIFICATION_INPUT_TOKENS: int = 3000  # Approximate budget for document content in classification prompts
+    SUMMARIZATION_CONCURRENCY: int = 8  # Chunk summaries requested at once
+    SUMMARIZATION_CHUNK_TOKENS: int = 10000  # Input tokens per summarized chunk
 
     # Azure AI Agent Service Configuration
     BING_CONNECTION_NAME: str = ""
     DEEP_RESEARCH_MODEL_DEPLOYMENT_NAME: str = ""
+    MAX_CONCURRENT_AGENT_REQUESTS: int = 5
+    AGENT_IO_THREADS: int = 16  # Worker threads for blocking agent SDK calls
+    AGENT_RESULT_CACHE_SIZE: int = 1024  # Validation results kept in memory (0 disables)
+    AGENT_SUMMARY_MAX_TOKENS: int = 4000  # Approximate budget for the summary in agent prompts
+    AGENT_SUMMARY_CACHE_SIZE: int = 64  # Document summaries kept for agent validation (0 disables)
     
     # Additional Azure AI Agent fields (from environment)
     AZURE_AI_AGENT_ENDPOINT: str = ""
@@ -41,24 +61,30 @@ class Settings(BaseSettings):
     # Azure Document Intelligence Configuration
     AZURE_DOC_INTELLIGENCE_ENDPOINT: str = ""
     AZURE_DOC_INTELLIGENCE_KEY: str = ""
+    MAX_CONCURRENT_DOC_INTELLIGENCE_REQUESTS: int = 3
+    
+    # Caching Configuration
+    LLM_CACHE_ENABLED: bool = True  # Reuse LLM responses for identical requests
+    LLM_CACHE_SIZE: int = 512
+    LLM_CACHE_TTL: int = 604800  # seconds (7 days)
+    OCR_CACHE_ENABLED: bool = True  # Reuse extracted markdown for identical PDF and spreadsheet files
     
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/rfp_agent.log"
     
     # Criteria Categories
-    CRITERIA_CATEGORIES: List[str] = [
+    CRITERIA_CATEGORIES: Tuple[str, ...] = (
         "Technical Requirements",
         "Security & Compliance", 
         "Performance & Scalability",
         "Integration & Compatibility",
         "Support & Maintenance",
         "Commercial & Legal"
-    ]
+    )
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Settings are read-only once loaded
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
 
 
 @lru_cache()
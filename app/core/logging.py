@@ -1,8 +1,15 @@
+import atexit
 import logging
 import logging.config
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from queue import SimpleQueue
+from typing import Optional
 from app.core.config import get_settings
 
+# Background listener that writes queued records to the real handlers
+_queue_listener: Optional[QueueListener] = None
+
 
 def setup_logging():
     """Configure application logging."""
@@ -56,3 +63,26 @@ def setup_logging():
     }
     
     logging.config.dictConfig(logging_config)
+    _start_queue_listener(logging.getLogger())
+
+
+def _start_queue_listener(logger: logging.Logger) -> None:
+    """Move a logger's handlers behind a queue so callers never block on I/O."""
+    global _queue_listener
+    
+    _stop_queue_listener()
+    
+    queue = SimpleQueue()
+    _queue_listener = QueueListener(queue, *logger.handlers, respect_handler_level=True)
+    logger.handlers = [QueueHandler(queue)]
+    _queue_listener.start()
+
+
+@atexit.register
+def _stop_queue_listener() -> None:
+    """Flush and stop the background logging listener."""
+    global _queue_listener
+    
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
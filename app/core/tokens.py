@@ -0,0 +1,61 @@
+"""Token counting for prompt and chunk budgets."""
+
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text, used when tiktoken is
+# not available
+CHARS_PER_TOKEN = 4
+
+# Characters sampled to measure the ratio of a text
+_RATIO_SAMPLE_CHARS = 20000
+
+
+@lru_cache()
+def _get_encoding():
+    """
+    Get the tokenizer of the GPT-4o/4.1 model family, or None if unavailable.
+
+    tiktoken is optional and downloads its vocabulary on first use, so both a
+    missing package and an offline host fall back to character estimates.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Token counting unavailable, estimating from characters: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of a text, estimating from its length without tiktoken."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text to at most max_tokens tokens; text within the budget is returned as is."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def chars_per_token(text: str) -> float:
+    """
+    Measure the characters-per-token ratio of a text from a sample of it.
+
+    Used to turn a token budget into a character length where text is split
+    by offsets; code and tables tokenize far denser than prose.
+    """
+    sample = text[:_RATIO_SAMPLE_CHARS]
+    if _get_encoding() is None or not sample.strip():
+        return CHARS_PER_TOKEN
+    return len(sample) / max(count_tokens(sample), 1)
@@ -1,9 +1,11 @@
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, validator
+from typing import Annotated, Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, computed_field
 from uuid import UUID, uuid4
 
+from app.models.document import utc_now
+
 
 class CriteriaCategory(str, Enum):
     """Criteria category classification."""
@@ -36,6 +38,8 @@ class CriteriaPriority(str, Enum):
 
 class CriteriaExtraction(BaseModel):
     """Raw criteria extraction from document."""
+    model_config = ConfigDict(extra="forbid")
+    
     id: UUID = Field(default_factory=uuid4)
     document_id: UUID
     raw_text: str = Field(..., description="Original text from document")
@@ -44,14 +48,24 @@ class CriteriaExtraction(BaseModel):
     criteria_id: Optional[str] = None
     section_title: Optional[str] = None
     extraction_confidence: float = Field(..., ge=0.0, le=1.0)
-    extraction_timestamp: datetime = Field(default_factory=datetime.utcnow)
+    extraction_timestamp: datetime = Field(default_factory=utc_now)
+
+
+class ValidationReference(BaseModel):
+    """Source cited by an agent validation."""
+    title: str = Field("", description="Title of the source")
+    url: str = Field(..., description="Full URL of the source")
 
 
 class Criterion(BaseModel):
     """Structured criterion model."""
+    model_config = ConfigDict(extra="forbid")
+    
     id: UUID = Field(default_factory=uuid4)
     extraction_id: UUID
-    criterion_text: str = Field(..., description="Formatted criterion text")
+    criterion_text: Annotated[str, StringConstraints(strip_whitespace=True, min_length=10)] = Field(
+        ..., description="Formatted criterion text"
+    )
     category: CriteriaCategory
     priority: CriteriaPriority = CriteriaPriority.MEDIUM
     status: CriteriaStatus = CriteriaStatus.EXTRACTED
@@ -59,7 +73,7 @@ class Criterion(BaseModel):
     keywords: List[str] = Field(default_factory=list)
     requirements: List[str] = Field(default_factory=list)
     evaluation_criteria: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     updated_at: Optional[datetime] = None
     reviewed_by: Optional[str] = None
     review_notes: Optional[str] = None
@@ -67,13 +81,7 @@ class Criterion(BaseModel):
     # AI Agent Validation Fields
     is_met: Optional[bool] = None
     validation_summary: Optional[str] = None
-    validation_references: List[Dict[str, str]] = Field(default_factory=list)
-    
-    @validator('criterion_text')
-    def validate_criterion_text(cls, v):
-        if len(v.strip()) < 10:
-            raise ValueError("Criterion text must be at least 10 characters")
-        return v.strip()
+    validation_references: List[ValidationReference] = Field(default_factory=list)
 
 
 class CriteriaUpdateRequest(BaseModel):
@@ -92,13 +100,45 @@ class CriteriaBulkUpdateRequest(BaseModel):
     reviewed_by: Optional[str] = None
 
 
+class CriteriaListFilter(BaseModel):
+    """Query parameters for listing criteria."""
+    document_id: Optional[UUID] = Field(None, description="Filter by document ID")
+    category: Optional[CriteriaCategory] = Field(None, description="Filter by category")
+    status: Optional[CriteriaStatus] = Field(None, description="Filter by status")
+    priority: Optional[CriteriaPriority] = Field(None, description="Filter by priority")
+    search: Optional[str] = Field(None, description="Search in criterion text")
+    page: int = Field(1, ge=1, description="Page number")
+    page_size: int = Field(50, ge=1, le=100, description="Items per page")
+    cursor: Optional[str] = Field(None, description="Cursor from a previous page's next_cursor")
+
+
 class CriteriaStatistics(BaseModel):
-    """Criteria statistics model."""
+    """
+    Criteria statistics model.
+    
+    Counts are stored positionally in enum declaration order; responses
+    serialize only the ``by_*`` dict views derived from them.
+    """
     total_count: int
-    by_status: Dict[CriteriaStatus, int]
-    by_category: Dict[CriteriaCategory, int]
-    by_priority: Dict[CriteriaPriority, int]
+    by_status_counts: List[int] = Field(..., min_length=len(CriteriaStatus), max_length=len(CriteriaStatus), exclude=True)
+    by_category_counts: List[int] = Field(..., min_length=len(CriteriaCategory), max_length=len(CriteriaCategory), exclude=True)
+    by_priority_counts: List[int] = Field(..., min_length=len(CriteriaPriority), max_length=len(CriteriaPriority), exclude=True)
     approval_rate: float = Field(..., ge=0.0, le=1.0)
+    
+    @computed_field
+    @property
+    def by_status(self) -> Dict[CriteriaStatus, int]:
+        return dict(zip(CriteriaStatus, self.by_status_counts))
+    
+    @computed_field
+    @property
+    def by_category(self) -> Dict[CriteriaCategory, int]:
+        return dict(zip(CriteriaCategory, self.by_category_counts))
+    
+    @computed_field
+    @property
+    def by_priority(self) -> Dict[CriteriaPriority, int]:
+        return dict(zip(CriteriaPriority, self.by_priority_counts))
 
 
 class CriteriaResponse(BaseModel):
@@ -109,5 +149,33 @@ class CriteriaResponse(BaseModel):
     page: int = 1
     page_size: int = 50
     has_next: bool = False
+    next_cursor: Optional[str] = None
+    message: str
+    success: bool
+
+
+class CriteriaBulkUpdateResponse(BaseModel):
+    """Response model for bulk criteria updates."""
+    success_ids: List[UUID]
+    failure_ids: List[UUID]
+    success_count: int
+    failure_count: int
+    message: str
+    success: bool
+
+
+class CriteriaBatchExtractionResponse(BaseModel):
+    """Response model for queued background criteria extraction."""
+    document_ids: List[UUID]
+    queued_count: int
+    message: str
+    success: bool
+
+
+class CriteriaCategorizationResponse(BaseModel):
+    """Response model for criteria auto-categorization."""
+    categorization_results: Dict[UUID, CriteriaCategory]
+    processed_count: int
+    total_requested: int
     message: str
     success: bool
@@ -1,10 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Optional, List
-from pydantic import BaseModel, Field, validator
+from typing import Dict, Optional, List
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from uuid import UUID, uuid4
 
 
+_UTC = timezone.utc
+
+
+def utc_now() -> datetime:
+    """Current time as a timezone-aware UTC datetime."""
+    return datetime.now(_UTC)
+
+
 class DocumentStatus(str, Enum):
     """Document processing status."""
     UPLOADED = "uploaded"
@@ -38,7 +46,8 @@ class DocumentUploadRequest(BaseModel):
     file_size: int = Field(..., gt=0, description="File size in bytes")
     content_type: str = Field(..., description="MIME content type")
     
-    @validator('filename')
+    @field_validator('filename')
+    @classmethod
     def validate_filename(cls, v):
         if not v.strip():
             raise ValueError("Filename cannot be empty")
@@ -47,20 +56,26 @@ class DocumentUploadRequest(BaseModel):
 
 class DocumentMetadata(BaseModel):
     """Document metadata model."""
+    model_config = ConfigDict(extra="forbid")
+    
     id: UUID = Field(default_factory=uuid4)
     filename: str
     original_filename: str
     file_size: int
+    # SHA-256 of the uploaded file, keying the OCR cache
+    file_hash: Optional[str] = Field(None, exclude=True)
     content_type: str
     document_type: DocumentType
-    upload_timestamp: datetime = Field(default_factory=datetime.utcnow)
+    upload_timestamp: datetime = Field(default_factory=utc_now)
     processing_started_at: Optional[datetime] = None
     processing_completed_at: Optional[datetime] = None
     status: DocumentStatus = DocumentStatus.UPLOADED
     page_count: Optional[int] = None
     word_count: Optional[int] = None
     extracted_text_length: Optional[int] = None
-    markdown_content: Optional[str] = None
+    # File holding the full extracted text, which is served by the content
+    # endpoint rather than with the metadata
+    markdown_path: Optional[str] = Field(None, exclude=True)
     classification_confidence: Optional[float] = None
     contains_criteria: bool = False
     criteria_count: int = 0
@@ -69,6 +84,8 @@ class DocumentMetadata(BaseModel):
 
 class DocumentProcessingResult(BaseModel):
     """Result of document processing."""
+    model_config = ConfigDict(extra="forbid")
+    
     document_id: UUID
     status: DocumentStatus
     page_count: int
@@ -85,5 +102,21 @@ class DocumentResponse(BaseModel):
     """Response model for document operations."""
     document: DocumentMetadata
     processing_result: Optional[DocumentProcessingResult] = None
+    processing_error: Optional[str] = None
     message: str
     success: bool
+
+
+class DocumentReclassifyResponse(BaseModel):
+    """Response model for queued background reclassification."""
+    document_ids: List[UUID]
+    queued_count: int
+    success: bool
+
+
+_DOC_TYPE_BY_VALUE: Dict[str, DocumentType] = {t.value: t for t in DocumentType}
+
+
+def parse_document_type(value: str) -> DocumentType:
+    """Resolve a document type value (case-insensitive), falling back to OTHER."""
+    return _DOC_TYPE_BY_VALUE.get(value.lower(), DocumentType.OTHER)
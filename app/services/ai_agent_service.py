@@ -1,74 +1,163 @@
 """Service for interacting with Azure AI Agent Service."""
 
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
 import logging
 import os
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Union
+from pydantic import BaseModel, Field, ValidationError
 import instructor
 
 from azure.ai.projects import AIProjectClient
 from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import (
+    AgentThreadCreationOptions,
     DeepResearchTool,
     BingGroundingTool,
-    MessageRole
+    ListSortOrder,
+    MessageRole,
+    ThreadMessageOptions
 )
 from openai import AzureOpenAI
 
 from app.core.config import get_settings
 from app.core.exceptions import ConfigurationError, RFPAgentException
+from app.core.tokens import truncate_to_tokens
+from app.models.criteria import ValidationReference
 
 logger = logging.getLogger(__name__)
 
+ValidationKey = Tuple[str, str, bool]
 
-class AgentValidationResult(BaseModel):
-    """Structured output for agent validation."""
+# Blocking agent SDK and OpenAI calls run here rather than in the default
+# executor, so long agent runs cannot starve other to_thread users.
+_agent_io_pool = ThreadPoolExecutor(
+    max_workers=get_settings().AGENT_IO_THREADS, thread_name_prefix="agent-io"
+)
+
+# Agents answer with AgentValidationResult JSON directly, which saves a
+# second completion to structure their free-text answer.
+_AGENT_INSTRUCTIONS = (
+    "You are an expert RFP analyst. Your task is to validate if a given criterion is met by a specified "
+    "product/service, based on the provided document summary and web research. Provide a clear 'yes' or 'no' "
+    "answer, a justification, and cite your sources. YOU MUST ALWAYS PROVIDE FULL URLs TO YOUR SOURCES\n\n"
+    "You MUST return your final answer as a single JSON object matching this schema:\n"
+    "{schema}\n"
+    "Do not include any prose outside the JSON."
+)
+
+# Trailing part of the validation prompt; see _validation_prompt_prefix
+_VALIDATION_PROMPT_SUFFIX = """"
+
+Based on the provided summary and your web research, determine if the product/service meets this criterion.
+Explain your reasoning in the summary and list your sources as references.
+"""
+
+
+def _truncate_summary(document_summary: str, max_tokens: int) -> str:
+    """Cut the summary to a token budget."""
+    truncated = truncate_to_tokens(document_summary, max_tokens)
+    if len(truncated) == len(document_summary):
+        return document_summary
+    return truncated + "\n[Summary truncated]"
+
+
+def _validation_prompt_prefix(product_name: str, document_summary: str) -> str:
+    """Build the part of the validation prompt shared by all criteria of a product."""
+    document_summary = _truncate_summary(document_summary, get_settings().AGENT_SUMMARY_MAX_TOKENS)
+    return f"""
+Product/Service to validate: {product_name}
+
+Summary of RFP documents (Only for context, do not use this as the main source):
+---
+{document_summary}
+---
+
+Criterion to assess: \""""
+
+
+class AgentValidationResult(instructor.OpenAISchema):
+    """
+    Structured output for agent validation.
+    
+    Subclassing OpenAISchema lets instructor use the model as-is instead of
+    deriving a wrapper model (and its schema) on every request.
+    """
     is_met: bool = Field(..., description="Whether the criterion is met by the product/service.")
     summary: str = Field(..., description="A concise summary of the validation findings.")
-    references: List[Dict[str, str]] = Field(
+    references: List[ValidationReference] = Field(
         default_factory=list,
         description="List of source references used for validation, with title and URL."
     )
 
 
+@functools.lru_cache(maxsize=None)
+def _get_instructor_client(endpoint: str, api_key: str, api_version: str) -> instructor.Instructor:
+    """Create the instructor-wrapped Azure OpenAI client once per configuration."""
+    azure_client = AzureOpenAI(
+        azure_endpoint=endpoint,
+        api_key=api_key,
+        api_version=api_version
+    )
+    return instructor.from_openai(azure_client)
+
+
 class AIAgentService:
     """Service for managing Azure AI Agents."""
 
     def __init__(self):
         """Initialize the AI Agent Service."""
         self.settings = get_settings()
-        self.project_client: Optional[AIProjectClient] = None
-        self.agents_client = None
-        self.instructor_client: Optional[instructor.Instructor] = None
         self.agent_id: Optional[str] = None
         self.deep_research_agent_id: Optional[str] = None
-
-        # Check for proper configuration
+        self._bing_conn_id: Optional[str] = None
+        # Bounds concurrent agent runs across all callers of this service
+        self._semaphore = asyncio.Semaphore(self.settings.MAX_CONCURRENT_AGENT_REQUESTS)
+        # Serializes on-demand agent creation so concurrent validations share one agent
+        self._agent_lock = asyncio.Lock()
+        # Results of completed validations by (validation key, criterion text), LRU ordered
+        self._result_cache: "OrderedDict[Tuple[ValidationKey, str], AgentValidationResult]" = OrderedDict()
+
+    # Clients are created on first use, so processes that never validate
+    # criteria skip credential discovery and client setup entirely.
+
+    @functools.cached_property
+    def project_client(self) -> Optional[AIProjectClient]:
+        """Azure AI project client, or None if not configured or unavailable."""
         if not self.settings.AZURE_AI_AGENT_ENDPOINT:
             logger.warning("AZURE_AI_AGENT_ENDPOINT is not configured. AI Agent Service will not be available.")
-            return
+            return None
 
         try:
-            self.project_client = AIProjectClient(
+            project_client = AIProjectClient(
                 endpoint=self.settings.AZURE_AI_AGENT_ENDPOINT,
                 credential=DefaultAzureCredential(),
             )
-            self.agents_client = self.project_client.agents
-
-            # Instructor client for structured output
-            if self.settings.AZURE_OPENAI_ENDPOINT and self.settings.AZURE_OPENAI_API_KEY:
-                azure_client = AzureOpenAI(
-                    azure_endpoint=self.settings.AZURE_OPENAI_ENDPOINT,
-                    api_key=self.settings.AZURE_OPENAI_API_KEY,
-                    api_version=self.settings.AZURE_OPENAI_API_VERSION
-                )
-                self.instructor_client = instructor.from_openai(azure_client)
-
             logger.info("AI Agent Service initialized successfully")
+            return project_client
         except Exception as e:
             logger.error(f"Failed to initialize AIProjectClient: {e}")
-            self.project_client = None
-            self.agents_client = None
+            return None
+
+    @functools.cached_property
+    def agents_client(self):
+        """Agents operations of the project client, or None if unavailable."""
+        return self.project_client.agents if self.project_client else None
+
+    @functools.cached_property
+    def instructor_client(self) -> Optional[instructor.Instructor]:
+        """Instructor client for structured output, or None if not configured."""
+        if not (self.settings.AZURE_OPENAI_ENDPOINT and self.settings.AZURE_OPENAI_API_KEY):
+            return None
+        return _get_instructor_client(
+            self.settings.AZURE_OPENAI_ENDPOINT,
+            self.settings.AZURE_OPENAI_API_KEY,
+            self.settings.AZURE_OPENAI_API_VERSION
+        )
 
     async def initialize_agents(self):
         """Create and initialize the required agents on startup."""
@@ -94,7 +183,14 @@ class AIAgentService:
             raise RFPAgentException("Agent client not initialized.")
 
         try:
-            conn_id = self.project_client.connections.get(name=self.settings.BING_CONNECTION_NAME).id
+            # The connection never changes for the service's lifetime; look it up once.
+            # Only a successful lookup is cached, so failures are retried next time.
+            if self._bing_conn_id is None:
+                connection = await self._run_blocking(
+                    self.project_client.connections.get, name=self.settings.BING_CONNECTION_NAME
+                )
+                self._bing_conn_id = connection.id
+            conn_id = self._bing_conn_id
             
             if use_deep_research:
                 tool = DeepResearchTool(
@@ -106,10 +202,13 @@ class AIAgentService:
                 tool = BingGroundingTool(connection_id=conn_id)
                 agent_name = "rfp-bing-agent"
 
-            agent = self.agents_client.create_agent(
+            agent = await self._run_blocking(
+                self.agents_client.create_agent,
                 model=self.settings.AZURE_AI_AGENT_MODEL_DEPLOYMENT_NAME or self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
                 name=agent_name,
-                instructions="You are an expert RFP analyst. Your task is to validate if a given criterion is met by a specified product/service, based on the provided document summary and web research. Provide a clear 'yes' or 'no' answer, a justification, and cite your sources. YOU MUST ALWAYS PROVIDE FULL URLs TO YOUR SOURCES",
+                instructions=_AGENT_INSTRUCTIONS.format(
+                    schema=json.dumps(AgentValidationResult.model_json_schema())
+                ),
                 tools=tool.definitions,
             )
             return agent.id
@@ -123,232 +222,238 @@ class AIAgentService:
         document_summary: str,
         criterion_text: str,
         use_deep_research: bool = False
-    ) -> AgentValidationResult:
-        """Validate a single criterion using an AI agent."""
+    ) -> Optional[AgentValidationResult]:
+        """
+        Validate a single criterion using an AI agent.
+        
+        Returns None if the agent run fails; configuration errors raise
+        RFPAgentException.
+        """
+        return await self._run_validation(
+            _validation_prompt_prefix(product_name, document_summary),
+            self._validation_key(product_name, document_summary, use_deep_research),
+            criterion_text,
+            use_deep_research
+        )
+
+    async def _run_validation(
+        self,
+        prompt_prefix: str,
+        validation_key: ValidationKey,
+        criterion_text: str,
+        use_deep_research: bool
+    ) -> Optional[AgentValidationResult]:
+        """Validate a criterion given the precomputed prompt prefix and validation key."""
 
         if not self.instructor_client:
             raise RFPAgentException("Instructor client not initialized - Azure OpenAI credentials must be configured.")
 
+        # The validation key already identifies product, summary and agent type
+        cache_key = (validation_key, criterion_text)
+        cached = self._result_cache.get(cache_key)
+        if cached is not None:
+            self._result_cache.move_to_end(cache_key)
+            logger.info(f"Agent validation cache hit for: {criterion_text[:50]}...")
+            return cached
+
         try:
             # Get appropriate agent, create if needed
             agent_id = await self._get_or_create_agent(use_deep_research)
 
-            prompt = f"""
-Product/Service to validate: {product_name}
-
-Summary of RFP documents (Only for context, do not use this as the main source):
----
-{document_summary}
----
-
-Criterion to assess: "{criterion_text}"
-
-Based on the provided summary and your web research, determine if the product/service meets this criterion.
-Explain your reasoning and provide sources.
-            """
+            prompt = prompt_prefix + criterion_text + _VALIDATION_PROMPT_SUFFIX
 
-            print("=== Agent Prompt ===")
-            print (prompt)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Agent prompt:\n%s", prompt)
 
-            # Create thread and add message
-            thread = self.agents_client.threads.create()
-            
-            # Use correct API pattern for creating messages
-            message = self.agents_client.messages.create(
-                thread_id=thread.id,
-                role=MessageRole.USER,
-                content=prompt
-            )
-            
-            # Create and process the run
-            run = self.agents_client.runs.create_and_process(
-                thread_id=thread.id, 
-                agent_id=agent_id
+            # The agents SDK is synchronous; run its calls in worker threads
+            # so a long agent run does not block the event loop.
+            # Each criterion gets a fresh thread, so earlier verdicts cannot
+            # sway it; the thread, its message and the run are created in one call
+            run = await self._run_blocking(
+                self.agents_client.create_thread_and_process_run,
+                agent_id=agent_id,
+                thread=AgentThreadCreationOptions(
+                    messages=[ThreadMessageOptions(role=MessageRole.USER, content=prompt)]
+                )
             )
 
             if run.status != "completed":
                 error_message = run.last_error.message if run.last_error else "Unknown error"
                 logger.warning(f"Agent run failed with status {run.status}: {error_message}")
 
-            # Get the agent response from thread messages
-            agent_response = self._extract_agent_response(thread.id)
+            # Get the agent response from the thread
+            agent_response = await self._run_blocking(self._extract_agent_response, run.thread_id)
             
-            print ("=== Agent Response ===")
-            print (agent_response)
-
-            # Use instructor to get structured output
-            structured_result = self.instructor_client.chat.completions.create(
-                model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                response_model=AgentValidationResult,
-                messages=[
-                    {"role": "system", "content": "You are a summarization expert. Extract the final decision, summary, and references from the agent's response. Please include all references (full URL as provided). ONLY RETURN A SINGLE OBJECT."},
-                    {"role": "user", "content": f"Agent conversation:\n{agent_response}"}
-                ]
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Agent response:\n%s", agent_response)
+
+            structured_result = self._parse_agent_result(agent_response)
+            if structured_result is None:
+                # The agent did not return valid JSON; structure its answer with instructor
+                structured_result = await self._run_blocking(
+                    self.instructor_client.chat.completions.create,
+                    model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+                    response_model=AgentValidationResult,
+                    messages=[
+                        {"role": "system", "content": "You are a summarization expert. Extract the final decision, summary, and references from the agent's response. Please include all references (full URL as provided). ONLY RETURN A SINGLE OBJECT."},
+                        {"role": "user", "content": f"Agent conversation:\n{agent_response}"}
+                    ]
+                )
             
-                
             logger.info(f"Agent validation successful for: {criterion_text[:50]}...")
+            if run.status == "completed":
+                self._cache_result(cache_key, structured_result)
             return structured_result
             
+        except RFPAgentException:
+            raise
         except Exception as e:
-            logger.warning(f"Agent validation failed, falling back to Azure OpenAI: {e}")
+            logger.warning(f"Agent validation failed: {e}")
+            return None
+
+    async def validate_criteria_batch(
+        self,
+        product_name: str,
+        document_summary: str,
+        criteria_texts: List[str],
+        use_deep_research: bool = False
+    ) -> List[Union[Optional[AgentValidationResult], BaseException]]:
+        """
+        Validate several criteria concurrently.
+        
+        At most MAX_CONCURRENT_AGENT_REQUESTS validations run at a time.
+        Results are returned in input order: None for a failed agent run,
+        and the exception for a validation that raised RFPAgentException
+        (e.g. missing configuration), instead of failing the whole batch.
+        """
+        # Everything but the criterion text is shared, so build it once
+        prompt_prefix = _validation_prompt_prefix(product_name, document_summary)
+        validation_key = self._validation_key(product_name, document_summary, use_deep_research)
+
+        async def _validate_one(criterion_text: str) -> Optional[AgentValidationResult]:
+            async with self._semaphore:
+                return await self._run_validation(
+                    prompt_prefix, validation_key, criterion_text, use_deep_research
+                )
+
+        return await asyncio.gather(
+            *(_validate_one(criterion_text) for criterion_text in criteria_texts),
+            return_exceptions=True
+        )
+
+    def _cache_result(self, key: Tuple[ValidationKey, str], result: AgentValidationResult) -> None:
+        """Store a validation result, evicting the least recently used beyond the limit."""
+        limit = self.settings.AGENT_RESULT_CACHE_SIZE
+        if limit <= 0:
+            return
+        self._result_cache[key] = result
+        self._result_cache.move_to_end(key)
+        while len(self._result_cache) > limit:
+            self._result_cache.popitem(last=False)
 
+    @staticmethod
+    def _validation_key(product_name: str, document_summary: str, use_deep_research: bool) -> ValidationKey:
+        """Build the key identifying the product, summary and agent type of a validation."""
+        summary_hash = hashlib.sha256(document_summary.encode()).hexdigest()
+        return (product_name, summary_hash, use_deep_research)
 
     async def _get_or_create_agent(self, use_deep_research: bool) -> str:
         """Get existing agent or create new one if needed."""
         agent_id = self.deep_research_agent_id if use_deep_research and self.deep_research_agent_id else self.agent_id
         
         if not agent_id:
-            # Try to create agent on-demand
-            agent_id = await self._create_agent(use_deep_research)
-            if use_deep_research:
-                self.deep_research_agent_id = agent_id
-            else:
-                self.agent_id = agent_id
+            async with self._agent_lock:
+                # Another validation may have created it while we waited
+                agent_id = self.deep_research_agent_id if use_deep_research else self.agent_id
+                if not agent_id:
+                    # Try to create agent on-demand
+                    agent_id = await self._create_agent(use_deep_research)
+                    if use_deep_research:
+                        self.deep_research_agent_id = agent_id
+                    else:
+                        self.agent_id = agent_id
         
         return agent_id
 
+    async def _run_blocking(self, func, /, *args, **kwargs):
+        """Run a blocking SDK call on the agent I/O thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_agent_io_pool, functools.partial(func, *args, **kwargs))
+
+    async def cleanup(self):
+        """Delete created agents and shut down the agent I/O thread pool."""
+        await self.cleanup_agents()
+        _agent_io_pool.shutdown(wait=False, cancel_futures=True)
+
     async def cleanup_agents(self):
         """Delete agents created by this service."""
         if not self.agents_client:
             return
         try:
             if self.agent_id:
-                self.agents_client.delete_agent(self.agent_id)
+                await self._run_blocking(self.agents_client.delete_agent, self.agent_id)
                 logger.info(f"Deleted agent {self.agent_id}")
             if self.deep_research_agent_id:
-                self.agents_client.delete_agent(self.deep_research_agent_id)
+                await self._run_blocking(self.agents_client.delete_agent, self.deep_research_agent_id)
                 logger.info(f"Deleted agent {self.deep_research_agent_id}")
         except Exception as e:
             logger.error(f"Error cleaning up agents: {e}")
 
+    @staticmethod
+    def _parse_agent_result(agent_response: str) -> Optional[AgentValidationResult]:
+        """Parse the JSON object in an agent response, or None if there is no valid one."""
+        start = agent_response.find("{")
+        end = agent_response.rfind("}")
+        if start == -1 or end < start:
+            return None
+        try:
+            return AgentValidationResult.model_validate_json(agent_response[start:end + 1])
+        except ValidationError:
+            return None
+
+    @staticmethod
+    def _message_text(message) -> str:
+        """Join the text contents of a thread message."""
+        return "\n".join(content.text.value for content in message.text_messages)
+
     def _extract_agent_response(self, thread_id: str) -> str:
         """Extract the agent's response from thread messages."""
         try:
-            # Get all messages from the thread
-            messages = self.agents_client.messages.list(thread_id=thread_id)
-            
-            # Collect all conversation messages
+            # Collect all conversation messages in a single pass
             conversation_parts = []
-            
-            for message in messages:
-                # Use string comparison for message role instead of enum
-                role_str = str(message.role).lower() if hasattr(message, 'role') else 'unknown'
-                
-                # Extract message content
-                message_content = ""
-                if hasattr(message, 'content') and message.content:
-                    # Handle content array
-                    content_parts = []
-                    for content_item in message.content:
-                        if hasattr(content_item, 'text') and content_item.text:
-                            if hasattr(content_item.text, 'value'):
-                                content_parts.append(content_item.text.value)
-                            else:
-                                content_parts.append(str(content_item.text))
-                        elif hasattr(content_item, 'value'):
-                            content_parts.append(str(content_item.value))
-                        elif hasattr(content_item, 'message'):
-                            content_parts.append(str(content_item.message))
-                    message_content = "\n".join(content_parts)
-                elif hasattr(message, 'text'):
-                    # Direct text property
-                    if hasattr(message.text, 'value'):
-                        message_content = message.text.value
-                    else:
-                        message_content = str(message.text)
-                elif hasattr(message, 'message'):
-                    message_content = str(message.message)
-                
+            for message in self.agents_client.messages.list(thread_id=thread_id):
+                message_content = self._message_text(message)
                 if message_content.strip():
                     # Add role prefix for clarity
-                    role_prefix = "USER" if 'user' in role_str else "ASSISTANT" if 'assistant' in role_str else role_str.upper()
+                    role_prefix = "USER" if message.role == MessageRole.USER else "ASSISTANT"
                     conversation_parts.append(f"[{role_prefix}]: {message_content}")
             
-            # Join all conversation parts
-            full_conversation = "\n\n".join(conversation_parts)
-            
-            if not full_conversation.strip():
+            if not conversation_parts:
                 logger.warning("No conversation content found in thread")
-                # Try alternative approach - get just the assistant messages
-                assistant_messages = []
-                for message in messages:
-                    role_str = str(message.role).lower() if hasattr(message, 'role') else 'unknown'
-                    if 'assistant' in role_str:
-                        if hasattr(message, 'content') and message.content:
-                            for content_item in message.content:
-                                if hasattr(content_item, 'text') and hasattr(content_item.text, 'value'):
-                                    assistant_messages.append(content_item.text.value)
-                
-                if assistant_messages:
-                    return "\n\n".join(assistant_messages)
-                else:
-                    return "No response content available from agent"
+                return "No response content available from agent"
             
             logger.info(f"Extracted conversation with {len(conversation_parts)} parts")
-            return full_conversation
+            return "\n\n".join(conversation_parts)
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error extracting agent response: {e}")
-            
-            # Fallback: try to get any text content from messages
-            try:
-                messages = self.agents_client.messages.list(thread_id=thread_id)
-                fallback_content = []
-                
-                for message in messages:
-                    # Try multiple ways to extract content
-                    content = None
-                    if hasattr(message, 'content'):
-                        if isinstance(message.content, list):
-                            for item in message.content:
-                                if hasattr(item, 'text'):
-                                    content = getattr(item.text, 'value', str(item.text))
-                                    break
-                        elif hasattr(message.content, 'text'):
-                            content = getattr(message.content.text, 'value', str(message.content.text))
-                        else:
-                            content = str(message.content)
-                    elif hasattr(message, 'text'):
-                        content = getattr(message.text, 'value', str(message.text))
-                    
-                    if content and content.strip():
-                        fallback_content.append(content)
-                
-                if fallback_content:
-                    return "\n\n".join(fallback_content)
-                    
-            except Exception as fallback_error:
-                logger.error(f"Fallback extraction also failed: {fallback_error}")
-            
-            return f"Error extracting response: {str(e)}"
+            logger.exception(f"Error extracting agent response: {e}")
+            return ""
 
     def _get_last_agent_message(self, thread_id: str) -> str:
         """Get the last agent message from the thread."""
         try:
-            messages = self.agents_client.messages.list(thread_id=thread_id)
-            
-            for message in reversed(messages):  # Start from the most recent
-                role_str = str(message.role).lower() if hasattr(message, 'role') else 'unknown'
-                
-                if 'assistant' in role_str:
-                    if hasattr(message, 'content') and message.content:
-                        for content_item in message.content:
-                            if hasattr(content_item, 'text') and content_item.text:
-                                if hasattr(content_item.text, 'value'):
-                                    return content_item.text.value
-                                else:
-                                    return str(content_item.text)
-                    elif hasattr(message, 'text') and message.text:
-                        if hasattr(message.text, 'value'):
-                            return message.text.value
-                        else:
-                            return str(message.text)
+            # Newest first, so the scan stops at the latest agent message
+            messages = self.agents_client.messages.list(
+                thread_id=thread_id, order=ListSortOrder.DESCENDING
+            )
+            for message in messages:
+                if message.role == MessageRole.AGENT:
+                    message_content = self._message_text(message)
+                    if message_content:
+                        return message_content
             
             return "No agent message found"
             
         except Exception as e:
             logger.error(f"Error getting last agent message: {e}")
-            return f"Error: {str(e)}"
\ No newline at end of file
+            return f"Error: {str(e)}"
@@ -1,10 +1,15 @@
 """Criteria extraction service using Instructor and Azure OpenAI."""
 
+import asyncio
+import functools
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor
+import json
 import logging
-import instructor
-from openai import AzureOpenAI
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, Field
+from openai import AsyncAzureOpenAI
+from openai.types import Batch
+from typing import AsyncIterator, FrozenSet, Iterable, Iterator, List, Dict, Any, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError
 from uuid import UUID
 import re
 
@@ -16,9 +21,310 @@ from app.models.criteria import (
     CriteriaPriority
 )
 from app.core.exceptions import CriteriaExtractionError
+from app.core.tokens import chars_per_token
+from app.services.llm_cache import LLMCache, get_llm_cache
+from app.services.openai_client import get_async_openai_client, get_instructor_client
 
 logger = logging.getLogger(__name__)
 
+# Keywords marking a line as a likely criterion in the fallback extraction
+_CRITERIA_KEYWORDS = (
+    # German
+    'muss', 'soll', 'sollte', 'Anforderung', 'Spezifikation', 'Kriterium',
+    'Voraussetzung', 'erforderlich', 'obligatorisch', 'zwingend',
+    # English
+    'must', 'shall', 'should', 'requirement', 'required', 'mandatory',
+    'specification', 'criteria', 'criterion', 'standard', 'compliance',
+    'minimum', 'maximum', 'threshold',
+)
+_CRITERIA_KEYWORD_RE = re.compile(r'\b(?:' + '|'.join(_CRITERIA_KEYWORDS) + r')\b', re.IGNORECASE)
+
+# Matches each whole line containing a criteria keyword
+_CRITERIA_LINE_RE = re.compile(
+    r'^.*\b(?:' + '|'.join(_CRITERIA_KEYWORDS) + r')\b.*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+# Keyword tables for heuristic categorization and prioritization. Keywords
+# match as plain substrings of the lowercased criterion text.
+_CATEGORY_KEYWORDS = (
+    (CriteriaCategory.TECHNICAL, frozenset({
+        'technical', 'system', 'technology', 'architecture', 'platform',
+        'software', 'hardware', 'infrastructure', 'network', 'database',
+        'api', 'interface', 'protocol', 'standard', 'specification'
+    })),
+    (CriteriaCategory.SECURITY, frozenset({
+        'security', 'secure', 'encryption', 'authentication', 'authorization',
+        'compliance', 'gdpr', 'privacy', 'audit', 'vulnerability',
+        'firewall', 'access control', 'certificate', 'ssl', 'tls'
+    })),
+    (CriteriaCategory.PERFORMANCE, frozenset({
+        'performance', 'speed', 'latency', 'throughput', 'scalability',
+        'capacity', 'load', 'response time', 'availability', 'uptime',
+        'reliability', 'efficiency', 'optimization', 'bandwidth'
+    })),
+    (CriteriaCategory.SUPPORT, frozenset({
+        'support', 'maintenance', 'service', 'help', 'assistance',
+        'documentation', 'training', 'backup', 'recovery', 'monitoring',
+        'troubleshooting', 'ticket', 'sla', 'response time'
+    })),
+    (CriteriaCategory.INTEGRATION, frozenset({
+        'integration', 'interface', 'compatibility', 'interoperability',
+        'connect', 'sync', 'import', 'export', 'migration',
+        'third-party', 'plugin', 'connector', 'webhook'
+    })),
+    (CriteriaCategory.FINANCIAL, frozenset({
+        'cost', 'price', 'pricing', 'budget', 'financial', 'commercial',
+        'license', 'subscription', 'payment', 'billing', 'invoice',
+        'contract', 'terms', 'conditions', 'warranty'
+    })),
+)
+
+# Checked in order; the first level with a matching keyword wins
+_PRIORITY_KEYWORDS = (
+    (CriteriaPriority.CRITICAL, frozenset({
+        'critical', 'mandatory', 'required', 'must', 'shall', 'essential',
+        'vital', 'crucial', 'obligatory', 'zwingend', 'erforderlich'
+    })),
+    (CriteriaPriority.HIGH, frozenset({
+        'important', 'high', 'priority', 'significant', 'key', 'major',
+        'should', 'soll', 'wichtig'
+    })),
+    (CriteriaPriority.LOW, frozenset({
+        'optional', 'nice to have', 'preferred', 'desirable', 'minor',
+        'could', 'might', 'wünschenswert'
+    })),
+)
+
+# One lookahead alternation finds every keyword occurrence in a single scan.
+# Longest keywords come first, so at each position the longest match wins;
+# the shorter keywords it starts with are added back via _KEYWORD_PREFIXES.
+_ALL_KEYWORDS = sorted(
+    {kw for _, kws in _CATEGORY_KEYWORDS for kw in kws}
+    | {kw for _, kws in _PRIORITY_KEYWORDS for kw in kws},
+    key=len,
+    reverse=True
+)
+_KEYWORD_RE = re.compile('(?=(' + '|'.join(map(re.escape, _ALL_KEYWORDS)) + '))')
+_KEYWORD_PREFIXES = {
+    kw: frozenset(other for other in _ALL_KEYWORDS if kw.startswith(other))
+    for kw in _ALL_KEYWORDS
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _find_keywords(text_lower: str) -> FrozenSet[str]:
+    """Return the table keywords occurring in the lowercased text."""
+    found = set()
+    for keyword in _KEYWORD_RE.findall(text_lower):
+        found |= _KEYWORD_PREFIXES[keyword]
+    return frozenset(found)
+
+
+_HEADER_RE = re.compile(r'^#{1,6}\s+.*$', re.MULTILINE)
+_NON_SPACE_RE = re.compile(r'\S')
+
+# Finer boundaries tried in order for spans still larger than a chunk:
+# paragraphs, lines, sentences, then any whitespace
+_SPLIT_LEVELS = (
+    re.compile(r'\n\n'),
+    re.compile(r'\n'),
+    re.compile(r'(?<=[.!?])\s+'),
+    re.compile(r'\s+'),
+)
+
+
+def _pack_spans(
+    content: str,
+    pieces: Iterable[Tuple[int, int]],
+    chunk_size: int
+) -> Iterator[Tuple[int, int]]:
+    """
+    Greedily merge consecutive (start, end) pieces of content into spans of
+    at most chunk_size characters. Blank pieces are skipped; a single piece
+    larger than chunk_size becomes its own span.
+    """
+    span_start = span_end = None
+    for start, end in pieces:
+        if not _NON_SPACE_RE.search(content, start, end):
+            continue
+        if span_start is None:
+            span_start = start
+        elif end - span_start > chunk_size:
+            yield span_start, span_end
+            span_start = start
+        span_end = end
+    if span_start is not None:
+        yield span_start, span_end
+
+
+def _section_pieces(content: str) -> Iterator[Tuple[int, int]]:
+    """Yield the (start, end) offsets of markdown headers and the text between them."""
+    start = 0
+    for match in _HEADER_RE.finditer(content):
+        yield start, match.start()
+        yield match.span()
+        start = match.end()
+    yield start, len(content)
+
+
+def _split_span(
+    content: str,
+    start: int,
+    end: int,
+    chunk_size: int,
+    level: int = 0
+) -> Iterator[Tuple[int, int]]:
+    """Recursively split a span of content at ever finer boundaries until each part fits a chunk."""
+    if end - start <= chunk_size:
+        yield start, end
+        return
+    if level == len(_SPLIT_LEVELS):
+        # No boundary left to split at; cut hard
+        for s in range(start, end, chunk_size):
+            yield s, min(s + chunk_size, end)
+        return
+    
+    pieces = []
+    piece_start = start
+    for match in _SPLIT_LEVELS[level].finditer(content, start, end):
+        pieces.append((piece_start, match.start()))
+        piece_start = match.end()
+    pieces.append((piece_start, end))
+    
+    for span_start, span_end in _pack_spans(content, pieces, chunk_size):
+        yield from _split_span(content, span_start, span_end, chunk_size, level + 1)
+
+
+# Numeric requirements: percentages, time periods, storage amounts, user counts
+_NUMERIC_REQUIREMENT_RE = re.compile(
+    r'\d+%'
+    r'|\d+\s*(?:hour|minute|second|day|month|year)s?'
+    r'|\d+\s*(?:gb|mb|kb|tb)'
+    r'|\d+\s*(?:user|concurrent|simultaneous)',
+    re.IGNORECASE
+)
+
+
+def _determine_category_from_text(text_lower: str) -> CriteriaCategory:
+    """Determine category based on analysis of the lowercased text."""
+    found = _find_keywords(text_lower)
+    
+    # Return the category with the most keyword matches
+    category, score = max(
+        ((category, len(found & keywords)) for category, keywords in _CATEGORY_KEYWORDS),
+        key=lambda item: item[1]
+    )
+    return category if score else CriteriaCategory.OTHER
+
+
+def _determine_priority_from_text(text_lower: str) -> CriteriaPriority:
+    """Determine priority based on the lowercased text."""
+    found = _find_keywords(text_lower)
+    
+    for priority, keywords in _PRIORITY_KEYWORDS:
+        if not found.isdisjoint(keywords):
+            return priority
+    
+    return CriteriaPriority.MEDIUM
+
+
+_WORD_RE = re.compile(r'\b\w+\b')
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+
+
+def _extract_keywords_from_text(text_lower: str) -> List[str]:
+    """Extract key terms from the lowercased criterion text."""
+    # Simple keyword extraction - in production, use more sophisticated NLP
+    
+    # Collect the first 10 unique meaningful terms in text order
+    keywords = {}
+    for match in _WORD_RE.finditer(text_lower):
+        word = match.group()
+        if len(word) > 3 and word not in _STOP_WORDS and word not in keywords:
+            keywords[word] = None
+            if len(keywords) == 10:
+                break
+    return list(keywords)
+
+
+def _extract_requirements_from_text(text: str) -> List[str]:
+    """Extract specific requirements from the text."""
+    # Look for numeric requirements
+    return _NUMERIC_REQUIREMENT_RE.findall(text)[:5]  # Limit to 5 requirements
+
+
+CriterionAnalysis = Tuple[CriteriaCategory, CriteriaPriority, List[str], List[str]]
+
+
+def _analyze_criterion_texts(texts: List[str]) -> List[CriterionAnalysis]:
+    """Determine category, priority, keywords and requirements for each criterion text."""
+    analyses = []
+    for text in texts:
+        # Lowercase once for all keyword-based heuristics
+        text_lower = text.lower()
+        analyses.append((
+            _determine_category_from_text(text_lower),
+            _determine_priority_from_text(text_lower),
+            _extract_keywords_from_text(text_lower),
+            _extract_requirements_from_text(text),
+        ))
+    return analyses
+
+
+# Below this many criteria, analysis runs inline; worker startup and
+# pickling would cost more than they save
+_PARALLEL_ANALYSIS_THRESHOLD = 2000
+_ANALYSIS_BATCH_SIZE = 100
+
+_analysis_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_analysis_pool() -> ProcessPoolExecutor:
+    """Get the worker process pool for criteria analysis, starting it on first use."""
+    global _analysis_pool
+    if _analysis_pool is None:
+        _analysis_pool = ProcessPoolExecutor()
+    return _analysis_pool
+
+
+def shutdown_analysis_pool() -> None:
+    """Shut down the criteria analysis worker processes, if started."""
+    global _analysis_pool
+    if _analysis_pool is not None:
+        _analysis_pool.shutdown(wait=False, cancel_futures=True)
+        _analysis_pool = None
+
+
+# Prompts are kept short: they are sent with every chunk, and the response
+# schema already describes the fields to fill in
+_EXTRACTION_SYSTEM_PROMPT = (
+    "You extract requirements and evaluation criteria from procurement documents "
+    "(RFPs, RFQs, tenders) in any language. Extract ALL of them, as exact text from "
+    "the document at the document's own granularity."
+)
+
+_CATEGORIZATION_SYSTEM_PROMPT = "You categorize RFP criteria. Assign each criterion to exactly one category."
+
+_CATEGORIZATION_PROMPT = """Categorize each criterion into exactly one of these 6 categories:
+1. Technical Requirements - architecture, technology stack, technical specifications
+2. Security & Compliance - security measures, regulatory compliance, data protection
+3. Performance & Scalability - performance metrics, scalability, capacity
+4. Integration & Compatibility - system integration, compatibility, interoperability
+5. Support & Maintenance - support services, maintenance, SLAs
+6. Commercial & Legal - pricing, contracts, legal and commercial terms
+
+Criteria:
+"""
+
+# Output token budget per criterion when categorizing
+_CATEGORIZATION_TOKENS_PER_CRITERION = 40
+
+# How often to check on a submitted extraction batch
+_BATCH_POLL_INTERVAL_SECONDS = 60
+_BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
 
 class ExtractedCriterion(BaseModel):
     """Model for individual extracted criterion using Instructor."""
@@ -32,9 +338,10 @@ class ExtractedCriterion(BaseModel):
 
 class CriteriaExtractionResult(BaseModel):
     """Model for complete criteria extraction result."""
+    # Declared first so streamed criteria can carry the confidence as they arrive
+    confidence_score: float = Field(..., description="Overall confidence in extraction", ge=0.0, le=1.0)
     criteria: List[ExtractedCriterion] = Field(..., description="List of extracted criteria")
     total_found: int = Field(..., description="Total number of criteria found")
-    confidence_score: float = Field(..., description="Overall confidence in extraction", ge=0.0, le=1.0)
 
 
 class CriteriaCategorization(BaseModel):
@@ -43,10 +350,33 @@ class CriteriaCategorization(BaseModel):
         ..., 
         description="Criteria organized into exactly 6 categories"
     )
-    category_descriptions: Dict[str, str] = Field(
-        ...,
-        description="Description of what each category contains"
-    )
+
+
+@dataclass(slots=True, frozen=True)
+class _ExtractionRow:
+    """
+    Compact record of an LLM-extracted criterion.
+    
+    Large documents produce thousands of these while chunks are in flight;
+    they only become CriteriaExtraction models once results are returned.
+    """
+    document_id: UUID
+    raw_text: str
+    chunk_number: int
+    extraction_confidence: float
+    
+    def to_model(self) -> CriteriaExtraction:
+        """Convert to the CriteriaExtraction model."""
+        # Rows are only built from criteria the model completed, so the text
+        # is present; construct without re-validating.
+        return CriteriaExtraction.model_construct(
+            document_id=self.document_id,
+            raw_text=self.raw_text,
+            processed_text=self.raw_text.strip(),
+            page_number=None,
+            section_title=f"Chunk {self.chunk_number}",
+            extraction_confidence=self.extraction_confidence
+        )
 
 
 class CriteriaExtractionService:
@@ -56,23 +386,18 @@ class CriteriaExtractionService:
         """Initialize the criteria extraction service."""
         self.settings = get_settings()
         self.client = None
+        self._openai_client: Optional[AsyncAzureOpenAI] = None
         
         if (self.settings.AZURE_OPENAI_ENDPOINT and 
             self.settings.AZURE_OPENAI_API_KEY and 
             self.settings.AZURE_OPENAI_DEPLOYMENT_NAME):
             try:
-                # Initialize Azure OpenAI client with Instructor
-                client = AzureOpenAI(
-                    azure_endpoint=self.settings.AZURE_OPENAI_ENDPOINT,
-                    api_key=self.settings.AZURE_OPENAI_API_KEY,
-                    api_version=self.settings.AZURE_OPENAI_API_VERSION
-                )
-                self.client = instructor.from_openai(client)
+                # Async client so concurrent chunk calls share the event loop
+                self.client = get_instructor_client()
+                self._openai_client = get_async_openai_client()
                 logger.info("Azure OpenAI criteria extraction service initialized successfully")
             except Exception as e:
-                import traceback
-                traceback.print_exc()
-                logger.warning(f"Failed to initialize Azure OpenAI client: {e}")
+                logger.warning(f"Failed to initialize Azure OpenAI client: {e}", exc_info=True)
                 self.client = None
         else:
             logger.warning("Azure OpenAI credentials not configured")
@@ -81,7 +406,8 @@ class CriteriaExtractionService:
         self, 
         content: str, 
         document_id: UUID,
-        max_criteria: int = None
+        max_criteria: int = None,
+        max_concurrency: int = None
     ) -> List[CriteriaExtraction]:
         """
         Extract criteria from document content using Instructor.
@@ -90,6 +416,7 @@ class CriteriaExtractionService:
             content: Document content in markdown format
             document_id: UUID of the source document
             max_criteria: Maximum number of criteria to extract
+            max_concurrency: Maximum number of chunks sent to the LLM at once
             
         Returns:
             List of extracted criteria
@@ -107,104 +434,126 @@ class CriteriaExtractionService:
             # Set max criteria if not provided
             if max_criteria is None:
                 max_criteria = self.settings.MAX_CRITERIA_PER_DOCUMENT
+            if max_concurrency is None:
+                max_concurrency = self.settings.EXTRACTION_CONCURRENCY
             
             # Process content in semantic chunks to avoid token limits
-            # Target chunk size: ~40k characters (~10k tokens)
-            chunk_size = 40000
+            chunk_size = self._chunk_size(content)
             
             if len(content) <= chunk_size:
                 # Process as single chunk
-                return await self._extract_criteria_from_chunk(content, document_id, max_criteria, 1, 1)
+                rows = await self._extract_criteria_from_chunk(content, document_id, max_criteria, 1)
+                return [row.to_model() for row in rows]
             else:
                 # Process in multiple chunks
-                chunks = self._split_content_semantically(content, chunk_size)
-                logger.info(f"Processing content in {len(chunks)} semantic chunks")
+                semaphore = asyncio.Semaphore(max_concurrency)
                 
-                all_extractions = []
-                for i, chunk in enumerate(chunks):
-                    chunk_extractions = await self._extract_criteria_from_chunk(
-                        chunk, document_id, max_criteria, i + 1, len(chunks)
-                    )
-                    all_extractions.extend(chunk_extractions)
-                    
-                    # Respect max criteria limit across all chunks
-                    if len(all_extractions) >= max_criteria:
-                        all_extractions = all_extractions[:max_criteria]
+                async def extract_chunk(chunk_number: int, chunk: str) -> List[_ExtractionRow]:
+                    async with semaphore:
+                        return await self._extract_criteria_from_chunk(
+                            chunk, document_id, max_criteria, chunk_number
+                        )
+                
+                # Start each chunk's LLM call as soon as the chunk is split off,
+                # so the first requests are in flight while splitting continues.
+                # Repeated chunks (e.g. boilerplate) share the first one's call.
+                chunk_tasks = []
+                unique_tasks: Dict[str, asyncio.Task] = {}
+                chunk_count = 0
+                for chunk in self._iter_chunks(content, chunk_size):
+                    chunk_count += 1
+                    # Chunks without any requirement language (cover pages, tables
+                    # of contents, boilerplate) are not worth an LLM call
+                    if self.settings.EXTRACTION_SKIP_KEYWORDLESS_CHUNKS and not _CRITERIA_KEYWORD_RE.search(chunk):
+                        continue
+                    task = unique_tasks.get(chunk)
+                    if task is None:
+                        task = unique_tasks[chunk] = asyncio.create_task(extract_chunk(chunk_count, chunk))
+                        # Let the new task send its request before splitting further
+                        await asyncio.sleep(0)
+                    chunk_tasks.append((chunk_count, task))
+                
+                logger.info(
+                    f"Processing content in {chunk_count} semantic chunks, "
+                    f"skipping {chunk_count - len(chunk_tasks)} without criteria keywords "
+                    f"and {len(chunk_tasks) - len(unique_tasks)} duplicates "
+                    f"(concurrency: {max_concurrency})"
+                )
+                # Once the leading chunks already yield max_criteria rows, the
+                # later chunks can only be truncated away, so cancel their calls
+                # instead of paying for the remaining completions
+                pending = set(unique_tasks.values())
+                while pending:
+                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    if pending and self._ordered_row_count(chunk_tasks) >= max_criteria:
+                        logger.info(f"Reached {max_criteria} criteria, cancelling {len(pending)} chunk requests")
+                        for task in pending:
+                            task.cancel()
+                        await asyncio.gather(*pending, return_exceptions=True)
+                        break
+                
+                # Keep document order and respect max criteria limit across all chunks
+                all_rows: List[_ExtractionRow] = []
+                for chunk_number, task in chunk_tasks:
+                    if task.cancelled() or len(all_rows) >= max_criteria:
                         break
+                    all_rows.extend(
+                        row if row.chunk_number == chunk_number else replace(row, chunk_number=chunk_number)
+                        for row in task.result()
+                    )
+                all_extractions = [row.to_model() for row in all_rows[:max_criteria]]
                 
-                logger.info(f"Successfully extracted {len(all_extractions)} criteria from {len(chunks)} chunks")
+                logger.info(f"Successfully extracted {len(all_extractions)} criteria from {chunk_count} chunks")
                 return all_extractions
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error extracting criteria: {e}")
+            logger.exception(f"Error extracting criteria: {e}")
             logger.info("Attempting fallback criteria extraction...")
             return await self._fallback_criteria_extraction(content, document_id, max_criteria)
     
-    def _split_content_semantically(self, content: str, chunk_size: int) -> List[str]:
+    def _chunk_size(self, content: str) -> int:
+        """Target chunk size in characters for content, derived from the token budget per chunk."""
+        return int(self.settings.EXTRACTION_CHUNK_TOKENS * chars_per_token(content))
+    
+    @staticmethod
+    def _ordered_row_count(chunk_tasks: List[Tuple[int, asyncio.Task]]) -> int:
+        """Count the rows of the finished chunks that lead the document."""
+        count = 0
+        for _, task in chunk_tasks:
+            if not task.done():
+                break
+            count += len(task.result())
+        return count
+    
+    def _iter_chunks(self, content: str, chunk_size: int) -> Iterator[str]:
         """
         Split content into semantic chunks based on markdown structure.
         
+        Chunks are yielded in document order as soon as each is formed, so
+        callers can start working on the first ones while the rest of the
+        document is still being split.
+        
         Args:
             content: Full document content
             chunk_size: Target size for each chunk
             
-        Returns:
-            List of content chunks
+        Yields:
+            Content chunks
         """
-        chunks = []
-        current_chunk = ""
-        
-        # Split by markdown sections (headers)
-        sections = re.split(r'(^#{1,6}\s+.*$)', content, flags=re.MULTILINE)
-        
-        for section in sections:
-            if not section.strip():
-                continue
-                
-            # If adding this section would exceed chunk size, start new chunk
-            if len(current_chunk) + len(section) > chunk_size and current_chunk:
-                chunks.append(current_chunk.strip())
-                current_chunk = section
-            else:
-                current_chunk += "\n" + section if current_chunk else section
-        
-        # Add the last chunk
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        
-        # If we still have chunks that are too large, split by paragraphs
-        final_chunks = []
-        for chunk in chunks:
-            if len(chunk) <= chunk_size:
-                final_chunks.append(chunk)
-            else:
-                # Split large chunk by paragraphs
-                paragraphs = chunk.split('\n\n')
-                sub_chunk = ""
-                
-                for paragraph in paragraphs:
-                    if len(sub_chunk) + len(paragraph) > chunk_size and sub_chunk:
-                        final_chunks.append(sub_chunk.strip())
-                        sub_chunk = paragraph
-                    else:
-                        sub_chunk += "\n\n" + paragraph if sub_chunk else paragraph
-                
-                if sub_chunk.strip():
-                    final_chunks.append(sub_chunk.strip())
-        
-        logger.info(f"Split content into {len(final_chunks)} semantic chunks")
-        return final_chunks
+        # Split by markdown sections (headers), working on offsets so the
+        # content is only sliced once per final chunk
+        for start, end in _pack_spans(content, _section_pieces(content), chunk_size):
+            # If the chunk is still too large, split it further
+            for chunk_start, chunk_end in _split_span(content, start, end, chunk_size):
+                yield content[chunk_start:chunk_end].strip()
     
     async def _extract_criteria_from_chunk(
         self, 
         chunk: str, 
         document_id: UUID, 
         max_criteria: int,
-        chunk_number: int,
-        total_chunks: int
-    ) -> List[CriteriaExtraction]:
+        chunk_number: int
+    ) -> List[_ExtractionRow]:
         """
         Extract criteria from a single content chunk.
         
@@ -212,63 +561,278 @@ class CriteriaExtractionService:
             chunk: Content chunk to process
             document_id: UUID of the source document
             max_criteria: Maximum criteria to extract
-            chunk_number: Current chunk number
-            total_chunks: Total number of chunks
+            chunk_number: Position of the chunk in the document, starting at 1
             
         Returns:
-            List of extracted criteria from this chunk
+            Extraction rows for the criteria found in this chunk
         """
+        rows = []
         try:
-            logger.info(f"Processing chunk {chunk_number}/{total_chunks} ({len(chunk)} characters)")
+            logger.info(f"Processing chunk {chunk_number} ({len(chunk)} characters)")
+            
+            async for row in self._stream_chunk_rows(chunk, document_id, chunk_number):
+                rows.append(row)
             
-            extraction_prompt = f"""
-            Analyze this document chunk and extract ALL requirements, criteria, specifications, and evaluation points.
-            This document may be in German, English, or other languages.
-            Provide the exact text as found in the document.
-            Include the internal ID of the criteria in the criteria_id field. 
+            logger.info(f"Chunk {chunk_number}: extracted {len(rows)} criteria")
+            return rows
             
-            Chunk {chunk_number} of {total_chunks}:
+        except Exception as e:
+            logger.exception(f"Error extracting criteria from chunk {chunk_number}: {e}")
+            # Keep the criteria that were completed before the failure
+            return rows
+    
+    async def _stream_chunk_rows(
+        self,
+        chunk: str,
+        document_id: UUID,
+        chunk_number: int
+    ) -> AsyncIterator[_ExtractionRow]:
+        """
+        Stream criteria from a content chunk as the LLM generates them.
+        
+        A criterion is yielded once the model has moved on to the next one
+        (or the response ends complete), so callers never see a partial
+        criterion; a response cut off at the output budget is logged.
+        Complete responses are cached, so identical chunks are not sent to
+        the LLM again.
+        """
+        messages = self._chunk_messages(chunk, chunk_number)
+        cache = get_llm_cache()
+        cache_key = LLMCache.make_key(
+            self.settings.AZURE_OPENAI_DEPLOYMENT_NAME, *(m["content"] for m in messages)
+        )
+        
+        if cache:
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Chunk {chunk_number}: using cached extraction")
+                result = CriteriaExtractionResult.model_validate_json(cached)
+                for row in self._result_to_rows(result, document_id, chunk_number):
+                    yield row
+                return
+        
+        stream = self.client.chat.completions.create_partial(
+            model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+            response_model=CriteriaExtractionResult,
+            messages=messages,
+            max_tokens=self.settings.EXTRACTION_MAX_TOKENS,
+            temperature=0.1
+        )
+        
+        emitted = 0
+        partial = None
+        async for partial in stream:
+            if partial.confidence_score is None or not partial.criteria:
+                continue
+            # All but the last criterion in the list are complete
+            while emitted < len(partial.criteria) - 1:
+                yield self._to_row(
+                    partial.criteria[emitted], document_id, chunk_number, partial.confidence_score
+                )
+                emitted += 1
+        
+        if partial is None:
+            return
+        
+        # The last criterion is only complete if the whole response is; with
+        # structured outputs an invalid response means it was cut off
+        try:
+            result = CriteriaExtractionResult.model_validate(partial.model_dump())
+        except ValidationError:
+            logger.warning(
+                f"Chunk {chunk_number}: response cut off at {self.settings.EXTRACTION_MAX_TOKENS} output tokens "
+                f"after {emitted} criteria; later criteria in the chunk are missing"
+            )
+            return
+        
+        for criterion in result.criteria[emitted:]:
+            yield self._to_row(criterion, document_id, chunk_number, result.confidence_score)
+        
+        if cache:
+            await cache.set(cache_key, result.model_dump_json())
+    
+    def _chunk_messages(self, chunk: str, chunk_number: int) -> List[Dict[str, str]]:
+        """Build the chat messages asking the LLM to extract criteria from a chunk."""
+        return [
+            {"role": "system", "content": _EXTRACTION_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Chunk {chunk_number}:\n\n{chunk}"}
+        ]
+    
+    def _result_to_rows(
+        self,
+        result: CriteriaExtractionResult,
+        document_id: UUID,
+        chunk_number: int
+    ) -> List[_ExtractionRow]:
+        """Convert an LLM extraction result into extraction rows."""
+        return [
+            self._to_row(criterion, document_id, chunk_number, result.confidence_score)
+            for criterion in result.criteria
+        ]
+    
+    def _to_row(
+        self,
+        criterion: ExtractedCriterion,
+        document_id: UUID,
+        chunk_number: int,
+        confidence: float
+    ) -> _ExtractionRow:
+        """Convert a single LLM-extracted criterion into an extraction row."""
+        return _ExtractionRow(document_id, criterion.criterion_text, chunk_number, confidence)
+    
+    def _batch_request_line(
+        self,
+        custom_id: str,
+        chunk: str,
+        chunk_number: int,
+        deployment: str,
+        response_format: Dict[str, Any]
+    ) -> str:
+        """Build the Batch API JSONL line requesting extraction from a chunk."""
+        return json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/chat/completions",
+            "body": {
+                "model": deployment,
+                "messages": self._chunk_messages(chunk, chunk_number),
+                "response_format": response_format,
+                "max_tokens": self.settings.EXTRACTION_MAX_TOKENS,
+                "temperature": 0.1
+            }
+        })
+    
+    async def _submit_extraction_batch(
+        self,
+        documents: AsyncIterator[Tuple[UUID, str]]
+    ) -> Tuple[Optional[Batch], Dict[UUID, List[str]]]:
+        """
+        Upload the extraction requests of several documents as one batch job.
+        
+        Document content is only held while its request lines are built, so
+        nothing of it stays in memory while the job runs.
+        
+        Returns:
+            The created batch (None if there was nothing to submit) and the
+            request IDs of each document's chunks, in order
+        """
+        deployment = self.settings.AZURE_OPENAI_BATCH_DEPLOYMENT_NAME
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": CriteriaExtractionResult.__name__,
+                "schema": CriteriaExtractionResult.model_json_schema()
+            }
+        }
+        
+        # Identical chunks (shared boilerplate, re-uploaded documents) are
+        # requested once; chunk_requests maps every chunk to its request
+        lines = []
+        request_ids: Dict[str, str] = {}
+        chunk_requests: Dict[UUID, List[str]] = {}
+        async for document_id, content in documents:
+            chunk_size = self._chunk_size(content)
+            chunks = [content] if len(content) <= chunk_size else list(self._iter_chunks(content, chunk_size))
+            chunk_requests[document_id] = []
+            for i, chunk in enumerate(chunks):
+                custom_id = request_ids.get(chunk)
+                if custom_id is None:
+                    custom_id = request_ids[chunk] = str(len(request_ids))
+                    lines.append(self._batch_request_line(custom_id, chunk, i + 1, deployment, response_format))
+                chunk_requests[document_id].append(custom_id)
+        if not lines:
+            return None, chunk_requests
+        
+        input_file = await self._openai_client.files.create(
+            file=("criteria_extraction_batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = await self._openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted extraction batch {batch.id} with {len(lines)} unique chunks from {len(chunk_requests)} documents")
+        return batch, chunk_requests
+    
+    async def extract_criteria_batch(
+        self,
+        documents: AsyncIterator[Tuple[UUID, str]],
+        max_criteria: int = None
+    ) -> Dict[UUID, List[CriteriaExtraction]]:
+        """
+        Extract criteria from several documents through the Azure OpenAI Batch API.
+        
+        Batch jobs run at reduced cost on a separate quota with a 24h
+        completion window, so this suits background ingestion; interactive
+        requests should use extract_criteria_from_content.
+        
+        Args:
+            documents: (document ID, markdown content) pairs, read once while
+                the batch is submitted
+            max_criteria: Maximum number of criteria to keep per document
             
-            {chunk}
-            """
+        Returns:
+            Extracted criteria keyed by document ID, in document order
             
-            result = self.client.chat.completions.create(
-                model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                response_model=CriteriaExtractionResult,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are an expert at analyzing procurement documents (RFPs, RFQs, tenders) and extracting requirements and criteria. 
-                        You work with documents in multiple languages including German, English, French, and others.
-                        Extract ALL requirements in exactly the structure given (same granularity as in the document)."""
-                    },
-                    {"role": "user", "content": extraction_prompt}
-                ],
-                max_tokens=16384,
-                temperature=0.1
+        Raises:
+            CriteriaExtractionError: If the batch cannot be submitted or does not complete
+        """
+        if not self._openai_client:
+            raise CriteriaExtractionError(
+                "Batch extraction not available. Please configure Azure OpenAI credentials."
             )
+        if not self.settings.AZURE_OPENAI_BATCH_DEPLOYMENT_NAME:
+            # Standard deployments reject Batch API jobs
+            raise CriteriaExtractionError(
+                "Batch extraction not available. Please configure AZURE_OPENAI_BATCH_DEPLOYMENT_NAME."
+            )
+        if max_criteria is None:
+            max_criteria = self.settings.MAX_CRITERIA_PER_DOCUMENT
+        
+        try:
+            batch, chunk_requests = await self._submit_extraction_batch(documents)
+            if batch is None:
+                return {document_id: [] for document_id in chunk_requests}
             
-            # Convert to internal models
-            extractions = []
-            for i, criterion in enumerate(result.criteria):
-                extraction = CriteriaExtraction(
-                    document_id=document_id,
-                    raw_text=criterion.criterion_text,
-                    processed_text=criterion.criterion_text.strip(),
-                    page_number=None,  
-                    section_title=f"Chunk {chunk_number}",
-                    extraction_confidence=result.confidence_score
-                )
-                extractions.append(extraction)
+            while batch.status not in _BATCH_TERMINAL_STATUSES:
+                await asyncio.sleep(_BATCH_POLL_INTERVAL_SECONDS)
+                batch = await self._openai_client.batches.retrieve(batch.id)
             
-            logger.info(f"Chunk {chunk_number}: extracted {len(extractions)} criteria")
-            return extractions
+            if batch.status != "completed" or not batch.output_file_id:
+                raise CriteriaExtractionError(f"Extraction batch {batch.id} did not complete (status: {batch.status})")
             
+            output = await self._openai_client.files.content(batch.output_file_id)
+        except CriteriaExtractionError:
+            raise
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error extracting criteria from chunk {chunk_number}: {e}")
-            return []
+            logger.error(f"Error running extraction batch: {e}")
+            raise CriteriaExtractionError(f"Failed to run extraction batch: {str(e)}")
+        
+        # Output rows are not ordered; collect them by request
+        results: Dict[str, CriteriaExtractionResult] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            try:
+                content = row["response"]["body"]["choices"][0]["message"]["content"]
+                results[row["custom_id"]] = CriteriaExtractionResult.model_validate_json(content)
+            except Exception as e:
+                logger.warning(f"Batch {batch.id}: no valid result for request {row['custom_id']}: {e}")
+        
+        extractions: Dict[UUID, List[CriteriaExtraction]] = {}
+        for document_id, custom_ids in chunk_requests.items():
+            document_rows = [
+                row
+                for i, custom_id in enumerate(custom_ids)
+                if custom_id in results
+                for row in self._result_to_rows(results[custom_id], document_id, i + 1)
+            ]
+            extractions[document_id] = [row.to_model() for row in document_rows[:max_criteria]]
+        
+        logger.info(f"Extraction batch {batch.id}: extracted criteria for {len(extractions)} documents")
+        return extractions
     
     async def _fallback_criteria_extraction(
         self, 
@@ -285,60 +849,26 @@ class CriteriaExtractionService:
             if max_criteria is None:
                 max_criteria = self.settings.MAX_CRITERIA_PER_DOCUMENT
             
-            # Enhanced keyword patterns for multiple languages
-            criteria_patterns = [
-                # German patterns
-                r'.*\bmuss\b.*',
-                r'.*\bsoll\b.*', 
-                r'.*\bsollte\b.*',
-                r'.*\bAnforderung\b.*',
-                r'.*\bSpezifikation\b.*',
-                r'.*\bKriterium\b.*',
-                r'.*\bVoraussetzung\b.*',
-                r'.*\berforderlich\b.*',
-                r'.*\bobligatorisch\b.*',
-                r'.*\bzwingend\b.*',
-                
-                # English patterns
-                r'.*\bmust\b.*',
-                r'.*\bshall\b.*',
-                r'.*\bshould\b.*',
-                r'.*\brequirement\b.*',
-                r'.*\brequired\b.*',
-                r'.*\bmandatory\b.*',
-                r'.*\bspecification\b.*',
-                r'.*\bcriteria\b.*',
-                r'.*\bcriterion\b.*',
-                r'.*\bstandard\b.*',
-                r'.*\bcompliance\b.*',
-                r'.*\bminimum\b.*',
-                r'.*\bmaximum\b.*',
-                r'.*\bthreshold\b.*'
-            ]
-            
-            lines = content.split('\n')
             extracted_criteria = []
             
-            for i, line in enumerate(lines):
-                line = line.strip()
+            # Scan the whole document for lines containing any criteria keyword
+            for match in _CRITERIA_LINE_RE.finditer(content):
+                line = match.group().strip()
                 if len(line) < 15:  # Skip very short lines
                     continue
                 
-                # Check if line matches any criteria pattern
-                line_lower = line.lower()
-                if any(re.match(pattern, line_lower, re.IGNORECASE) for pattern in criteria_patterns):
-                    extraction = CriteriaExtraction(
-                        document_id=document_id,
-                        raw_text=line,
-                        processed_text=line.strip(),
-                        page_number=None,
-                        section_title="Fallback extraction",
-                        extraction_confidence=0.6  # Moderate confidence for enhanced fallback
-                    )
-                    extracted_criteria.append(extraction)
-                    
-                    if len(extracted_criteria) >= max_criteria:
-                        break
+                extraction = CriteriaExtraction.model_construct(
+                    document_id=document_id,
+                    raw_text=line,
+                    processed_text=line,
+                    page_number=None,
+                    section_title="Fallback extraction",
+                    extraction_confidence=0.6  # Moderate confidence for enhanced fallback
+                )
+                extracted_criteria.append(extraction)
+                
+                if len(extracted_criteria) >= max_criteria:
+                    break
             
             logger.info(f"Enhanced fallback extraction found {len(extracted_criteria)} potential criteria")
             return extracted_criteria
@@ -368,45 +898,39 @@ class CriteriaExtractionService:
         try:
             logger.info(f"Categorizing {len(criteria_texts)} criteria into 6 categories")
             
-            categories = self.settings.CRITERIA_CATEGORIES
-            
-            categorization_prompt = f"""
-            Categorize the following criteria into exactly these 6 categories:
+            criteria_list = "\n".join(f"{i+1}. {text}" for i, text in enumerate(criteria_texts))
+            categorization_prompt = f"{_CATEGORIZATION_PROMPT}{criteria_list}"
             
-            1. Technical Requirements - System architecture, technology stack, technical specifications
-            2. Security & Compliance - Security measures, regulatory compliance, data protection
-            3. Performance & Scalability - Performance metrics, scalability requirements, capacity
-            4. Integration & Compatibility - System integration, compatibility, interoperability
-            5. Support & Maintenance - Support services, maintenance requirements, SLAs
-            6. Commercial & Legal - Pricing, contracts, legal terms, commercial conditions
-            
-            Each criterion must be assigned to exactly one category. Provide descriptions for each category.
-            
-            Criteria to categorize:
-            {chr(10).join([f"{i+1}. {text}" for i, text in enumerate(criteria_texts)])}
-            """
+            cache = get_llm_cache()
+            cache_key = LLMCache.make_key(
+                self.settings.AZURE_OPENAI_DEPLOYMENT_NAME, _CATEGORIZATION_SYSTEM_PROMPT, categorization_prompt
+            )
+            if cache:
+                cached = await cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Using cached categorization")
+                    return CriteriaCategorization.model_validate_json(cached).categorized_criteria
             
-            result = self.client.chat.completions.create(
+            result = await self.client.chat.completions.create(
                 model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
                 response_model=CriteriaCategorization,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at categorizing RFP criteria. Assign each criterion to exactly one of the 6 specified categories."
-                    },
+                    {"role": "system", "content": _CATEGORIZATION_SYSTEM_PROMPT},
                     {"role": "user", "content": categorization_prompt}
                 ],
-                max_tokens=2048,
+                # Output is roughly the criteria texts keyed by category
+                max_tokens=len(criteria_texts) * _CATEGORIZATION_TOKENS_PER_CRITERION + 256,
                 temperature=0.1
             )
             
+            if cache:
+                await cache.set(cache_key, result.model_dump_json())
+            
             logger.info("Successfully categorized criteria")
             return result.categorized_criteria
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error categorizing criteria: {e}")
+            logger.exception(f"Error categorizing criteria: {e}")
             raise CriteriaExtractionError(f"Failed to categorize criteria: {str(e)}")
     
     async def process_extractions_to_criteria(
@@ -422,15 +946,22 @@ class CriteriaExtractionService:
         Returns:
             List of structured criteria
         """
-        criteria = []
+        texts = [extraction.processed_text for extraction in extractions]
         
-        for extraction in extractions:
-            # Enhanced category mapping based on content analysis
-            category = self._determine_category_from_text(extraction.processed_text)
-            priority = self._determine_priority_from_text(extraction.processed_text)
-            keywords = self._extract_keywords_from_text(extraction.processed_text)
-            requirements = self._extract_requirements_from_text(extraction.processed_text)
-            
+        if len(texts) < _PARALLEL_ANALYSIS_THRESHOLD:
+            analyses = _analyze_criterion_texts(texts)
+        else:
+            # Spread large batches over worker processes in groups to amortize pickling
+            loop = asyncio.get_running_loop()
+            pool = _get_analysis_pool()
+            batches = await asyncio.gather(*(
+                loop.run_in_executor(pool, _analyze_criterion_texts, texts[i:i + _ANALYSIS_BATCH_SIZE])
+                for i in range(0, len(texts), _ANALYSIS_BATCH_SIZE)
+            ))
+            analyses = [analysis for batch in batches for analysis in batch]
+        
+        criteria = []
+        for extraction, (category, priority, keywords, requirements) in zip(extractions, analyses):
             criterion = Criterion(
                 extraction_id=extraction.id,
                 criterion_text=extraction.processed_text,
@@ -443,113 +974,3 @@ class CriteriaExtractionService:
             criteria.append(criterion)
         
         return criteria
-    
-    def _determine_category_from_text(self, text: str) -> CriteriaCategory:
-        """Determine category based on text content analysis."""
-        text_lower = text.lower()
-        
-        # Enhanced category keywords mapping
-        category_keywords = {
-            CriteriaCategory.TECHNICAL: [
-                'technical', 'system', 'technology', 'architecture', 'platform',
-                'software', 'hardware', 'infrastructure', 'network', 'database',
-                'api', 'interface', 'protocol', 'standard', 'specification'
-            ],
-            CriteriaCategory.SECURITY: [
-                'security', 'secure', 'encryption', 'authentication', 'authorization',
-                'compliance', 'gdpr', 'privacy', 'audit', 'vulnerability',
-                'firewall', 'access control', 'certificate', 'ssl', 'tls'
-            ],
-            CriteriaCategory.PERFORMANCE: [
-                'performance', 'speed', 'latency', 'throughput', 'scalability',
-                'capacity', 'load', 'response time', 'availability', 'uptime',
-                'reliability', 'efficiency', 'optimization', 'bandwidth'
-            ],
-            CriteriaCategory.SUPPORT: [
-                'support', 'maintenance', 'service', 'help', 'assistance',
-                'documentation', 'training', 'backup', 'recovery', 'monitoring',
-                'troubleshooting', 'ticket', 'sla', 'response time'
-            ],
-            CriteriaCategory.INTEGRATION: [
-                'integration', 'interface', 'compatibility', 'interoperability',
-                'connect', 'sync', 'import', 'export', 'migration',
-                'third-party', 'plugin', 'connector', 'webhook'
-            ],
-            CriteriaCategory.FINANCIAL: [
-                'cost', 'price', 'pricing', 'budget', 'financial', 'commercial',
-                'license', 'subscription', 'payment', 'billing', 'invoice',
-                'contract', 'terms', 'conditions', 'warranty'
-            ]
-        }
-        
-        # Score each category based on keyword matches
-        category_scores = {}
-        for category, keywords in category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                category_scores[category] = score
-        
-        # Return the category with the highest score
-        if category_scores:
-            return max(category_scores, key=category_scores.get)
-        
-        return CriteriaCategory.OTHER
-    
-    def _determine_priority_from_text(self, text: str) -> CriteriaPriority:
-        """Determine priority based on text content."""
-        text_lower = text.lower()
-        
-        # Critical priority indicators
-        if any(word in text_lower for word in [
-            'critical', 'mandatory', 'required', 'must', 'shall', 'essential',
-            'vital', 'crucial', 'obligatory', 'zwingend', 'erforderlich'
-        ]):
-            return CriteriaPriority.CRITICAL
-        
-        # High priority indicators
-        if any(word in text_lower for word in [
-            'important', 'high', 'priority', 'significant', 'key', 'major',
-            'should', 'soll', 'wichtig'
-        ]):
-            return CriteriaPriority.HIGH
-        
-        # Low priority indicators
-        if any(word in text_lower for word in [
-            'optional', 'nice to have', 'preferred', 'desirable', 'minor',
-            'could', 'might', 'wünschenswert', 'optional'
-        ]):
-            return CriteriaPriority.LOW
-        
-        return CriteriaPriority.MEDIUM
-    
-    def _extract_keywords_from_text(self, text: str) -> List[str]:
-        """Extract key terms from the criterion text."""
-        # Simple keyword extraction - in production, use more sophisticated NLP
-        import re
-        
-        # Remove common stop words and extract meaningful terms
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-        words = re.findall(r'\b\w+\b', text.lower())
-        keywords = [word for word in words if len(word) > 3 and word not in stop_words]
-        
-        # Return unique keywords, limited to top 10
-        return list(set(keywords))[:10]
-    
-    def _extract_requirements_from_text(self, text: str) -> List[str]:
-        """Extract specific requirements from the text."""
-        requirements = []
-        
-        # Look for numeric requirements
-        import re
-        numeric_patterns = [
-            r'\d+%',  # Percentages
-            r'\d+\s*(hour|minute|second|day|month|year)s?',  # Time periods
-            r'\d+\s*(gb|mb|kb|tb)',  # Storage amounts
-            r'\d+\s*(user|concurrent|simultaneous)',  # User counts
-        ]
-        
-        for pattern in numeric_patterns:
-            matches = re.findall(pattern, text.lower())
-            requirements.extend(matches)
-        
-        return requirements[:5]  # Limit to 5 requirements
@@ -1,8 +1,15 @@
 """Criteria extraction and management service implementation."""
 
+from __future__ import annotations
+
+import asyncio
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from bisect import bisect_left, insort
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import AsyncIterator, List, Optional, Dict, Any, Set, Tuple
 from uuid import UUID
 
 from app.models.criteria import (
@@ -16,16 +23,143 @@ from app.models.criteria import (
     CriteriaPriority
 )
 from app.services.criteria_extraction import CriteriaExtractionService
-from app.services.ai_agent_service import AIAgentService
+from app.services.ai_agent_service import AgentValidationResult, AIAgentService
 from app.services.summarization_service import SummarizationService
+from app.core.config import get_settings
 from app.core.exceptions import CriteriaExtractionError, RFPAgentException
-from app.models.document import DocumentType
+from app.models.document import DocumentType, utc_now
 
 logger = logging.getLogger(__name__)
 
-# In-memory storage for demonstration (replace with database)
-_extractions_db: Dict[UUID, CriteriaExtraction] = {}
-_criteria_db: Dict[UUID, Criterion] = {}
+# Enum members in declaration order, the order of the CriteriaStatistics counts
+_ALL_STATUSES = tuple(CriteriaStatus)
+_ALL_CATEGORIES = tuple(CriteriaCategory)
+_ALL_PRIORITIES = tuple(CriteriaPriority)
+
+# Position of APPROVED in the CriteriaStatistics status counts
+_APPROVED_INDEX = _ALL_STATUSES.index(CriteriaStatus.APPROVED)
+
+# Document types that are always searched for criteria
+_REQUIREMENTS_DOCUMENT_TYPES = frozenset({
+    DocumentType.RFP,
+    DocumentType.TECHNICAL_REQUIREMENTS,
+    DocumentType.VENDOR_REQUIREMENTS,
+    DocumentType.SYSTEM_REQUIREMENTS,
+    DocumentType.FUNCTIONAL_REQUIREMENTS,
+    DocumentType.TECHNICAL_SPECIFICATIONS,
+    DocumentType.PROCUREMENT_REQUIREMENTS,
+    DocumentType.BID_REQUIREMENTS,
+    DocumentType.PROJECT_REQUIREMENTS
+})
+
+# Filtered queries sort their candidates directly when there are fewer than
+# 1/16 of the criteria to walk, instead of walking the creation order
+_SORT_CANDIDATES_RATIO = 16
+
+# Categories returned by the categorization LLM call
+_CATEGORY_MAPPING = {
+    "Technical Requirements": CriteriaCategory.TECHNICAL,
+    "Security & Compliance": CriteriaCategory.SECURITY,
+    "Performance & Scalability": CriteriaCategory.PERFORMANCE,
+    "Integration & Compatibility": CriteriaCategory.INTEGRATION,
+    "Support & Maintenance": CriteriaCategory.SUPPORT,
+    "Commercial & Legal": CriteriaCategory.FINANCIAL
+}
+
+class CriteriaStore:
+    """
+    In-memory storage for extractions and criteria (replace with database).
+    
+    Besides the records themselves it keeps secondary indices of criterion
+    IDs by document, status, category and priority, running counts per
+    document, the lowercased criterion texts for search and the
+    ``(created_at, id)`` keys in ascending order, which must be updated
+    through index(), reindex() and set_text(). Version numbers, overall
+    and per document, change whenever the counted fields do.
+    """
+    
+    __slots__ = (
+        "extractions",
+        "criteria",
+        "by_document",
+        "by_status",
+        "by_category",
+        "by_priority",
+        "document_counts",
+        "text_lower",
+        "order",
+        "version",
+        "document_versions"
+    )
+    
+    def __init__(self):
+        self.extractions: Dict[UUID, CriteriaExtraction] = {}
+        self.criteria: Dict[UUID, Criterion] = {}
+        self.by_document: Dict[UUID, Set[UUID]] = defaultdict(set)
+        self.by_status: Dict[CriteriaStatus, Set[UUID]] = defaultdict(set)
+        self.by_category: Dict[CriteriaCategory, Set[UUID]] = defaultdict(set)
+        self.by_priority: Dict[CriteriaPriority, Set[UUID]] = defaultdict(set)
+        # The enum values are distinct across the three enums, so one
+        # Counter per document holds all of its counts
+        self.document_counts: Dict[UUID, Counter] = defaultdict(Counter)
+        self.text_lower: Dict[UUID, str] = {}
+        self.order: List[Tuple[datetime, UUID]] = []
+        self.version = 0
+        self.document_versions: Dict[UUID, int] = defaultdict(int)
+    
+    def document_id_for(self, criterion: Criterion) -> Optional[UUID]:
+        """Resolve the source document ID of a criterion."""
+        extraction = self.extractions.get(criterion.extraction_id)
+        return extraction.document_id if extraction else None
+    
+    def index(self, criterion: Criterion, document_id: UUID) -> None:
+        """Register a newly stored criterion in the secondary indices."""
+        self.by_document[document_id].add(criterion.id)
+        self.by_status[criterion.status].add(criterion.id)
+        self.by_category[criterion.category].add(criterion.id)
+        self.by_priority[criterion.priority].add(criterion.id)
+        self.document_counts[document_id].update(
+            (criterion.status, criterion.category, criterion.priority)
+        )
+        self.text_lower[criterion.id] = criterion.criterion_text.lower()
+        # Criteria arrive in creation order, so this is nearly always an append
+        insort(self.order, (criterion.created_at, criterion.id))
+        self.version += 1
+        self.document_versions[document_id] += 1
+    
+    def set_text(self, criterion: Criterion, text: str) -> None:
+        """Change a criterion's text, keeping its search form in step."""
+        criterion.criterion_text = text
+        self.text_lower[criterion.id] = text.lower()
+    
+    def reindex(
+        self,
+        criterion: Criterion,
+        old_status: CriteriaStatus,
+        old_category: CriteriaCategory,
+        old_priority: CriteriaPriority
+    ) -> None:
+        """Move a criterion between index buckets after its fields changed."""
+        document_id = self.document_id_for(criterion)
+        counts = self.document_counts[document_id]
+        changed = False
+        for index, old, new in (
+            (self.by_status, old_status, criterion.status),
+            (self.by_category, old_category, criterion.category),
+            (self.by_priority, old_priority, criterion.priority)
+        ):
+            if old != new:
+                index[old].discard(criterion.id)
+                index[new].add(criterion.id)
+                counts[old] -= 1
+                counts[new] += 1
+                changed = True
+        if changed:
+            self.version += 1
+            self.document_versions[document_id] += 1
+
+
+_store = CriteriaStore()
 
 
 class CriteriaServiceInterface(ABC):
@@ -35,7 +169,8 @@ class CriteriaServiceInterface(ABC):
     async def extract_criteria_from_document(
         self,
         document_id: UUID,
-        auto_categorize: bool = True
+        auto_categorize: bool = True,
+        max_concurrency: Optional[int] = None
     ) -> List[CriteriaExtraction]:
         """Extract criteria from a processed document."""
         pass
@@ -48,6 +183,11 @@ class CriteriaServiceInterface(ABC):
         """Convert raw extractions to structured criteria."""
         pass
     
+    @abstractmethod
+    async def extract_criteria_offline(self, document_ids: List[UUID]) -> List[UUID]:
+        """Extract criteria from documents in the background through the Batch API."""
+        pass
+    
     @abstractmethod
     async def get_criteria(
         self,
@@ -57,9 +197,16 @@ class CriteriaServiceInterface(ABC):
         priority: Optional[CriteriaPriority] = None,
         search_query: Optional[str] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[Tuple[datetime, UUID]] = None
     ) -> List[Criterion]:
-        """Retrieve criteria with optional filtering."""
+        """
+        Retrieve criteria with optional filtering.
+        
+        Results are ordered newest first. When ``after`` is given as the
+        ``(created_at, id)`` of the last criterion of a previous page, only
+        criteria that sort after it are returned (keyset pagination).
+        """
         pass
     
     @abstractmethod
@@ -81,8 +228,8 @@ class CriteriaServiceInterface(ABC):
     async def bulk_update_criteria(
         self,
         update_request: CriteriaBulkUpdateRequest
-    ) -> Dict[UUID, bool]:
-        """Update multiple criteria in bulk."""
+    ) -> Tuple[List[UUID], List[UUID]]:
+        """Update multiple criteria in bulk, returning (success_ids, failure_ids)."""
         pass
     
     @abstractmethod
@@ -130,25 +277,48 @@ class CriteriaServiceInterface(ABC):
         """Validate a criterion using an AI agent."""
         pass
 
+    @abstractmethod
+    async def validate_criteria_batch(
+        self,
+        criteria_ids: List[UUID],
+        product_name: str,
+        use_deep_research: bool = False
+    ) -> List[Criterion]:
+        """Validate several criteria using an AI agent, summarizing each source document once."""
+        pass
+
 
 class CriteriaService(CriteriaServiceInterface):
     """Concrete implementation of criteria service."""
     
     def __init__(self, document_service=None):
         """Initialize criteria service."""
+        self.settings = get_settings()
         self.extraction_service = CriteriaExtractionService()
         self.document_service = document_service
         self.ai_agent_service = AIAgentService()
         self.summarization_service = SummarizationService()
         
-        # In-memory storage for demonstration (replace with database)
-        self._extractions: Dict[UUID, CriteriaExtraction] = _extractions_db
-        self._criteria: Dict[UUID, Criterion] = _criteria_db
+        # Shared by all service instances
+        self._store = _store
+        
+        # Statistics keyed by document ID (None for all documents), stored
+        # with the store version they were computed at
+        self._statistics_cache: Dict[Optional[UUID], Tuple[int, CriteriaStatistics]] = {}
+        
+        # Document summaries for agent validation keyed by document ID and
+        # content hash, LRU ordered; tasks so concurrent validations share
+        # one summarization
+        self._summary_cache: "OrderedDict[Tuple[UUID, int], asyncio.Task]" = OrderedDict()
+        
+        # Running offline extraction jobs, referenced so they are not garbage collected
+        self._background_tasks: set = set()
     
     async def extract_criteria_from_document(
         self,
         document_id: UUID,
-        auto_categorize: bool = True
+        auto_categorize: bool = True,
+        max_concurrency: Optional[int] = None
     ) -> List[CriteriaExtraction]:
         """Extract criteria from a processed document."""
         try:
@@ -157,20 +327,8 @@ class CriteriaService(CriteriaServiceInterface):
             if not document:
                 raise CriteriaExtractionError("Document not found")
             
-            requirements_document_types = {
-                DocumentType.RFP,
-                DocumentType.TECHNICAL_REQUIREMENTS,
-                DocumentType.VENDOR_REQUIREMENTS,
-                DocumentType.SYSTEM_REQUIREMENTS,
-                DocumentType.FUNCTIONAL_REQUIREMENTS,
-                DocumentType.TECHNICAL_SPECIFICATIONS,
-                DocumentType.PROCUREMENT_REQUIREMENTS,
-                DocumentType.BID_REQUIREMENTS,
-                DocumentType.PROJECT_REQUIREMENTS
-            }
-            
             is_requirements_document = (
-                document.document_type in requirements_document_types or 
+                document.document_type in _REQUIREMENTS_DOCUMENT_TYPES or 
                 document.contains_criteria
             )
             
@@ -185,34 +343,83 @@ class CriteriaService(CriteriaServiceInterface):
             
             # Extract criteria
             extractions = await self.extraction_service.extract_criteria_from_content(
-                content, document_id
+                content, document_id, max_concurrency=max_concurrency
             )
             
             # Store extractions
             for extraction in extractions:
-                self._extractions[extraction.id] = extraction
+                self._store.extractions[extraction.id] = extraction
             
             logger.info(f"Extracted {len(extractions)} criteria from requirements document {document_id}")
             return extractions
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error extracting criteria from document {document_id}: {e}")
+            logger.exception("Error extracting criteria from document %s", document_id)
             raise CriteriaExtractionError(f"Failed to extract criteria: {str(e)}")
     
+    async def extract_criteria_offline(self, document_ids: List[UUID]) -> List[UUID]:
+        """
+        Extract criteria from documents in the background through the Batch API.
+        
+        Batch extraction costs less than realtime calls but may take up to
+        24 hours, so it suits bulk ingestion: the job runs detached and the
+        criteria of each document are stored when the batch completes.
+        
+        Args:
+            document_ids: Documents to extract criteria from; documents that
+                are not processed requirements documents are skipped
+            
+        Returns:
+            IDs of the documents queued for extraction
+        """
+        queued = []
+        for document_id in document_ids:
+            document = await self.document_service.get_document(document_id)
+            if (document and document.markdown_path and
+                    (document.document_type in _REQUIREMENTS_DOCUMENT_TYPES or document.contains_criteria)):
+                queued.append(document_id)
+        if not queued:
+            return []
+        
+        task = asyncio.create_task(self._run_offline_extraction(queued))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return queued
+    
+    async def _iter_document_contents(self, document_ids: List[UUID]) -> AsyncIterator[Tuple[UUID, str]]:
+        """Yield (document ID, content) pairs, reading each document when it is needed."""
+        for document_id in document_ids:
+            content = await self.document_service.get_document_content(document_id)
+            if content:
+                yield document_id, content
+    
+    async def _run_offline_extraction(self, document_ids: List[UUID]) -> None:
+        """Run a batch extraction job and store the criteria of each document."""
+        try:
+            results = await self.extraction_service.extract_criteria_batch(
+                self._iter_document_contents(document_ids)
+            )
+        except Exception:
+            logger.exception("Offline extraction of %d documents failed", len(document_ids))
+            return
+        
+        for document_id, extractions in results.items():
+            for extraction in extractions:
+                self._store.extractions[extraction.id] = extraction
+            try:
+                await self.process_extractions_to_criteria([extraction.id for extraction in extractions])
+            except CriteriaExtractionError:
+                logger.exception("Storing offline extraction results of document %s failed", document_id)
+        logger.info("Extracted criteria offline from %d of %d documents", len(results), len(document_ids))
+    
     async def process_extractions_to_criteria(
         self,
         extraction_ids: List[UUID]
     ) -> List[Criterion]:
         """Convert raw extractions to structured criteria."""
         try:
-            extractions = []
-            for extraction_id in extraction_ids:
-                extraction = self._extractions.get(extraction_id)
-                if extraction:
-                    extractions.append(extraction)
-            
+            stored = self._store.extractions
+            extractions = [e for e in map(stored.get, extraction_ids) if e is not None]
             if not extractions:
                 return []
             
@@ -220,24 +427,22 @@ class CriteriaService(CriteriaServiceInterface):
             criteria = await self.extraction_service.process_extractions_to_criteria(extractions)
             
             # Store criteria
+            document_ids = {e.id: e.document_id for e in extractions}
             for criterion in criteria:
-                self._criteria[criterion.id] = criterion
+                self._store.criteria[criterion.id] = criterion
+                self._store.index(criterion, document_ids[criterion.extraction_id])
             
             # Update document criteria count
             if extractions:
                 doc_id = extractions[0].document_id
-                document = await self.document_service.get_document(doc_id)
-                if document:
-                    document.criteria_count = len([c for c in self._criteria.values() 
-                                                  if c.extraction_id in [e.id for e in extractions]])
+                # The document index already holds exactly this document's criteria
+                await self.document_service.set_criteria_count(doc_id, len(self._store.by_document[doc_id]))
             
             logger.info(f"Processed {len(criteria)} criteria from extractions")
             return criteria
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error processing extractions to criteria: {e}")
+            logger.exception("Error processing extractions to criteria")
             raise CriteriaExtractionError(f"Failed to process extractions: {str(e)}")
     
     async def get_criteria(
@@ -248,93 +453,153 @@ class CriteriaService(CriteriaServiceInterface):
         priority: Optional[CriteriaPriority] = None,
         search_query: Optional[str] = None,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[Tuple[datetime, UUID]] = None
     ) -> List[Criterion]:
-        """Retrieve criteria with optional filtering."""
-        criteria = list(self._criteria.values())
-        
-        # Apply filters
-        if document_id:
-            # Filter by document ID by checking extraction document_id
-            extraction_ids = [e.id for e in self._extractions.values() if e.document_id == document_id]
-            criteria = [c for c in criteria if c.extraction_id in extraction_ids]
-        
-        if category:
-            criteria = [c for c in criteria if c.category == category]
+        """
+        Retrieve criteria with optional filtering.
         
-        if status:
-            criteria = [c for c in criteria if c.status == status]
+        Results are ordered newest first. When ``after`` is given as the
+        ``(created_at, id)`` of the last criterion of a previous page, only
+        criteria that sort after it are returned (keyset pagination).
+        """
+        store = self._store
         
-        if priority:
-            criteria = [c for c in criteria if c.priority == priority]
+        # Intersect the index buckets of the given filters, smallest first
+        buckets = [
+            index.get(key, set())
+            for index, key in (
+                (store.by_document, document_id),
+                (store.by_category, category),
+                (store.by_status, status),
+                (store.by_priority, priority)
+            )
+            if key
+        ]
+        candidates = None
+        if buckets:
+            buckets.sort(key=len)
+            candidates = buckets[0].intersection(*buckets[1:])
         
-        if search_query:
-            query_lower = search_query.lower()
-            criteria = [c for c in criteria if query_lower in c.criterion_text.lower()]
+        # Keys before ``end`` sort before the cursor; newest first means
+        # walking the ascending creation order backwards from there
+        end = bisect_left(store.order, after) if after else len(store.order)
+        if candidates is not None and len(candidates) * _SORT_CANDIDATES_RATIO < end:
+            keys = sorted(((store.criteria[i].created_at, i) for i in candidates), reverse=True)
+            if after:
+                keys = [key for key in keys if key < after]
+        else:
+            keys = (store.order[i] for i in range(end - 1, -1, -1))
         
-        # Sort by creation date (newest first)
-        criteria.sort(key=lambda x: x.created_at, reverse=True)
+        query_lower = search_query.lower() if search_query else None
+        matching_ids = (
+            criterion_id
+            for _, criterion_id in keys
+            if (candidates is None or criterion_id in candidates)
+            and (not query_lower or query_lower in store.text_lower[criterion_id])
+        )
         
-        # Apply pagination
-        return criteria[offset:offset + limit]
+        # Stop as soon as the requested page is filled; skipped rows are
+        # never materialized
+        return [store.criteria[i] for i in islice(matching_ids, offset, offset + limit)]
     
     async def get_criterion(self, criterion_id: UUID) -> Optional[Criterion]:
         """Retrieve a single criterion by ID."""
-        return self._criteria.get(criterion_id)
+        return self._store.criteria.get(criterion_id)
     
     async def update_criterion(
         self,
         criterion_id: UUID,
         update_request: CriteriaUpdateRequest,
-        reviewed_by: Optional[str] = None
+        reviewed_by: Optional[str] = None,
+        now: Optional[datetime] = None
     ) -> Optional[Criterion]:
-        """Update a single criterion."""
-        criterion = self._criteria.get(criterion_id)
+        """
+        Update a single criterion.
+        
+        ``now`` lets callers updating many criteria stamp them all with
+        one timestamp.
+        """
+        criterion = self._store.criteria.get(criterion_id)
         if not criterion:
             return None
         
+        return self._apply_update(
+            criterion,
+            reviewed_by,
+            now,
+            criterion_text=update_request.criterion_text,
+            category=update_request.category,
+            priority=update_request.priority,
+            status=update_request.status,
+            review_notes=update_request.review_notes
+        )
+    
+    def _apply_update(
+        self,
+        criterion: Criterion,
+        reviewed_by: Optional[str] = None,
+        now: Optional[datetime] = None,
+        *,
+        criterion_text: Optional[str] = None,
+        category: Optional[CriteriaCategory] = None,
+        priority: Optional[CriteriaPriority] = None,
+        status: Optional[CriteriaStatus] = None,
+        review_notes: Optional[str] = None
+    ) -> Criterion:
+        """Apply the given field changes to a stored criterion; None leaves a field as is."""
+        old_fields = (criterion.status, criterion.category, criterion.priority)
+        
         # Apply updates
-        if update_request.criterion_text is not None:
-            criterion.criterion_text = update_request.criterion_text
-        if update_request.category is not None:
-            criterion.category = update_request.category
-        if update_request.priority is not None:
-            criterion.priority = update_request.priority
-        if update_request.status is not None:
-            criterion.status = update_request.status
-        if update_request.review_notes is not None:
-            criterion.review_notes = update_request.review_notes
+        if criterion_text is not None:
+            self._store.set_text(criterion, criterion_text)
+        if category is not None:
+            criterion.category = category
+        if priority is not None:
+            criterion.priority = priority
+        if status is not None:
+            criterion.status = status
+        if review_notes is not None:
+            criterion.review_notes = review_notes
         
         if reviewed_by:
             criterion.reviewed_by = reviewed_by
         
-        from datetime import datetime
-        criterion.updated_at = datetime.utcnow()
+        criterion.updated_at = now or utc_now()
+        
+        self._store.reindex(criterion, *old_fields)
         
         return criterion
     
     async def bulk_update_criteria(
         self,
         update_request: CriteriaBulkUpdateRequest
-    ) -> Dict[UUID, bool]:
-        """Update multiple criteria in bulk."""
-        results = {}
+    ) -> Tuple[List[UUID], List[UUID]]:
+        """Update multiple criteria in bulk, returning (success_ids, failure_ids)."""
+        success_ids = []
+        failure_ids = []
+        now = utc_now()
         
+        # Updates are in-memory and never await, so running them
+        # concurrently would gain nothing
         for criterion_id in update_request.criteria_ids:
             try:
                 updated = await self.update_criterion(
-                    criterion_id, 
-                    update_request.updates, 
-                    update_request.reviewed_by
+                    criterion_id,
+                    update_request.updates,
+                    update_request.reviewed_by,
+                    now
                 )
-                results[criterion_id] = updated is not None
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                logger.error(f"Error updating criterion {criterion_id}: {e}")
-                results[criterion_id] = False
+            except Exception:
+                logger.exception("Error updating criterion %s", criterion_id)
+                updated = None
+            
+            if updated is not None:
+                success_ids.append(criterion_id)
+            else:
+                failure_ids.append(criterion_id)
         
-        return results
+        return success_ids, failure_ids
     
     async def approve_criterion(
         self,
@@ -342,11 +607,12 @@ class CriteriaService(CriteriaServiceInterface):
         reviewed_by: Optional[str] = None
     ) -> Optional[Criterion]:
         """Approve a criterion."""
-        update_request = CriteriaUpdateRequest(
-            status=CriteriaStatus.APPROVED,
-            review_notes="Approved"
+        criterion = self._store.criteria.get(criterion_id)
+        if not criterion:
+            return None
+        return self._apply_update(
+            criterion, reviewed_by, status=CriteriaStatus.APPROVED, review_notes="Approved"
         )
-        return await self.update_criterion(criterion_id, update_request, reviewed_by)
     
     async def reject_criterion(
         self,
@@ -355,47 +621,53 @@ class CriteriaService(CriteriaServiceInterface):
         reviewed_by: Optional[str] = None
     ) -> Optional[Criterion]:
         """Reject a criterion."""
-        update_request = CriteriaUpdateRequest(
-            status=CriteriaStatus.REJECTED,
-            review_notes=f"Rejected: {reason}"
+        criterion = self._store.criteria.get(criterion_id)
+        if not criterion:
+            return None
+        return self._apply_update(
+            criterion, reviewed_by, status=CriteriaStatus.REJECTED, review_notes=f"Rejected: {reason}"
         )
-        return await self.update_criterion(criterion_id, update_request, reviewed_by)
     
     async def get_criteria_statistics(
         self,
         document_id: Optional[UUID] = None
     ) -> CriteriaStatistics:
         """Get criteria statistics."""
-        criteria = await self.get_criteria(document_id=document_id, limit=1000)
-        
-        total_count = len(criteria)
-        by_status = {}
-        by_category = {}
-        by_priority = {}
-        
-        # Count by status
-        for status in CriteriaStatus:
-            by_status[status] = len([c for c in criteria if c.status == status])
-        
-        # Count by category
-        for category in CriteriaCategory:
-            by_category[category] = len([c for c in criteria if c.category == category])
+        # Reuse the last result until the counted fields change
+        if document_id:
+            version = self._store.document_versions.get(document_id, 0)
+        else:
+            version = self._store.version
+        cached = self._statistics_cache.get(document_id)
+        if cached and cached[0] == version:
+            return cached[1]
         
-        # Count by priority
-        for priority in CriteriaPriority:
-            by_priority[priority] = len([c for c in criteria if c.priority == priority])
+        # Read the maintained counts; no pass over the criteria themselves
+        if document_id:
+            counts = self._store.document_counts.get(document_id, Counter())
+            total_count = len(self._store.by_document.get(document_id, ()))
+            by_status = [counts[status] for status in _ALL_STATUSES]
+            by_category = [counts[category] for category in _ALL_CATEGORIES]
+            by_priority = [counts[priority] for priority in _ALL_PRIORITIES]
+        else:
+            total_count = len(self._store.criteria)
+            by_status = [len(self._store.by_status.get(status, ())) for status in _ALL_STATUSES]
+            by_category = [len(self._store.by_category.get(category, ())) for category in _ALL_CATEGORIES]
+            by_priority = [len(self._store.by_priority.get(priority, ())) for priority in _ALL_PRIORITIES]
         
         # Calculate approval rate
-        approved_count = by_status.get(CriteriaStatus.APPROVED, 0)
+        approved_count = by_status[_APPROVED_INDEX]
         approval_rate = approved_count / total_count if total_count > 0 else 0.0
         
-        return CriteriaStatistics(
+        statistics = CriteriaStatistics(
             total_count=total_count,
-            by_status=by_status,
-            by_category=by_category,
-            by_priority=by_priority,
+            by_status_counts=by_status,
+            by_category_counts=by_category,
+            by_priority_counts=by_priority,
             approval_rate=approval_rate
         )
+        self._statistics_cache[document_id] = (version, statistics)
+        return statistics
     
     async def auto_categorize_criteria(
         self,
@@ -407,7 +679,7 @@ class CriteriaService(CriteriaServiceInterface):
             valid_ids = []
             
             for criterion_id in criteria_ids:
-                criterion = self._criteria.get(criterion_id)
+                criterion = self._store.criteria.get(criterion_id)
                 if criterion:
                     criteria_texts.append(criterion.criterion_text)
                     valid_ids.append(criterion_id)
@@ -418,94 +690,36 @@ class CriteriaService(CriteriaServiceInterface):
             # Use extraction service to categorize
             categorized = await self.extraction_service.categorize_criteria(criteria_texts)
             
+            # Look up each criterion's assigned category by its text; the
+            # first category listing a text wins
+            text_categories: Dict[str, CriteriaCategory] = {}
+            for category_name, criteria_list in categorized.items():
+                mapped_category = _CATEGORY_MAPPING.get(category_name, CriteriaCategory.OTHER)
+                for text in criteria_list:
+                    text_categories.setdefault(text, mapped_category)
+            
             # Map back to criterion IDs and update
             results = {}
-            category_mapping = {
-                "Technical Requirements": CriteriaCategory.TECHNICAL,
-                "Security & Compliance": CriteriaCategory.SECURITY,
-                "Performance & Scalability": CriteriaCategory.PERFORMANCE,
-                "Integration & Compatibility": CriteriaCategory.INTEGRATION,
-                "Support & Maintenance": CriteriaCategory.SUPPORT,
-                "Commercial & Legal": CriteriaCategory.FINANCIAL
-            }
-            
-            for i, criterion_id in enumerate(valid_ids):
-                # Find which category this criterion was assigned to
-                for category_name, criteria_list in categorized.items():
-                    if i < len(criteria_list) and criteria_texts[i] in criteria_list:
-                        mapped_category = category_mapping.get(category_name, CriteriaCategory.OTHER)
-                        
-                        # Update the criterion
-                        criterion = self._criteria[criterion_id]
-                        criterion.category = mapped_category
-                        
-                        results[criterion_id] = mapped_category
-                        break
+            for criterion_id, text in zip(valid_ids, criteria_texts):
+                mapped_category = text_categories.get(text)
+                if mapped_category is None:
+                    continue
+                
+                # Update the criterion
+                criterion = self._store.criteria[criterion_id]
+                old_fields = (criterion.status, criterion.category, criterion.priority)
+                criterion.category = mapped_category
+                self._store.reindex(criterion, *old_fields)
+                criterion.updated_at = utc_now()
+                
+                results[criterion_id] = mapped_category
             
             return results
             
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error auto-categorizing criteria: {e}")
+        except Exception:
+            logger.exception("Error auto-categorizing criteria")
             return {}
     
-    async def extract_criteria_from_document(
-        self,
-        document_id: UUID,
-        auto_categorize: bool = True
-    ) -> List[CriteriaExtraction]:
-        """Extract criteria from a processed document."""
-        try:
-            # Check if document is a requirements document
-            document = await self.document_service.get_document(document_id)
-            if not document:
-                raise CriteriaExtractionError("Document not found")
-            
-            requirements_document_types = {
-                DocumentType.RFP,
-                DocumentType.TECHNICAL_REQUIREMENTS,
-                DocumentType.VENDOR_REQUIREMENTS,
-                DocumentType.SYSTEM_REQUIREMENTS,
-                DocumentType.FUNCTIONAL_REQUIREMENTS,
-                DocumentType.TECHNICAL_SPECIFICATIONS,
-                DocumentType.PROCUREMENT_REQUIREMENTS,
-                DocumentType.BID_REQUIREMENTS,
-                DocumentType.PROJECT_REQUIREMENTS
-            }
-            
-            is_requirements_document = (
-                document.document_type in requirements_document_types or 
-                document.contains_criteria
-            )
-            
-            if not is_requirements_document:
-                logger.info(f"Document {document_id} is not a requirements document ({document.document_type}). Skipping criteria extraction.")
-                return []
-            
-            # Get document content
-            content = await self.document_service.get_document_content(document_id)
-            if not content:
-                raise CriteriaExtractionError("Document content not found or not processed")
-            
-            # Extract criteria
-            extractions = await self.extraction_service.extract_criteria_from_content(
-                content, document_id
-            )
-            
-            # Store extractions
-            for extraction in extractions:
-                self._extractions[extraction.id] = extraction
-            
-            logger.info(f"Extracted {len(extractions)} criteria from requirements document {document_id}")
-            return extractions
-            
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error extracting criteria from document {document_id}: {e}")
-            raise CriteriaExtractionError(f"Failed to extract criteria: {str(e)}")
-
     async def validate_criterion_with_agent(
         self,
         criterion_id: UUID,
@@ -513,26 +727,17 @@ class CriteriaService(CriteriaServiceInterface):
         use_deep_research: bool = False
     ) -> Optional[Criterion]:
         """Validate a criterion using an AI agent."""
-        criterion = self._criteria.get(criterion_id)
+        criterion = self._store.criteria.get(criterion_id)
         if not criterion:
             return None
 
-        extraction = self._extractions.get(criterion.extraction_id)
+        extraction = self._store.extractions.get(criterion.extraction_id)
         if not extraction:
             raise RFPAgentException("Source extraction not found for the criterion.")
 
-        # Get source document content for context
-        source_doc = await self.document_service.get_document(extraction.document_id)
-        if not source_doc or not source_doc.markdown_content:
-            logger.warning("Source document content not found, using criterion text only")
-            document_summary = f"Limited context available. Evaluating criterion: {criterion.criterion_text}"
-        else:
-            # Generate summary using map-reduce approach
-            try:
-                document_summary = await self.summarization_service.summarize_content(source_doc.markdown_content)
-            except Exception as e:
-                logger.warning(f"Failed to generate document summary: {e}")
-                document_summary = f"Document summary unavailable. Evaluating criterion: {criterion.criterion_text}"
+        document_summary = await self._summary_for_validation(
+            extraction.document_id, criterion.criterion_text
+        )
 
         # Call agent for validation - no fallback, let it fail if not configured
         validation_result = await self.ai_agent_service.validate_criterion(
@@ -541,14 +746,106 @@ class CriteriaService(CriteriaServiceInterface):
             criterion_text=criterion.criterion_text,
             use_deep_research=use_deep_research
         )
+        if validation_result is None:
+            raise RFPAgentException(f"Agent validation failed for criterion {criterion_id}.")
 
-        # Update criterion with validation result
-        from datetime import datetime
+        self._apply_validation(criterion, validation_result)
+        return criterion
+    
+    async def validate_criteria_batch(
+        self,
+        criteria_ids: List[UUID],
+        product_name: str,
+        use_deep_research: bool = False
+    ) -> List[Criterion]:
+        """Validate several criteria using an AI agent, summarizing each source document once."""
+        # Criteria are grouped by source document, whose summary they share
+        by_document: Dict[UUID, List[Criterion]] = defaultdict(list)
+        for criterion_id in criteria_ids:
+            criterion = self._store.criteria.get(criterion_id)
+            if not criterion:
+                continue
+            extraction = self._store.extractions.get(criterion.extraction_id)
+            if not extraction:
+                logger.error(f"Source extraction not found for criterion {criterion_id}")
+                continue
+            by_document[extraction.document_id].append(criterion)
+        
+        async def validate_document(document_id: UUID, criteria: List[Criterion]) -> List[Criterion]:
+            document_summary = await self._summary_for_validation(document_id)
+            # The agent service bounds how many runs are in flight
+            outcomes = await self.ai_agent_service.validate_criteria_batch(
+                product_name=product_name,
+                document_summary=document_summary,
+                criteria_texts=[criterion.criterion_text for criterion in criteria],
+                use_deep_research=use_deep_research
+            )
+            validated = []
+            for criterion, outcome in zip(criteria, outcomes):
+                if isinstance(outcome, RFPAgentException):
+                    # Configuration errors apply to every criterion
+                    raise outcome
+                if isinstance(outcome, BaseException):
+                    logger.error("Error validating criterion %s", criterion.id, exc_info=outcome)
+                elif outcome is None:
+                    logger.error(f"Agent validation failed for criterion {criterion.id}")
+                else:
+                    self._apply_validation(criterion, outcome)
+                    validated.append(criterion)
+            return validated
+        
+        groups = await asyncio.gather(
+            *(validate_document(document_id, criteria) for document_id, criteria in by_document.items())
+        )
+        return [criterion for group in groups for criterion in group]
+    
+    def _apply_validation(self, criterion: Criterion, validation_result: AgentValidationResult) -> None:
+        """Update a criterion with an agent validation result."""
+        old_fields = (criterion.status, criterion.category, criterion.priority)
         criterion.is_met = validation_result.is_met
         criterion.validation_summary = validation_result.summary
         criterion.validation_references = validation_result.references
         criterion.status = CriteriaStatus.MODIFIED
-        criterion.updated_at = datetime.utcnow()
+        self._store.reindex(criterion, *old_fields)
+        criterion.updated_at = utc_now()
         
-        logger.info(f"Criterion {criterion_id} validated. Is met: {criterion.is_met}")
-        return criterion
+        logger.info(f"Criterion {criterion.id} validated. Is met: {criterion.is_met}")
+    
+    async def _summary_for_validation(self, document_id: UUID, criterion_text: Optional[str] = None) -> str:
+        """Get the summary of a source document to give the agent as context."""
+        evaluating = f" Evaluating criterion: {criterion_text}" if criterion_text else ""
+        
+        # Get source document content for context
+        source_content = await self.document_service.get_document_content(document_id)
+        if not source_content:
+            logger.warning("Source document content not found, using criterion text only")
+            return f"Limited context available.{evaluating}"
+        
+        # Generate summary using map-reduce approach
+        try:
+            return await self._get_document_summary(document_id, source_content)
+        except Exception as e:
+            logger.warning(f"Failed to generate document summary: {e}")
+            return f"Document summary unavailable.{evaluating}"
+    
+    async def _get_document_summary(self, document_id: UUID, content: str) -> str:
+        """Summarize a document once and share the result across validations."""
+        key = (document_id, hash(content))
+        task = self._summary_cache.get(key)
+        if task is None:
+            task = asyncio.create_task(self.summarization_service.summarize_content(content))
+            limit = self.settings.AGENT_SUMMARY_CACHE_SIZE
+            if limit > 0:
+                # Keep only the most recently used summaries
+                self._summary_cache[key] = task
+                while len(self._summary_cache) > limit:
+                    self._summary_cache.popitem(last=False)
+        else:
+            self._summary_cache.move_to_end(key)
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # Do not keep failures; the next validation retries the summary
+            if self._summary_cache.get(key) is task:
+                del self._summary_cache[key]
+            raise
@@ -1,20 +1,132 @@
 """Azure Document Intelligence service for document processing."""
 
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any
+import re
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Dict, Any, List, Tuple
+from uuid import UUID
 from pathlib import Path
 from azure.ai.documentintelligence import DocumentIntelligenceClient
+from azure.ai.documentintelligence.models import AnalyzeDocumentRequest, AnalyzeResult
 from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import HttpResponseError
-import instructor
-from openai import AzureOpenAI
+from openai.types import Batch
 from pydantic import BaseModel, Field
 
 from app.core.config import get_settings
 from app.core.exceptions import DocumentProcessingError
+from app.core.tokens import chars_per_token, truncate_to_tokens
+from app.services.llm_cache import LLMCache, get_llm_cache
+from app.services.openai_client import get_async_openai_client, get_instructor_client
 
 logger = logging.getLogger(__name__)
 
+# Static instructions for every classification request. Documents only
+# appear in the user message, after this prefix, so the prompt starts with
+# identical tokens on every call and benefits from prompt caching.
+_CLASSIFICATION_SYSTEM_PROMPT = """You are an expert document classifier specializing in procurement and RFP documents. \
+Analyze the content carefully and provide accurate classification with appropriate confidence levels.
+
+Classify each document you are given into one of these specific procurement document types:
+
+**Primary Types:**
+- "Request for Proposal" - RFP documents soliciting vendor proposals
+- "Technical Requirements" - Technical specifications and system requirements
+- "Scope of Work" - Project scope and work breakdown documents
+- "Statement of Work" - Detailed work statements and deliverables
+- "Vendor Requirements" - Vendor qualification and capability requirements
+- "System Requirements" - System functional and non-functional requirements
+- "Functional Requirements" - Business and user functional requirements
+- "Technical Specifications" - Detailed technical specifications
+- "Procurement Requirements" - Procurement process and commercial requirements
+- "Bid Requirements" - Bidding process and submission requirements
+- "Project Requirements" - Overall project requirements and constraints
+- "RFP Addendum" - Addendums, amendments, or clarifications to RFPs
+- "Amendment" - Document amendments or modifications
+
+**Criteria Detection:**
+Determine if the document contains extractable criteria by looking for:
+- Requirements statements (must, shall, should, required, mandatory)
+- Evaluation criteria or scoring rubrics
+- Technical specifications with measurable parameters
+- Compliance requirements
+- Performance standards or thresholds
+
+Provide your classification with high confidence if the document clearly fits a category, \
+or lower confidence if it's ambiguous. Explain your reasoning briefly."""
+
+# Output budget per classified document
+_CLASSIFICATION_MAX_TOKENS = 1000
+
+# Leading pages analyzed on their own so classification can start early
+_CLASSIFICATION_PAGES = 3
+
+# Inner error code Document Intelligence returns for a page selection it
+# cannot serve, such as pages past the end of the document
+_INVALID_PARAMETER_CODE = "InvalidParameter"
+
+# Page header/footer/number and page break comments emitted in Document
+# Intelligence markdown output
+_PAGE_MARKUP_PATTERN = re.compile(r"<!--\s*Page(?:Header|Footer|Number|Break)\b.*?-->", re.DOTALL)
+
+_BATCH_POLL_INTERVAL_SECONDS = 60
+_BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _prepare_classification_input(content: str, max_tokens: int) -> str:
+    """
+    Reduce document content to the part worth classifying.
+
+    Page markup is stripped and lines repeated verbatim (running headers,
+    table of contents entries) are kept once, then the text is cut to an
+    approximate token budget.
+    """
+    max_chars = int(max_tokens * chars_per_token(content))
+    # Boilerplate rarely exceeds the remaining text, so a bounded prefix suffices
+    text = _PAGE_MARKUP_PATTERN.sub("", content[:max_chars * 4])
+
+    seen = set()
+    kept = []
+    size = 0
+    for line in text.splitlines():
+        key = line.strip()
+        if key:
+            if key in seen:
+                continue
+            seen.add(key)
+        elif not kept or not kept[-1].strip():
+            continue
+        kept.append(line)
+        size += len(line) + 1
+        if size >= max_chars:
+            break
+    return truncate_to_tokens("\n".join(kept), max_tokens)
+
+
+def _classification_messages(content: str) -> List[Dict[str, str]]:
+    """Build the chat messages classifying a single document."""
+    return [
+        {"role": "system", "content": _CLASSIFICATION_SYSTEM_PROMPT},
+        {"role": "user", "content": f"**Document Content:**\n{content}"}
+    ]
+
+
+def _is_page_range_error(error: HttpResponseError) -> bool:
+    """Whether Document Intelligence rejected the requested page selection."""
+    odata = error.error
+    if odata is None:
+        return False
+    inner = odata.innererror or {}
+    return inner.get("code") == _INVALID_PARAMETER_CODE and "pages" in (inner.get("message") or "").lower()
+
+
+@lru_cache()
+def get_document_intelligence_client(endpoint: str, api_key: str) -> DocumentIntelligenceClient:
+    """Get the Document Intelligence client shared by all service instances."""
+    return DocumentIntelligenceClient(endpoint=endpoint, credential=AzureKeyCredential(api_key))
+
 
 class DocumentClassificationResult(BaseModel):
     """Structured result for document classification."""
@@ -24,6 +136,13 @@ class DocumentClassificationResult(BaseModel):
     reasoning: str = Field(..., description="Brief explanation of the classification decision")
 
 
+class DocumentClassificationBatch(BaseModel):
+    """Structured result for classifying several documents in one call."""
+    classifications: List[DocumentClassificationResult] = Field(
+        ..., description="One classification per document, in the order the documents were given"
+    )
+
+
 class DocumentIntelligenceService:
     """Service for processing documents with Azure Document Intelligence."""
     
@@ -32,19 +151,27 @@ class DocumentIntelligenceService:
         self.settings = get_settings()
         self.client = None
         self.llm_client = None
+        self._openai_client = None
+        
+        # Bound in-flight calls so upload bursts do not run into rate limits
+        self._analysis_semaphore = asyncio.Semaphore(self.settings.MAX_CONCURRENT_DOC_INTELLIGENCE_REQUESTS)
+        self._classification_semaphore = asyncio.Semaphore(self.settings.MAX_CONCURRENT_CLASSIFICATION_REQUESTS)
+        
+        # Classifications waiting to be sent together: (content, cache key, future)
+        self._pending_classifications: List[Tuple[str, str, asyncio.Future]] = []
+        self._classification_flush: Optional[asyncio.TimerHandle] = None
+        self._classification_tasks: set = set()
         
         # Initialize Document Intelligence client
         if self.settings.AZURE_DOC_INTELLIGENCE_ENDPOINT and self.settings.AZURE_DOC_INTELLIGENCE_KEY:
             try:
-                self.client = DocumentIntelligenceClient(
-                    endpoint=self.settings.AZURE_DOC_INTELLIGENCE_ENDPOINT,
-                    credential=AzureKeyCredential(self.settings.AZURE_DOC_INTELLIGENCE_KEY)
+                self.client = get_document_intelligence_client(
+                    self.settings.AZURE_DOC_INTELLIGENCE_ENDPOINT,
+                    self.settings.AZURE_DOC_INTELLIGENCE_KEY
                 )
                 logger.info("Document Intelligence client initialized successfully")
             except Exception as e:
-                import traceback
-                traceback.print_exc()
-                logger.error(f"Failed to initialize Document Intelligence client: {e}")
+                logger.exception(f"Failed to initialize Document Intelligence client: {e}")
                 raise DocumentProcessingError(f"Document Intelligence initialization failed: {str(e)}")
         else:
             logger.error("Document Intelligence credentials not configured")
@@ -55,12 +182,9 @@ class DocumentIntelligenceService:
             self.settings.AZURE_OPENAI_API_KEY and 
             self.settings.AZURE_OPENAI_DEPLOYMENT_NAME):
             try:
-                azure_client = AzureOpenAI(
-                    azure_endpoint=self.settings.AZURE_OPENAI_ENDPOINT,
-                    api_key=self.settings.AZURE_OPENAI_API_KEY,
-                    api_version=self.settings.AZURE_OPENAI_API_VERSION
-                )
-                self.llm_client = instructor.from_openai(azure_client)
+                self.llm_client = get_instructor_client()
+                # Raw client for the Batch API, which instructor does not wrap
+                self._openai_client = get_async_openai_client()
                 logger.info("LLM client for classification initialized successfully")
             except Exception as e:
                 logger.warning(f"Failed to initialize LLM client for classification: {e}")
@@ -68,12 +192,14 @@ class DocumentIntelligenceService:
         else:
             logger.warning("Azure OpenAI credentials not configured for classification")
     
-    async def extract_markdown_from_pdf(self, file_path: str) -> str:
+    async def extract_markdown_from_pdf(self, file_path: str, url_source: Optional[str] = None) -> str:
         """
         Extract markdown content from PDF using Azure Document Intelligence.
         
         Args:
             file_path: Path to the PDF file
+            url_source: URL the service can fetch the PDF from (e.g. a blob
+                SAS URL); when given, the file is not uploaded
             
         Returns:
             Extracted content in markdown format
@@ -81,44 +207,134 @@ class DocumentIntelligenceService:
         Raises:
             DocumentProcessingError: If processing fails
         """
+        result = await self._analyze_pdf(file_path, url_source)
+        if not result.content:
+            raise DocumentProcessingError("No content extracted from Document Intelligence")
+        return result.content
+    
+    async def extract_and_classify_pdf(self, file_path: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Extract markdown from a PDF and classify it, overlapping the two.
+        
+        The leading pages, which are all classification looks at, and the
+        remaining pages are analyzed as separate requests. Classification
+        starts as soon as the leading pages are done, while the rest of the
+        document is still being analyzed.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Returns:
+            Extracted content in markdown format and the classification result
+            
+        Raises:
+            DocumentProcessingError: If processing fails
+        """
+        rest_task = asyncio.create_task(
+            self._analyze_pdf(file_path, pages=f"{_CLASSIFICATION_PAGES + 1}-")
+        )
+        # Failures are handled where the task is awaited; when it is
+        # abandoned instead, retrieve them so they are not reported
+        rest_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        try:
+            head = await self._analyze_pdf(file_path, pages=f"1-{_CLASSIFICATION_PAGES}")
+        except BaseException:
+            rest_task.cancel()
+            raise
+        head_content = head.content or ""
+        classification_task = asyncio.create_task(self.classify_document_type(head_content))
+        
+        if len(head.pages or ()) < _CLASSIFICATION_PAGES:
+            # Short document: there are no further pages
+            rest_task.cancel()
+            content = head_content
+        else:
+            try:
+                rest = await rest_task
+            except DocumentProcessingError as e:
+                if isinstance(e.__cause__, HttpResponseError) and _is_page_range_error(e.__cause__):
+                    # The document has exactly the leading pages
+                    content = head_content
+                else:
+                    logger.warning("Analysis of the remaining pages failed, analyzing the whole document")
+                    content = (await self._analyze_pdf(file_path)).content or ""
+            else:
+                content = "\n\n<!-- PageBreak -->\n\n".join(filter(None, (head_content, rest.content)))
+        
+        if not content:
+            classification_task.cancel()
+            raise DocumentProcessingError("No content extracted from Document Intelligence")
+        if not head_content:
+            # Nothing to classify on the leading pages
+            classification_task.cancel()
+            classification_task = asyncio.create_task(self.classify_document_type(content))
+        logger.info(f"Successfully extracted {len(content)} characters from PDF")
+        return content, await classification_task
+    
+    async def _analyze_pdf(
+        self,
+        file_path: str,
+        url_source: Optional[str] = None,
+        pages: Optional[str] = None
+    ) -> AnalyzeResult:
+        """Run the layout model on a PDF, or on some of its pages."""
         if not self.client:
             raise DocumentProcessingError("Document Intelligence client not available")
         
         try:
-            logger.info(f"Processing PDF with Document Intelligence: {file_path}")
-            
-            # Read file content
-            with open(file_path, "rb") as file:
-                file_content = file.read()
-            
-            logger.info(f"File size: {len(file_content)} bytes")
-            
-            # Analyze document using layout model for markdown output
-            poller = self.client.begin_analyze_document(
-                model_id="prebuilt-layout",
-                body=file_content,
-                content_type="application/pdf",
-                output_content_format="markdown"
+            logger.info(
+                f"Processing PDF with Document Intelligence: {url_source or file_path}"
+                + (f" (pages {pages})" if pages else "")
             )
             
-            logger.info("Document analysis started, waiting for completion...")
-            result = poller.result()
+            # Analyze document using layout model for markdown output. The
+            # client blocks while uploading and polling, so it runs in a
+            # worker thread.
+            async with self._analysis_semaphore:
+                result = await asyncio.to_thread(self._analyze_layout, file_path, url_source, pages)
             
-            if result.content:
-                logger.info(f"Successfully extracted {len(result.content)} characters from PDF")
-                return result.content
-            else:
-                raise DocumentProcessingError("No content extracted from Document Intelligence")
+            logger.info(f"Successfully analyzed {len(result.pages or ())} pages")
+            return result
                 
         except HttpResponseError as e:
-            logger.error(f"Azure Document Intelligence API error: {e}")
-            raise DocumentProcessingError(f"Document Intelligence API error: {str(e)}")
+            if pages and _is_page_range_error(e):
+                logger.info(f"Pages {pages} are past the end of the document")
+            else:
+                logger.error(f"Azure Document Intelligence API error: {e}")
+            raise DocumentProcessingError(f"Document Intelligence API error: {str(e)}") from e
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error processing PDF with Document Intelligence: {e}")
+            logger.exception(f"Error processing PDF with Document Intelligence: {e}")
             raise DocumentProcessingError(f"PDF processing failed: {str(e)}")
     
+    def _analyze_layout(
+        self,
+        file_path: str,
+        url_source: Optional[str] = None,
+        pages: Optional[str] = None
+    ) -> AnalyzeResult:
+        """Run the layout model on a PDF and wait for the result."""
+        if url_source:
+            poller = self.client.begin_analyze_document(
+                model_id="prebuilt-layout",
+                body=AnalyzeDocumentRequest(url_source=url_source),
+                pages=pages,
+                output_content_format="markdown"
+            )
+        else:
+            # The open file is streamed as the request body instead of
+            # being read into memory first
+            logger.info(f"File size: {Path(file_path).stat().st_size} bytes")
+            with open(file_path, "rb") as file:
+                poller = self.client.begin_analyze_document(
+                    model_id="prebuilt-layout",
+                    body=file,
+                    content_type="application/pdf",
+                    pages=pages,
+                    output_content_format="markdown"
+                )
+        logger.info("Document analysis started, waiting for completion...")
+        return poller.result()
+    
     async def classify_document_type(self, content: str, first_pages_only: bool = True) -> Dict[str, Any]:
         """
         Classify document type based on content analysis using LLM.
@@ -131,9 +347,10 @@ class DocumentIntelligenceService:
             Classification result with document type and confidence
         """
         try:
-            # Truncate to first ~3 pages of content (approximately 3000 chars per page)
             if first_pages_only:
-                analysis_content = content[:9000]  # ~3 pages
+                analysis_content = _prepare_classification_input(
+                    content, self.settings.CLASSIFICATION_INPUT_TOKENS
+                )
             else:
                 analysis_content = content
             
@@ -151,9 +368,7 @@ class DocumentIntelligenceService:
                 }
                 
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error classifying document: {e}")
+            logger.exception(f"Error classifying document: {e}")
             return {
                 "document_type": "OTHER", 
                 "confidence": 0.0,
@@ -165,6 +380,10 @@ class DocumentIntelligenceService:
         """
         Classify document using LLM with structured output.
         
+        Documents arriving within CLASSIFICATION_BATCH_WINDOW of each other
+        are classified together in one LLM call of up to
+        CLASSIFICATION_BATCH_SIZE documents.
+        
         Args:
             content: Document content to classify
             
@@ -172,64 +391,246 @@ class DocumentIntelligenceService:
             Structured classification result
         """
         try:
-            classification_prompt = f"""
-            Analyze the following document content and classify it into one of these specific procurement document types:
-
-            **Primary Types:**
-            - "Request for Proposal" - RFP documents soliciting vendor proposals
-            - "Technical Requirements" - Technical specifications and system requirements
-            - "Scope of Work" - Project scope and work breakdown documents
-            - "Statement of Work" - Detailed work statements and deliverables
-            - "Vendor Requirements" - Vendor qualification and capability requirements
-            - "System Requirements" - System functional and non-functional requirements
-            - "Functional Requirements" - Business and user functional requirements
-            - "Technical Specifications" - Detailed technical specifications
-            - "Procurement Requirements" - Procurement process and commercial requirements
-            - "Bid Requirements" - Bidding process and submission requirements
-            - "Project Requirements" - Overall project requirements and constraints
-            - "RFP Addendum" - Addendums, amendments, or clarifications to RFPs
-            - "Amendment" - Document amendments or modifications
-
-            **Criteria Detection:**
-            Determine if the document contains extractable criteria by looking for:
-            - Requirements statements (must, shall, should, required, mandatory)
-            - Evaluation criteria or scoring rubrics
-            - Technical specifications with measurable parameters
-            - Compliance requirements
-            - Performance standards or thresholds
-
-            **Document Content:**
-            {content}
-
-            Provide your classification with high confidence if the document clearly fits a category, 
-            or lower confidence if it's ambiguous. Explain your reasoning briefly.
-            """
-
-            result = self.llm_client.chat.completions.create(
-                model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                response_model=DocumentClassificationResult,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert document classifier specializing in procurement and RFP documents. Analyze the content carefully and provide accurate classification with appropriate confidence levels."
-                    },
-                    {"role": "user", "content": classification_prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.1  # Low temperature for consistent classification
+            # Templates and addenda often share their first pages up to
+            # layout, so key the cache on the text with whitespace and case
+            # normalized rather than on the exact prompt
+            cache = get_llm_cache()
+            cache_key = LLMCache.make_key(
+                self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+                "classification",
+                " ".join(content.split()).lower()
             )
-
+            if cache:
+                cached = await cache.get(cache_key)
+                if cached is not None:
+                    result = DocumentClassificationResult.model_validate_json(cached)
+                    logger.info(f"Using cached classification: {result.document_type}")
+                    return result.model_dump()
+            
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending_classifications.append((content, cache_key, future))
+            if len(self._pending_classifications) >= self.settings.CLASSIFICATION_BATCH_SIZE:
+                self._flush_classifications()
+            elif self._classification_flush is None:
+                self._classification_flush = loop.call_later(
+                    self.settings.CLASSIFICATION_BATCH_WINDOW, self._flush_classifications
+                )
+            result = await future
+            
             logger.info(f"LLM classified document as: {result.document_type} (confidence: {result.confidence:.2f})")
+            return result.model_dump()
+
+        except Exception as e:
+            logger.exception("LLM classification failed")
+            raise DocumentProcessingError(f"Document classification failed: {str(e)}")
+    
+    def _flush_classifications(self) -> None:
+        """Send the pending classifications as one batch."""
+        if self._classification_flush is not None:
+            self._classification_flush.cancel()
+            self._classification_flush = None
+        batch, self._pending_classifications = self._pending_classifications, []
+        if batch:
+            # Keep a reference so the running batch is not garbage collected
+            task = asyncio.create_task(self._classify_batch(batch))
+            self._classification_tasks.add(task)
+            task.add_done_callback(self._classification_tasks.discard)
+    
+    async def _classify_batch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        """Classify a batch of documents and resolve each waiting caller."""
+        try:
+            results = await self.classify_documents_batch([content for content, _, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        cache = get_llm_cache()
+        for (_, cache_key, future), result in zip(batch, results):
+            if cache:
+                await cache.set(cache_key, result.model_dump_json())
+            if not future.done():
+                future.set_result(result)
+    
+    async def classify_documents_batch(self, contents: List[str]) -> List[DocumentClassificationResult]:
+        """
+        Classify several documents with one LLM call.
+        
+        Args:
+            contents: Document contents to classify
             
-            return {
-                "document_type": result.document_type,
-                "confidence": result.confidence,
-                "contains_criteria": result.contains_criteria,
-                "reasoning": result.reasoning
+        Returns:
+            One classification per document, in the same order
+        """
+        if len(contents) == 1:
+            messages = _classification_messages(contents[0])
+            response_model = DocumentClassificationResult
+        else:
+            documents = "\n\n".join(
+                f"<DOC {i}>\n{content}\n</DOC {i}>" for i, content in enumerate(contents, 1)
+            )
+            prompt = (
+                f"Classify each of the following {len(contents)} documents independently. "
+                "Return exactly one classification per document, in the order given.\n\n"
+                f"**Documents:**\n{documents}"
+            )
+            messages = [
+                {"role": "system", "content": _CLASSIFICATION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+            response_model = DocumentClassificationBatch
+        
+        async with self._classification_semaphore:
+            result = await self.llm_client.chat.completions.create(
+                model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+                response_model=response_model,
+                messages=messages,
+                max_tokens=_CLASSIFICATION_MAX_TOKENS * len(contents),
+                temperature=0.1  # Low temperature for consistent classification
+            )
+        if len(contents) == 1:
+            return [result]
+        
+        if len(result.classifications) != len(contents):
+            # A miscounted answer cannot be matched to the documents reliably
+            logger.warning(
+                f"Batch classification returned {len(result.classifications)} results "
+                f"for {len(contents)} documents, classifying them one by one"
+            )
+            singles = await asyncio.gather(*(self.classify_documents_batch([c]) for c in contents))
+            return [classifications[0] for classifications in singles]
+        
+        logger.info(f"Classified {len(contents)} documents in one LLM call")
+        return result.classifications
+    
+    async def _submit_classification_batch(
+        self,
+        documents: AsyncIterator[Tuple[UUID, str]]
+    ) -> Tuple[Optional[Batch], Dict[UUID, str]]:
+        """
+        Upload the classification requests of several documents as one batch job.
+        
+        Each document is cut to the classification input while it is read,
+        so no full document content stays in memory while the job runs.
+        
+        Returns:
+            The created batch (None if there was nothing to submit) and the
+            request ID of each document
+        """
+        deployment = self.settings.AZURE_OPENAI_BATCH_DEPLOYMENT_NAME
+        response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": DocumentClassificationResult.__name__,
+                "schema": DocumentClassificationResult.model_json_schema()
             }
-
+        }
+        
+        # Identical contents (re-uploaded files) are requested once
+        lines = []
+        request_ids: Dict[str, str] = {}
+        document_requests: Dict[UUID, str] = {}
+        async for document_id, content in documents:
+            content = _prepare_classification_input(content, self.settings.CLASSIFICATION_INPUT_TOKENS)
+            custom_id = request_ids.get(content)
+            if custom_id is None:
+                custom_id = request_ids[content] = str(len(request_ids))
+                lines.append(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/chat/completions",
+                    "body": {
+                        "model": deployment,
+                        "messages": _classification_messages(content),
+                        "response_format": response_format,
+                        "max_tokens": _CLASSIFICATION_MAX_TOKENS,
+                        "temperature": 0.1
+                    }
+                }))
+            document_requests[document_id] = custom_id
+        if not lines:
+            return None, document_requests
+        
+        input_file = await self._openai_client.files.create(
+            file=("document_classification_batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = await self._openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted classification batch {batch.id} with {len(lines)} requests for {len(document_requests)} documents")
+        return batch, document_requests
+    
+    async def classify_documents_offline(
+        self,
+        documents: AsyncIterator[Tuple[UUID, str]]
+    ) -> Dict[UUID, Dict[str, Any]]:
+        """
+        Classify documents through the Azure OpenAI Batch API.
+        
+        Batch jobs run at reduced cost on a separate quota with a 24h
+        completion window, so this suits bulk reclassification; uploads
+        should use classify_document_type.
+        
+        Args:
+            documents: (document ID, markdown content) pairs, read once while
+                the batch is submitted
+            
+        Returns:
+            Classification results keyed by document ID; documents without a
+            valid result are left out
+            
+        Raises:
+            DocumentProcessingError: If the batch cannot be submitted or does not complete
+        """
+        if not self._openai_client:
+            raise DocumentProcessingError(
+                "Batch classification not available. Please configure Azure OpenAI credentials."
+            )
+        if not self.settings.AZURE_OPENAI_BATCH_DEPLOYMENT_NAME:
+            # Standard deployments reject Batch API jobs
+            raise DocumentProcessingError(
+                "Batch classification not available. Please configure AZURE_OPENAI_BATCH_DEPLOYMENT_NAME."
+            )
+        
+        try:
+            batch, document_requests = await self._submit_classification_batch(documents)
+            if batch is None:
+                return {}
+            
+            while batch.status not in _BATCH_TERMINAL_STATUSES:
+                await asyncio.sleep(_BATCH_POLL_INTERVAL_SECONDS)
+                batch = await self._openai_client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                raise DocumentProcessingError(f"Classification batch {batch.id} did not complete (status: {batch.status})")
+            
+            output = await self._openai_client.files.content(batch.output_file_id)
+        except DocumentProcessingError:
+            raise
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"LLM classification failed: {e}")
-            raise DocumentProcessingError(f"Document classification failed: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error running classification batch: {e}")
+            raise DocumentProcessingError(f"Failed to run classification batch: {str(e)}")
+        
+        # Output rows are not ordered; collect them by request
+        results: Dict[str, DocumentClassificationResult] = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            try:
+                content = row["response"]["body"]["choices"][0]["message"]["content"]
+                results[row["custom_id"]] = DocumentClassificationResult.model_validate_json(content)
+            except Exception as e:
+                logger.warning(f"Batch {batch.id}: no valid result for request {row['custom_id']}: {e}")
+        
+        logger.info(f"Classification batch {batch.id}: classified {len(results)} of {len(document_requests)} documents")
+        return {
+            document_id: results[custom_id].model_dump()
+            for document_id, custom_id in document_requests.items()
+            if custom_id in results
+        }
@@ -1,10 +1,18 @@
 """Document processing service implementation."""
 
+import asyncio
+import gzip
+import hashlib
+import io
 import os
 import time
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from bisect import insort
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import AsyncIterator, List, Optional, Dict, Any, Set, Tuple
 from uuid import UUID, uuid4
 from pathlib import Path
 from fastapi import UploadFile
@@ -13,19 +21,156 @@ from app.models.document import (
     DocumentMetadata,
     DocumentProcessingResult,
     DocumentStatus,
-    DocumentType
+    DocumentType,
+    utc_now
 )
 from app.core.config import get_settings
 from app.core.exceptions import DocumentProcessingError, FileValidationError
 from app.services.document_intelligence import DocumentIntelligenceService
-from app.services.excel_processing import ExcelProcessingService
+from app.services.excel_processing import MARKDOWN_FORMAT_VERSION, ExcelProcessingService
 from app.services.ai_agent_service import AIAgentService
 
 logger = logging.getLogger(__name__)
 
-# In-memory storage for demonstration (replace with database)
-# This will be shared across all instances of DocumentService
-_documents_db: Dict[UUID, DocumentMetadata] = {}
+# Filtered queries sort their candidates directly when there are fewer than
+# 1/16 of the documents to walk, instead of walking the upload order
+_SORT_CANDIDATES_RATIO = 16
+
+# Extracted markdown is highly repetitive (table rules, running headers), so
+# even a fast gzip level shrinks it several times over
+_CONTENT_COMPRESSION_LEVEL = 3
+
+# Characters of text split at a time when counting words
+_WORD_COUNT_SLICE = 1 << 16
+
+
+def _count_words(text: str) -> int:
+    """
+    Count whitespace-separated words like ``len(text.split())``.
+    
+    The text is split in slices ending at whitespace, so no word straddles
+    two slices and only one slice's words are held in memory at a time.
+    """
+    count = 0
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + _WORD_COUNT_SLICE
+        while end < length and not text[end].isspace():
+            end += 1
+        count += len(text[start:end].split())
+        start = end
+    return count
+
+
+class DocumentStore:
+    """
+    In-memory storage for document metadata (replace with database).
+    
+    Besides the documents themselves it keeps secondary indices of document
+    IDs by status and type, the IDs of documents containing criteria, the
+    running total of criteria counts and the ``(upload_timestamp, id)`` keys
+    in ascending order. Documents must be added, removed, and have those
+    fields changed through the methods below so the indices stay in step.
+    """
+    
+    __slots__ = ("documents", "by_status", "by_type", "with_criteria", "total_criteria", "order")
+    
+    def __init__(self):
+        self.documents: Dict[UUID, DocumentMetadata] = {}
+        self.by_status: Dict[DocumentStatus, Set[UUID]] = defaultdict(set)
+        self.by_type: Dict[DocumentType, Set[UUID]] = defaultdict(set)
+        self.with_criteria: Set[UUID] = set()
+        self.total_criteria = 0
+        self.order: List[Tuple[datetime, UUID]] = []
+    
+    def add(self, document: DocumentMetadata) -> None:
+        """Store a new document and register it in the indices."""
+        self.documents[document.id] = document
+        self.by_status[document.status].add(document.id)
+        self.by_type[document.document_type].add(document.id)
+        if document.contains_criteria:
+            self.with_criteria.add(document.id)
+        self.total_criteria += document.criteria_count
+        # Documents arrive in upload order, so this is nearly always an append
+        insort(self.order, (document.upload_timestamp, document.id))
+    
+    def remove(self, document_id: UUID) -> Optional[DocumentMetadata]:
+        """Remove a document and its index entries, returning it if present."""
+        document = self.documents.pop(document_id, None)
+        if document is None:
+            return None
+        self.by_status[document.status].discard(document_id)
+        self.by_type[document.document_type].discard(document_id)
+        self.with_criteria.discard(document_id)
+        self.total_criteria -= document.criteria_count
+        self.order.remove((document.upload_timestamp, document_id))
+        return document
+    
+    def set_status(self, document: DocumentMetadata, status: DocumentStatus) -> None:
+        """Change a document's status, moving it between index buckets."""
+        self.by_status[document.status].discard(document.id)
+        self.by_status[status].add(document.id)
+        document.status = status
+    
+    def set_classification(
+        self,
+        document: DocumentMetadata,
+        document_type: DocumentType,
+        contains_criteria: bool
+    ) -> None:
+        """Change a document's type and criteria flag, updating the indices."""
+        self.by_type[document.document_type].discard(document.id)
+        self.by_type[document_type].add(document.id)
+        document.document_type = document_type
+        document.contains_criteria = contains_criteria
+        if contains_criteria:
+            self.with_criteria.add(document.id)
+        else:
+            self.with_criteria.discard(document.id)
+    
+    def set_criteria_count(self, document: DocumentMetadata, count: int) -> None:
+        """Change a document's criteria count, keeping the total in step."""
+        self.total_criteria += count - document.criteria_count
+        document.criteria_count = count
+
+
+# Shared across all instances of DocumentService
+_store = DocumentStore()
+
+# Bytes read from an upload and written to disk at a time
+_UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Document type labels returned by the classifier
+_CLASSIFICATION_DOC_TYPES: Dict[str, DocumentType] = {
+    "Request for Proposal": DocumentType.RFP,
+    "Technical Requirements": DocumentType.TECHNICAL_REQUIREMENTS,
+    "Scope of Work": DocumentType.SCOPE_OF_WORK,
+    "Statement of Work": DocumentType.STATEMENT_OF_WORK,
+    "Vendor Requirements": DocumentType.VENDOR_REQUIREMENTS,
+    "System Requirements": DocumentType.SYSTEM_REQUIREMENTS,
+    "Functional Requirements": DocumentType.FUNCTIONAL_REQUIREMENTS,
+    "Technical Specifications": DocumentType.TECHNICAL_SPECIFICATIONS,
+    "Procurement Requirements": DocumentType.PROCUREMENT_REQUIREMENTS,
+    "Bid Requirements": DocumentType.BID_REQUIREMENTS,
+    "Project Requirements": DocumentType.PROJECT_REQUIREMENTS,
+    "RFP Addendum": DocumentType.RFP_ADDENDUM,
+    "Amendment": DocumentType.AMENDMENT,
+    "OTHER": DocumentType.OTHER
+}
+
+# Document types that criteria are extracted from
+_REQUIREMENTS_DOCUMENT_TYPES = frozenset({
+    DocumentType.RFP,
+    DocumentType.TECHNICAL_REQUIREMENTS,
+    DocumentType.VENDOR_REQUIREMENTS,
+    DocumentType.SYSTEM_REQUIREMENTS,
+    DocumentType.FUNCTIONAL_REQUIREMENTS,
+    DocumentType.TECHNICAL_SPECIFICATIONS,
+    DocumentType.PROCUREMENT_REQUIREMENTS,
+    DocumentType.BID_REQUIREMENTS,
+    DocumentType.PROJECT_REQUIREMENTS
+})
 
 
 class DocumentServiceInterface(ABC):
@@ -45,11 +190,21 @@ class DocumentServiceInterface(ABC):
         """Process an uploaded document to extract text and structure."""
         pass
     
+    @abstractmethod
+    async def reclassify_documents(self, document_ids: Optional[List[UUID]] = None) -> List[UUID]:
+        """Reclassify processed documents in the background through the Batch API."""
+        pass
+    
     @abstractmethod
     async def get_document(self, document_id: UUID) -> Optional[DocumentMetadata]:
         """Retrieve document metadata by ID."""
         pass
     
+    @abstractmethod
+    async def set_criteria_count(self, document_id: UUID, count: int) -> None:
+        """Record the number of criteria extracted from a document."""
+        pass
+    
     @abstractmethod
     async def get_documents(
         self,
@@ -70,6 +225,15 @@ class DocumentServiceInterface(ABC):
     async def get_document_content(self, document_id: UUID) -> Optional[str]:
         """Get processed document content."""
         pass
+    
+    @abstractmethod
+    async def stream_document_content(
+        self,
+        document_id: UUID,
+        chunk_size: int = 65536
+    ) -> Optional[AsyncIterator[str]]:
+        """Open processed document content for streaming in chunks."""
+        pass
 
 
 class DocumentService(DocumentServiceInterface):
@@ -83,10 +247,24 @@ class DocumentService(DocumentServiceInterface):
         self.ai_agent_service = AIAgentService()
         
         # Use the shared in-memory storage
-        self._documents: Dict[UUID, DocumentMetadata] = _documents_db
+        self._store = _store
+        
+        # Running reclassification jobs, referenced so they are not garbage collected
+        self._background_tasks: set = set()
+        
+        # Compressed markdown of recently used documents, LRU ordered; the
+        # rest is read from disk
+        self._content_cache: "OrderedDict[UUID, bytes]" = OrderedDict()
         
         # Ensure upload directory exists
-        Path(self.settings.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+        self._upload_dir = Path(self.settings.UPLOAD_DIR)
+        self._upload_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Extracted markdown of analyzed PDFs and converted spreadsheets by
+        # file hash, kept across restarts
+        self._markdown_cache_dir = self._upload_dir / "ocr_cache"
+        if self.settings.OCR_CACHE_ENABLED:
+            self._markdown_cache_dir.mkdir(exist_ok=True)
     
     async def initialize_ai_agents(self):
         """Initialize AI agents for criteria validation."""
@@ -104,40 +282,38 @@ class DocumentService(DocumentServiceInterface):
         """Upload and validate a document."""
         try:
             # Validate file
-            await self._validate_file(file)
+            self._validate_file(file)
             
             # Generate unique filename
             document_id = uuid4()
             file_extension = Path(file.filename).suffix.lower()
             filename = f"{document_id}{file_extension}"
-            file_path = Path(self.settings.UPLOAD_DIR) / filename
+            file_path = self._upload_dir / filename
             
             # Save file
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
+            file_size, file_hash = await self._save_upload(file, file_path)
             
-            # Create document metadata
-            document = DocumentMetadata(
+            # Create document metadata. Every field is produced here, so skip
+            # validation; request data is validated before this point.
+            document = DocumentMetadata.model_construct(
                 id=document_id,
                 filename=filename,
                 original_filename=file.filename,
-                file_size=len(content),
-                content_type=file.content_type,
+                file_size=file_size,
+                file_hash=file_hash,
+                content_type=file.content_type or "application/octet-stream",
                 document_type=document_type,
                 status=DocumentStatus.UPLOADED
             )
             
             # Store in memory (replace with database)
-            self._documents[document_id] = document
+            self._store.add(document)
             
             logger.info(f"Document uploaded successfully: {filename}")
             return document
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error uploading document: {e}")
+            logger.exception(f"Error uploading document: {e}")
             raise DocumentProcessingError(f"Failed to upload document: {str(e)}")
     
     async def process_document(self, document_id: UUID) -> DocumentProcessingResult:
@@ -145,7 +321,7 @@ class DocumentService(DocumentServiceInterface):
         start_time = time.time()
         
         try:
-            document = self._documents.get(document_id)
+            document = self._store.documents.get(document_id)
             if not document:
                 raise DocumentProcessingError("Document not found")
             
@@ -153,11 +329,11 @@ class DocumentService(DocumentServiceInterface):
                 raise DocumentProcessingError("Document is already being processed")
             
             # Update status to processing
-            document.status = DocumentStatus.PROCESSING
-            document.processing_started_at = time.time()
+            self._store.set_status(document, DocumentStatus.PROCESSING)
+            document.processing_started_at = utc_now()
             
-            file_path = Path(self.settings.UPLOAD_DIR) / document.filename
-            if not file_path.exists():
+            file_path = self._upload_dir / document.filename
+            if not await asyncio.to_thread(file_path.exists):
                 raise DocumentProcessingError(f"Document file not found: {file_path}")
             
             file_extension = Path(document.filename).suffix.lower()
@@ -166,53 +342,58 @@ class DocumentService(DocumentServiceInterface):
             
             # Process based on file type
             if file_extension == '.pdf':
-                markdown_content = await self._process_pdf(str(file_path))
+                cache_key = document.file_hash
+                markdown_content = await self._load_markdown_cache(cache_key)
+                cached = markdown_content is not None
+                if cached:
+                    logger.info(f"Reusing Document Intelligence output for identical file {document.file_hash}")
+                    classification = await self.document_intelligence.classify_document_type(markdown_content)
+                else:
+                    # Classified while the later pages are still being extracted
+                    markdown_content, classification = await self._process_pdf(str(file_path))
             elif file_extension in ['.xlsx', '.xls']:
-                markdown_content = await self._process_excel(str(file_path))
+                # Keyed by converter version too, as the markdown layout may change
+                cache_key = document.file_hash and f"{document.file_hash}.sheets-{MARKDOWN_FORMAT_VERSION}"
+                markdown_content = await self._load_markdown_cache(cache_key)
+                cached = markdown_content is not None
+                if cached:
+                    logger.info(f"Reusing converted markdown for identical file {document.file_hash}")
+                else:
+                    markdown_content = await self._process_excel(str(file_path))
             else:
                 raise DocumentProcessingError(f"Unsupported file format: {file_extension}")
             
             if not markdown_content or len(markdown_content.strip()) == 0:
                 raise DocumentProcessingError("No content extracted from document")
             
-            # Classify document type and check for criteria using LLM
-            logger.info("Classifying document type with LLM...")
-            classification = await self.document_intelligence.classify_document_type(markdown_content)
+            if file_extension in ['.xlsx', '.xls']:
+                # Spreadsheets are always typed as such, so only the criteria
+                # check is needed and keywords suffice for it
+                keywords = await self.excel_processor.extract_criteria_keywords(markdown_content)
+                classification = {
+                    "document_type": DocumentType.SPREADSHEET.value,
+                    "confidence": 1.0,
+                    "contains_criteria": bool(keywords),
+                    "reasoning": f"Spreadsheet with criteria keywords: {', '.join(keywords) or 'none'}"
+                }
+            
+            # Keep the extracted text compressed on disk rather than on the metadata
+            markdown_path = self._upload_dir / f"{document_id}.md.gz"
+            compressed = await asyncio.to_thread(
+                gzip.compress, markdown_content.encode(), _CONTENT_COMPRESSION_LEVEL
+            )
+            await asyncio.to_thread(markdown_path.write_bytes, compressed)
+            self._cache_content(document_id, compressed)
+            if not cached:
+                await self._store_markdown_cache(cache_key, compressed)
             
             # Update document metadata with processing results
-            document.markdown_content = markdown_content
-            document.status = DocumentStatus.COMPLETED
-            document.processing_completed_at = time.time()
+            document.markdown_path = str(markdown_path)
+            self._store.set_status(document, DocumentStatus.COMPLETED)
+            document.processing_completed_at = utc_now()
             document.extracted_text_length = len(markdown_content)
-            document.word_count = len(markdown_content.split())
-            document.classification_confidence = classification["confidence"]
-            document.contains_criteria = classification["contains_criteria"]
-            
-            # Map classification to document type enum
-            doc_type_mapping = {
-                "Request for Proposal": DocumentType.RFP,
-                "Technical Requirements": DocumentType.TECHNICAL_REQUIREMENTS,
-                "Scope of Work": DocumentType.SCOPE_OF_WORK,
-                "Statement of Work": DocumentType.STATEMENT_OF_WORK,
-                "Vendor Requirements": DocumentType.VENDOR_REQUIREMENTS,
-                "System Requirements": DocumentType.SYSTEM_REQUIREMENTS,
-                "Functional Requirements": DocumentType.FUNCTIONAL_REQUIREMENTS,
-                "Technical Specifications": DocumentType.TECHNICAL_SPECIFICATIONS,
-                "Procurement Requirements": DocumentType.PROCUREMENT_REQUIREMENTS,
-                "Bid Requirements": DocumentType.BID_REQUIREMENTS,
-                "Project Requirements": DocumentType.PROJECT_REQUIREMENTS,
-                "RFP Addendum": DocumentType.RFP_ADDENDUM,
-                "Amendment": DocumentType.AMENDMENT,
-                "OTHER": DocumentType.OTHER
-            }
-            
-            if file_extension in ['.xlsx', '.xls']:
-                document.document_type = DocumentType.SPREADSHEET
-            else:
-                document.document_type = doc_type_mapping.get(
-                    classification["document_type"], 
-                    DocumentType.OTHER
-                )
+            document.word_count = _count_words(markdown_content)
+            self._apply_classification(document, classification)
             
             # Log classification result with reasoning if available
             reasoning = classification.get("reasoning", "No reasoning provided")
@@ -223,27 +404,16 @@ class DocumentService(DocumentServiceInterface):
             )
             
             # Determine if this is a requirements document that should have criteria extracted
-            requirements_document_types = {
-                DocumentType.RFP,
-                DocumentType.TECHNICAL_REQUIREMENTS,
-                DocumentType.VENDOR_REQUIREMENTS,
-                DocumentType.SYSTEM_REQUIREMENTS,
-                DocumentType.FUNCTIONAL_REQUIREMENTS,
-                DocumentType.TECHNICAL_SPECIFICATIONS,
-                DocumentType.PROCUREMENT_REQUIREMENTS,
-                DocumentType.BID_REQUIREMENTS,
-                DocumentType.PROJECT_REQUIREMENTS
-            }
-            
             is_requirements_document = (
-                document.document_type in requirements_document_types or 
+                document.document_type in _REQUIREMENTS_DOCUMENT_TYPES or 
                 document.contains_criteria
             )
             
             processing_time = time.time() - start_time
             
-            # Create processing result with updated information
-            result = DocumentProcessingResult(
+            # Create processing result with updated information. The values are
+            # ours or come from the already validated classification result.
+            result = DocumentProcessingResult.model_construct(
                 document_id=document_id,
                 status=DocumentStatus.COMPLETED,
                 page_count=1,  # TODO: Extract actual page count
@@ -266,19 +436,92 @@ class DocumentService(DocumentServiceInterface):
             return result
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
             # Update document status to failed
-            if document_id in self._documents:
-                self._documents[document_id].status = DocumentStatus.FAILED
-                self._documents[document_id].error_message = str(e)
+            document = self._store.documents.get(document_id)
+            if document:
+                self._store.set_status(document, DocumentStatus.FAILED)
+                document.error_message = str(e)
             
-            logger.error(f"Error processing document: {e}")
+            logger.exception(f"Error processing document: {e}")
             raise DocumentProcessingError(f"Failed to process document: {str(e)}")
     
+    def _apply_classification(self, document: DocumentMetadata, classification: Dict[str, Any]) -> None:
+        """Store a classification result on the document metadata."""
+        document.classification_confidence = classification["confidence"]
+        
+        if Path(document.filename).suffix.lower() in ['.xlsx', '.xls']:
+            document_type = DocumentType.SPREADSHEET
+        else:
+            document_type = _CLASSIFICATION_DOC_TYPES.get(
+                classification["document_type"], 
+                DocumentType.OTHER
+            )
+        self._store.set_classification(document, document_type, classification["contains_criteria"])
+    
+    async def reclassify_documents(self, document_ids: Optional[List[UUID]] = None) -> List[UUID]:
+        """
+        Reclassify processed documents in the background through the Batch API.
+        
+        Batch classification costs less than realtime calls but may take up
+        to 24 hours, so the job runs detached and updates each document as
+        results arrive.
+        
+        Args:
+            document_ids: Documents to reclassify; all processed documents if None
+            
+        Returns:
+            IDs of the documents queued for reclassification
+        """
+        documents_by_id = self._store.documents
+        if document_ids is None:
+            document_ids = self._store.by_status[DocumentStatus.COMPLETED]
+        candidates = [documents_by_id[i] for i in document_ids if i in documents_by_id]
+        # Spreadsheets keep their type whatever the classifier says
+        queued = [
+            document.id for document in candidates
+            if (document.status == DocumentStatus.COMPLETED and document.markdown_path
+                and document.document_type != DocumentType.SPREADSHEET)
+        ]
+        if not queued:
+            return []
+        
+        task = asyncio.create_task(self._run_reclassification(queued))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return queued
+    
+    async def _iter_document_contents(self, document_ids: List[UUID]) -> AsyncIterator[Tuple[UUID, str]]:
+        """Yield (document ID, content) pairs, reading each document when it is needed."""
+        for document_id in document_ids:
+            content = await self.get_document_content(document_id)
+            if content:
+                yield document_id, content
+    
+    async def _run_reclassification(self, document_ids: List[UUID]) -> None:
+        """Run a batch classification job and apply its results."""
+        try:
+            classifications = await self.document_intelligence.classify_documents_offline(
+                self._iter_document_contents(document_ids)
+            )
+        except Exception:
+            logger.exception(f"Reclassification of {len(document_ids)} documents failed")
+            return
+        
+        for document_id, classification in classifications.items():
+            document = self._store.documents.get(document_id)
+            if document:
+                self._apply_classification(document, classification)
+        logger.info(f"Reclassified {len(classifications)} of {len(document_ids)} documents")
+    
     async def get_document(self, document_id: UUID) -> Optional[DocumentMetadata]:
         """Retrieve document metadata by ID."""
-        return self._documents.get(document_id)
+        return self._store.documents.get(document_id)
+    
+    async def set_criteria_count(self, document_id: UUID, count: int) -> None:
+        """Record the number of criteria extracted from a document."""
+        document = self._store.documents.get(document_id)
+        if document:
+            self._store.set_criteria_count(document, count)
     
     async def get_documents(
         self,
@@ -287,81 +530,209 @@ class DocumentService(DocumentServiceInterface):
         limit: int = 50,
         offset: int = 0
     ) -> List[DocumentMetadata]:
-        """Retrieve documents with optional filtering."""
-        documents = list(self._documents.values())
+        """Retrieve documents with optional filtering, newest first."""
+        store = self._store
         
-        # Apply filters
-        if status:
-            documents = [doc for doc in documents if doc.status == status]
-        if document_type:
-            documents = [doc for doc in documents if doc.document_type == document_type]
+        # Intersect the index buckets of the given filters, smallest first
+        buckets = [
+            index.get(key, set())
+            for index, key in ((store.by_status, status), (store.by_type, document_type))
+            if key
+        ]
+        candidates = None
+        if buckets:
+            buckets.sort(key=len)
+            candidates = buckets[0].intersection(*buckets[1:])
         
-        # Sort by upload timestamp (newest first)
-        documents.sort(key=lambda x: x.upload_timestamp, reverse=True)
+        if candidates is not None and len(candidates) * _SORT_CANDIDATES_RATIO < len(store.order):
+            keys = sorted(((store.documents[i].upload_timestamp, i) for i in candidates), reverse=True)
+        else:
+            keys = reversed(store.order)
         
-        # Apply pagination
-        return documents[offset:offset + limit]
+        matching_ids = (
+            document_id
+            for _, document_id in keys
+            if candidates is None or document_id in candidates
+        )
+        return [store.documents[i] for i in islice(matching_ids, offset, offset + limit)]
     
     async def delete_document(self, document_id: UUID) -> bool:
         """Delete a document and its files."""
         try:
-            document = self._documents.get(document_id)
+            document = self._store.documents.get(document_id)
             if not document:
                 return False
             
-            # Delete file
-            file_path = Path(self.settings.UPLOAD_DIR) / document.filename
-            if file_path.exists():
-                file_path.unlink()
+            # Delete files
+            file_path = self._upload_dir / document.filename
+            await asyncio.to_thread(file_path.unlink, missing_ok=True)
+            if document.markdown_path:
+                await asyncio.to_thread(Path(document.markdown_path).unlink, missing_ok=True)
+            self._content_cache.pop(document_id, None)
             
             # Remove from storage
-            del self._documents[document_id]
+            self._store.remove(document_id)
             
             logger.info(f"Document deleted successfully: {document.filename}")
             return True
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error deleting document: {e}")
+            logger.exception(f"Error deleting document: {e}")
             return False
     
     async def get_document_content(self, document_id: UUID) -> Optional[str]:
         """Get processed document content."""
-        document = self._documents.get(document_id)
-        if document:
-            return document.markdown_content
-        return None
-    
-    async def _validate_file(self, file: UploadFile) -> None:
-        """Validate uploaded file."""
-        # Check file size
-        content = await file.read()
-        await file.seek(0)  # Reset file pointer
+        compressed = self._content_cache.get(document_id)
+        if compressed is not None:
+            self._content_cache.move_to_end(document_id)
+        else:
+            document = self._store.documents.get(document_id)
+            if not document or not document.markdown_path:
+                return None
+            try:
+                compressed = await asyncio.to_thread(Path(document.markdown_path).read_bytes)
+            except FileNotFoundError:
+                logger.warning(f"Content file missing for document {document_id}")
+                return None
+            self._cache_content(document_id, compressed)
+        return gzip.decompress(compressed).decode()
+    
+    def _cache_content(self, document_id: UUID, compressed: bytes) -> None:
+        """Keep a document's compressed markdown in memory, evicting the least recently used beyond the limit."""
+        limit = self.settings.DOCUMENT_CONTENT_CACHE_SIZE
+        if limit <= 0:
+            return
+        self._content_cache[document_id] = compressed
+        self._content_cache.move_to_end(document_id)
+        while len(self._content_cache) > limit:
+            self._content_cache.popitem(last=False)
+    
+    async def stream_document_content(
+        self,
+        document_id: UUID,
+        chunk_size: int = 65536
+    ) -> Optional[AsyncIterator[str]]:
+        """
+        Open processed document content for streaming in chunks.
         
-        if len(content) > self.settings.MAX_FILE_SIZE:
-            raise FileValidationError(
-                f"File size {len(content)} exceeds maximum allowed {self.settings.MAX_FILE_SIZE}"
-            )
+        The content is opened and its first chunk read before returning, so
+        a missing or unreadable file is reported before a response starts.
         
+        Returns:
+            An iterator over the content, or None if the document has no content
+            
+        Raises:
+            DocumentProcessingError: If the content cannot be decompressed
+        """
+        # Decompress incrementally, from the cache or else straight from the
+        # file, so the whole text is never held at once
+        compressed = self._content_cache.get(document_id)
+        if compressed is not None:
+            source = io.BytesIO(compressed)
+        else:
+            document = self._store.documents.get(document_id)
+            if not document or not document.markdown_path:
+                return None
+            source = document.markdown_path
+        try:
+            file = await asyncio.to_thread(gzip.open, source, "rt", encoding="utf-8", newline="")
+        except FileNotFoundError:
+            logger.warning(f"Content file missing for document {document_id}")
+            return None
+        try:
+            first_chunk = await asyncio.to_thread(file.read, chunk_size)
+        except (OSError, EOFError, UnicodeDecodeError) as e:
+            file.close()
+            logger.exception(f"Content of document {document_id} is unreadable")
+            raise DocumentProcessingError(f"Failed to read document content: {str(e)}")
+        return self._iter_content(file, first_chunk, chunk_size)
+    
+    @staticmethod
+    async def _iter_content(file, first_chunk: str, chunk_size: int) -> AsyncIterator[str]:
+        """Yield the chunks of an opened content file, closing it when done."""
+        try:
+            chunk = first_chunk
+            while chunk:
+                yield chunk
+                chunk = await asyncio.to_thread(file.read, chunk_size)
+        finally:
+            file.close()
+    
+    def _validate_file(self, file: UploadFile) -> None:
+        """Validate uploaded file. The size is checked while saving it."""
         # Check file extension
         file_extension = Path(file.filename).suffix.lower()
         if file_extension not in self.settings.ALLOWED_EXTENSIONS:
             raise FileValidationError(
-                f"File extension {file_extension} not allowed. Allowed: {self.settings.ALLOWED_EXTENSIONS}"
+                f"File extension {file_extension} not allowed. Allowed: {sorted(self.settings.ALLOWED_EXTENSIONS)}"
             )
     
-    async def _process_pdf(self, file_path: str) -> str:
-        """Process PDF file and extract markdown content."""
+    async def _save_upload(self, file: UploadFile, file_path: Path) -> Tuple[int, str]:
+        """
+        Stream an uploaded file to disk in chunks and return its size and SHA-256.
+        
+        The upload is never held in memory as a whole, and saving stops as
+        soon as it exceeds the maximum file size.
+        """
+        file_size = 0
+        file_hash = hashlib.sha256()
+        out = await asyncio.to_thread(open, file_path, "wb")
+        try:
+            while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                file_hash.update(chunk)
+                if file_size > self.settings.MAX_FILE_SIZE:
+                    raise FileValidationError(
+                        f"File size exceeds maximum allowed {self.settings.MAX_FILE_SIZE}"
+                    )
+                await asyncio.to_thread(out.write, chunk)
+        except BaseException:
+            out.close()
+            file_path.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(out.close)
+        return file_size, file_hash.hexdigest()
+    
+    def _markdown_cache_path(self, cache_key: Optional[str]) -> Optional[Path]:
+        """Locate the markdown cache entry for a key, or None if caching does not apply."""
+        if not self.settings.OCR_CACHE_ENABLED or not cache_key:
+            return None
+        return self._markdown_cache_dir / f"{cache_key}.md.gz"
+    
+    async def _load_markdown_cache(self, cache_key: Optional[str]) -> Optional[str]:
+        """Return the markdown previously extracted from an identical file, if any."""
+        path = self._markdown_cache_path(cache_key)
+        if path is None:
+            return None
+        try:
+            compressed = await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+        return gzip.decompress(compressed).decode()
+    
+    async def _store_markdown_cache(self, cache_key: Optional[str], compressed: bytes) -> None:
+        """Keep the compressed markdown extracted from a file for identical uploads."""
+        path = self._markdown_cache_path(cache_key)
+        if path is None:
+            return
+        # Write then rename, so concurrent readers never see a partial entry
+        partial = path.with_name(f"{path.name}.{uuid4()}.tmp")
+        try:
+            await asyncio.to_thread(partial.write_bytes, compressed)
+            await asyncio.to_thread(os.replace, partial, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache extracted markdown: {e}")
+            partial.unlink(missing_ok=True)
+    
+    async def _process_pdf(self, file_path: str) -> Tuple[str, Dict[str, Any]]:
+        """Process PDF file, extracting markdown content and classifying it with the LLM."""
         try:
             logger.info(f"Processing PDF file: {file_path}")
-            markdown_content = await self.document_intelligence.extract_markdown_from_pdf(file_path)
+            markdown_content, classification = await self.document_intelligence.extract_and_classify_pdf(file_path)
             logger.info(f"Successfully extracted {len(markdown_content)} characters from PDF")
-            return markdown_content
+            return markdown_content, classification
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error processing PDF: {e}")
+            logger.exception(f"Error processing PDF: {e}")
             raise DocumentProcessingError(f"PDF processing failed: {str(e)}")
     
     async def _process_excel(self, file_path: str) -> str:
@@ -372,37 +743,24 @@ class DocumentService(DocumentServiceInterface):
             logger.info(f"Successfully converted Excel to {len(markdown_content)} characters of markdown")
             return markdown_content
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error processing Excel: {e}")
+            logger.exception(f"Error processing Excel: {e}")
             raise DocumentProcessingError(f"Excel processing failed: {str(e)}")
     
     async def cleanup_ai_agents(self):
         """Cleanup AI agents when shutting down."""
         try:
-            await self.ai_agent_service.cleanup_agents()
+            await self.ai_agent_service.cleanup()
             logger.info("AI Agent Service cleaned up successfully")
         except Exception as e:
             logger.error(f"Error cleaning up AI Agent Service: {e}")
     
     def get_document_statistics(self) -> Dict[str, Any]:
         """Get statistics about processed documents."""
-        documents = list(self._documents.values())
-        
-        stats = {
-            "total_documents": len(documents),
-            "by_status": {},
-            "by_type": {},
-            "total_criteria": sum(doc.criteria_count for doc in documents),
-            "with_criteria": len([doc for doc in documents if doc.contains_criteria])
+        store = self._store
+        return {
+            "total_documents": len(store.documents),
+            "by_status": {status.value: len(store.by_status.get(status, ())) for status in DocumentStatus},
+            "by_type": {doc_type.value: len(store.by_type.get(doc_type, ())) for doc_type in DocumentType},
+            "total_criteria": store.total_criteria,
+            "with_criteria": len(store.with_criteria)
         }
-        
-        # Count by status
-        for status in DocumentStatus:
-            stats["by_status"][status.value] = len([doc for doc in documents if doc.status == status])
-        
-        # Count by type
-        for doc_type in DocumentType:
-            stats["by_type"][doc_type.value] = len([doc for doc in documents if doc.document_type == doc_type])
-        
-        return stats
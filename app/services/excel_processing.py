@@ -1,15 +1,239 @@
 """Excel processing service for converting spreadsheets to markdown."""
 
+import asyncio
+import importlib.util
+import io
 import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import openpyxl
 import pandas as pd
-from typing import Dict, Any, List
-from pathlib import Path
-from tabulate import tabulate
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from app.core.exceptions import DocumentProcessingError
 
 logger = logging.getLogger(__name__)
 
+# python-calamine parses workbooks in native code and is used for .xlsx
+# files when installed; openpyxl is the fallback
+_HAS_CALAMINE = importlib.util.find_spec("python_calamine") is not None
+
+# Identifies the markdown layout produced here; bump it when the output
+# changes so that cached conversions are not reused
+MARKDOWN_FORMAT_VERSION = "v1"
+
+# Workbooks from this size up with more than one sheet are converted sheet
+# by sheet in worker processes; smaller ones are not worth the overhead
+_PARALLEL_SHEETS_MIN_BYTES = 1 << 20
+
+# Keywords are matched with one substring scan each: str.__contains__ runs
+# in C and measured faster than a single alternation regex over the content
+_CRITERIA_KEYWORDS = (
+    "requirement", "criteria", "must", "shall", "should",
+    "mandatory", "optional", "specification", "standard",
+    "compliance", "evaluation", "scoring", "weight",
+    "threshold", "minimum", "maximum", "target"
+)
+_STRUCTURE_CRITERIA_KEYWORDS = (
+    "requirement", "criteria", "specification", "standard",
+    "mandatory", "compliance", "evaluation", "scoring"
+)
+
+
+def _column_names(header: Sequence[Any]) -> List[str]:
+    """Name columns from a header row the way pandas.read_excel does."""
+    names = []
+    seen: Counter = Counter()
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        # Repeated names get a ".1", ".2", ... suffix
+        count = seen[name]
+        seen[name] += 1
+        names.append(f"{name}.{count}" if count else name)
+    return names
+
+
+def _rows_to_frame(rows: Iterator[Tuple[Any, ...]]) -> pd.DataFrame:
+    """Build a DataFrame from openpyxl row values, the first row naming the columns."""
+    header = next(rows, ())
+    data = list(rows)
+    width = max((len(row) for row in data), default=len(header))
+    header = tuple(header) + (None,) * (width - len(header))
+    return pd.DataFrame(data, columns=_column_names(header))
+
+
+# xlrd loads .xls sheets only when they are accessed in on_demand mode, so
+# listing sheet names or reading one sheet does not parse the others
+_ENGINE_KWARGS: Dict[str, Dict[str, Any]] = {'xlrd': {'on_demand': True}}
+
+
+def _engine_for(file_path: str) -> str:
+    """
+    Pick the engine that reads a workbook.
+
+    .xlsx files are read with pandas' calamine engine when python-calamine is
+    installed, otherwise with openpyxl in read-only mode, which streams cell
+    values from the file instead of building the workbook's object model.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == '.xlsx':
+        return 'calamine' if _HAS_CALAMINE else 'openpyxl'
+    if file_extension == '.xls':
+        return 'xlrd'
+    raise DocumentProcessingError(f"Unsupported file format: {file_extension}")
+
+
+def _iter_sheets(file_path: str) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield each sheet of a workbook as a DataFrame, one sheet at a time.
+    
+    The first row holds the column names.
+    """
+    engine = _engine_for(file_path)
+    if engine == 'openpyxl':
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                yield sheet.title, _rows_to_frame(sheet.iter_rows(values_only=True))
+        finally:
+            # Read-only workbooks keep the file open until closed
+            workbook.close()
+    else:
+        with pd.ExcelFile(file_path, engine=engine, engine_kwargs=_ENGINE_KWARGS.get(engine)) as workbook:
+            for sheet_name in workbook.sheet_names:
+                yield sheet_name, workbook.parse(sheet_name)
+                if engine == 'xlrd':
+                    # Release the parsed sheet before loading the next one
+                    workbook.book.unload_sheet(sheet_name)
+
+
+def _sheet_names(file_path: str) -> List[str]:
+    """List the sheet names of a workbook without parsing any cells."""
+    engine = _engine_for(file_path)
+    if engine == 'openpyxl':
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    with pd.ExcelFile(file_path, engine=engine, engine_kwargs=_ENGINE_KWARGS.get(engine)) as workbook:
+        return list(workbook.sheet_names)
+
+
+def _read_sheet(file_path: str, sheet_name: str) -> pd.DataFrame:
+    """Read a single sheet of a workbook, opening the file on its own."""
+    engine = _engine_for(file_path)
+    if engine == 'openpyxl':
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            return _rows_to_frame(workbook[sheet_name].iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    return pd.read_excel(
+        file_path, sheet_name=sheet_name, engine=engine, engine_kwargs=_ENGINE_KWARGS.get(engine)
+    )
+
+
+def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean dataframe by removing empty rows/columns and handling NaN values.
+
+    Args:
+        df: Input dataframe
+
+    Returns:
+        Cleaned dataframe
+    """
+    # One pass over the NumPy array, skipping the frame-shaped results of
+    # DataFrame comparisons, finds the columns holding any value and the
+    # rows holding any non-empty value; other cells become ''
+    values = df.to_numpy()
+    present = pd.notna(values)
+    filled = present & (values != '')
+    df = df.iloc[filled.any(axis=1), present.any(axis=0)]
+
+    # Fill NaN values with empty strings and convert all columns to
+    # string in one call to avoid issues with mixed types
+    df = df.fillna('').astype(str)
+
+    # Ensure column names are strings
+    df.columns = [str(col) for col in df.columns]
+
+    return df
+
+
+def _pipe_table(df: pd.DataFrame) -> str:
+    """
+    Render a dataframe as a markdown pipe table.
+
+    Cells are written as they are, without padding columns to a common width
+    or reformatting numeric text; markdown renderers align pipe tables
+    themselves, and the padding only added characters to the LLM input.
+    """
+    lines = [
+        "| " + " | ".join(map(str, df.columns)) + " |",
+        "|" + "|".join(["---"] * len(df.columns)) + "|"
+    ]
+    lines.extend("| " + " | ".join(map(str, row)) + " |" for row in df.to_numpy().tolist())
+    return "\n".join(lines)
+
+
+def _sheet_markdown(sheet_name: str, df: pd.DataFrame) -> List[str]:
+    """Render one sheet as markdown parts: its heading and its table."""
+    logger.info(f"Processing sheet: {sheet_name}")
+    
+    # Add sheet header
+    markdown_content = [f"# {sheet_name}\n"]
+    
+    # Clean the dataframe
+    df = _clean_dataframe(df)
+    
+    if not df.empty:
+        # Convert to markdown table
+        markdown_content.append(_pipe_table(df))
+        markdown_content.append("\n")
+    else:
+        markdown_content.append("*Empty sheet*\n")
+    
+    return markdown_content
+
+
+def _join_sheets(sheets: Iterable[List[str]]) -> str:
+    """Write the markdown parts of each sheet into one newline-separated document."""
+    buffer = io.StringIO()
+    for sheet in sheets:
+        for part in sheet:
+            if buffer.tell():
+                buffer.write("\n")
+            buffer.write(part)
+    return buffer.getvalue()
+
+
+def _convert_sheet(file_path: str, sheet_name: str) -> List[str]:
+    """Read and render one sheet; runs in a worker process."""
+    return _sheet_markdown(sheet_name, _read_sheet(file_path, sheet_name))
+
+
+_sheet_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_sheet_pool() -> ProcessPoolExecutor:
+    """Get the worker process pool for sheet conversion, starting it on first use."""
+    global _sheet_pool
+    if _sheet_pool is None:
+        _sheet_pool = ProcessPoolExecutor()
+    return _sheet_pool
+
+
+def shutdown_sheet_pool() -> None:
+    """Shut down the sheet conversion worker processes, if started."""
+    global _sheet_pool
+    if _sheet_pool is not None:
+        _sheet_pool.shutdown(wait=False, cancel_futures=True)
+        _sheet_pool = None
+
+
 
 class ExcelProcessingService:
     """Service for processing Excel files and converting to markdown."""
@@ -34,86 +258,37 @@ class ExcelProcessingService:
         try:
             logger.info(f"Processing Excel file: {file_path}")
             
-            # Read Excel file (handle both .xlsx and .xls)
-            file_extension = Path(file_path).suffix.lower()
+            sheet_names = []
+            if await asyncio.to_thread(os.path.getsize, file_path) >= _PARALLEL_SHEETS_MIN_BYTES:
+                sheet_names = await asyncio.to_thread(_sheet_names, file_path)
             
-            if file_extension == '.xlsx':
-                excel_data = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
-            elif file_extension == '.xls':
-                excel_data = pd.read_excel(file_path, sheet_name=None, engine='xlrd')
+            if len(sheet_names) > 1:
+                # Sheets are independent, so large workbooks convert them
+                # in worker processes; pandas and tabulate hold the GIL
+                loop = asyncio.get_running_loop()
+                pool = _get_sheet_pool()
+                sheets = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _convert_sheet, file_path, sheet_name)
+                    for sheet_name in sheet_names
+                ))
+                result = _join_sheets(sheets)
             else:
-                raise DocumentProcessingError(f"Unsupported file format: {file_extension}")
-            
-            markdown_content = []
-            
-            # Process each sheet
-            for sheet_name, df in excel_data.items():
-                logger.info(f"Processing sheet: {sheet_name}")
-                
-                # Add sheet header
-                markdown_content.append(f"# {sheet_name}\n")
-                
-                # Clean the dataframe
-                df = self._clean_dataframe(df)
-                
-                if not df.empty:
-                    # Convert to markdown table
-                    table_markdown = tabulate(
-                        df, 
-                        headers='keys', 
-                        tablefmt='pipe', 
-                        showindex=False
-                    )
-                    markdown_content.append(table_markdown)
-                    markdown_content.append("\n")
-                else:
-                    markdown_content.append("*Empty sheet*\n")
-            
-            result = "\n".join(markdown_content)
+                # Parsing blocks, so it runs in a worker thread
+                result = await asyncio.to_thread(self._sheets_to_markdown, file_path)
             logger.info(f"Successfully converted Excel to markdown: {len(result)} characters")
             
             return result
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error processing Excel file: {e}")
+            logger.exception(f"Error processing Excel file: {e}")
             raise DocumentProcessingError(f"Failed to process Excel file: {str(e)}")
     
-    def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Clean dataframe by removing empty rows/columns and handling NaN values.
-        
-        Args:
-            df: Input dataframe
-            
-        Returns:
-            Cleaned dataframe
-        """
-        try:
-            # Remove completely empty rows and columns
-            df = df.dropna(how='all').dropna(axis=1, how='all')
-            
-            # Fill NaN values with empty strings
-            df = df.fillna('')
-            
-            # Convert all columns to string to avoid issues with mixed types
-            for col in df.columns:
-                df[col] = df[col].astype(str)
-            
-            # Remove rows where all values are empty strings
-            df = df[~(df == '').all(axis=1)]
-            
-            # Ensure column names are strings
-            df.columns = [str(col) for col in df.columns]
-            
-            return df
-            
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.warning(f"Error cleaning dataframe: {e}")
-            return df
+    def _sheets_to_markdown(self, file_path: str) -> str:
+        """Convert each sheet of a workbook to a markdown table."""
+        # Sheets are rendered one at a time as the document is written
+        return _join_sheets(
+            _sheet_markdown(sheet_name, df) for sheet_name, df in _iter_sheets(file_path)
+        )
     
     async def extract_criteria_keywords(self, markdown_content: str) -> List[str]:
         """
@@ -125,21 +300,8 @@ class ExcelProcessingService:
         Returns:
             List of criteria-related keywords found
         """
-        criteria_keywords = [
-            "requirement", "criteria", "must", "shall", "should", 
-            "mandatory", "optional", "specification", "standard", 
-            "compliance", "evaluation", "scoring", "weight", 
-            "threshold", "minimum", "maximum", "target"
-        ]
-        
-        found_keywords = []
         content_lower = markdown_content.lower()
-        
-        for keyword in criteria_keywords:
-            if keyword in content_lower:
-                found_keywords.append(keyword)
-        
-        return found_keywords
+        return [keyword for keyword in _CRITERIA_KEYWORDS if keyword in content_lower]
     
     async def analyze_excel_structure(self, file_path: str) -> Dict[str, Any]:
         """
@@ -152,49 +314,11 @@ class ExcelProcessingService:
             Analysis results including sheet info and criteria indicators
         """
         try:
-            # Read Excel file
-            file_extension = Path(file_path).suffix.lower()
-            
-            if file_extension == '.xlsx':
-                excel_data = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
-            elif file_extension == '.xls':
-                excel_data = pd.read_excel(file_path, sheet_name=None, engine='xlrd')
-            else:
-                raise DocumentProcessingError(f"Unsupported file format: {file_extension}")
-            
-            analysis = {
-                "sheet_count": len(excel_data),
-                "sheet_names": list(excel_data.keys()),
-                "total_rows": 0,
-                "total_columns": 0,
-                "contains_criteria": False,
-                "criteria_indicators": []
-            }
-            
-            criteria_keywords = [
-                "requirement", "criteria", "specification", "standard",
-                "mandatory", "compliance", "evaluation", "scoring"
-            ]
-            
-            for sheet_name, df in excel_data.items():
-                df_clean = self._clean_dataframe(df)
-                analysis["total_rows"] += len(df_clean)
-                analysis["total_columns"] = max(analysis["total_columns"], len(df_clean.columns))
-                
-                # Check for criteria indicators in sheet name and content
-                sheet_text = f"{sheet_name} {df_clean.to_string()}".lower()
-                
-                for keyword in criteria_keywords:
-                    if keyword in sheet_text:
-                        analysis["criteria_indicators"].append(keyword)
-                        analysis["contains_criteria"] = True
-            
-            return analysis
+            # Parsing blocks, so it runs in a worker thread
+            return await asyncio.to_thread(self._analyze_sheets, file_path)
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Error analyzing Excel structure: {e}")
+            logger.exception(f"Error analyzing Excel structure: {e}")
             return {
                 "sheet_count": 0,
                 "sheet_names": [],
@@ -203,3 +327,43 @@ class ExcelProcessingService:
                 "contains_criteria": False,
                 "criteria_indicators": []
             }
+    
+    def _analyze_sheets(self, file_path: str) -> Dict[str, Any]:
+        """Collect sheet statistics and criteria indicators of a workbook."""
+        analysis = {
+            "sheet_count": 0,
+            "sheet_names": [],
+            "total_rows": 0,
+            "total_columns": 0,
+            "contains_criteria": False,
+            "criteria_indicators": []
+        }
+        
+        # Keywords not yet seen; later sheets are only scanned for these
+        remaining = list(_STRUCTURE_CRITERIA_KEYWORDS)
+        
+        for sheet_name, df in _iter_sheets(file_path):
+            analysis["sheet_count"] += 1
+            analysis["sheet_names"].append(sheet_name)
+            df_clean = _clean_dataframe(df)
+            analysis["total_rows"] += len(df_clean)
+            analysis["total_columns"] = max(analysis["total_columns"], len(df_clean.columns))
+            
+            if not remaining:
+                # Every indicator was found already; the statistics above
+                # still cover all sheets
+                continue
+            
+            # Check for criteria indicators in sheet name, headers and cells;
+            # joining the values skips the aligned rendering of to_string()
+            sheet_text = " ".join(map(str, (
+                sheet_name, *df_clean.columns, *df_clean.to_numpy().ravel().tolist()
+            ))).lower()
+            
+            found = [keyword for keyword in remaining if keyword in sheet_text]
+            if found:
+                analysis["criteria_indicators"].extend(found)
+                analysis["contains_criteria"] = True
+                remaining = [keyword for keyword in remaining if keyword not in found]
+        
+        return analysis
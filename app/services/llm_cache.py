@@ -0,0 +1,75 @@
+"""In-process cache for LLM responses keyed by a hash of the request."""
+
+import hashlib
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from app.core.config import get_settings
+
+# Bump when prompts or response schemas change so stale entries are ignored
+CACHE_SCHEMA_VERSION = "v2"
+
+# Responses are repetitive JSON, so even a fast compression level shrinks
+# them several times over
+_COMPRESSION_LEVEL = 3
+
+
+class LLMCache:
+    """
+    LRU cache of serialized LLM responses with per-entry expiry.
+
+    Identical requests (same deployment and prompts) return the stored
+    response instead of paying for another completion, e.g. when a
+    document is uploaded again or its processing is retried. Responses
+    are kept zlib-compressed.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        """
+        Args:
+            max_size: Maximum number of responses kept (0 disables the cache)
+            ttl: Default lifetime of an entry in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(deployment: str, *prompts: str) -> str:
+        """Build a cache key from the deployment and the prompts sent to it."""
+        payload = "|".join((deployment, CACHE_SCHEMA_VERSION, *prompts))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, blob = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return zlib.decompress(blob).decode()
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        """Store a response, evicting the least recently used beyond the limit."""
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, zlib.compress(value.encode(), _COMPRESSION_LEVEL))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+@lru_cache()
+def get_llm_cache() -> Optional[LLMCache]:
+    """Get the shared LLM response cache, or None if caching is disabled."""
+    settings = get_settings()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMCache(settings.LLM_CACHE_SIZE, settings.LLM_CACHE_TTL)
@@ -0,0 +1,45 @@
+"""Shared async Azure OpenAI clients."""
+
+from functools import lru_cache
+
+import httpx
+import instructor
+from openai import AsyncAzureOpenAI
+
+from app.core.config import get_settings
+
+
+@lru_cache()
+def get_async_openai_client() -> AsyncAzureOpenAI:
+    """
+    Get the async Azure OpenAI client shared by all services.
+
+    All services send their requests through one HTTP connection pool, so
+    concurrent calls reuse keep-alive connections instead of each service
+    opening its own.
+    """
+    settings = get_settings()
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=httpx.Timeout(settings.OPENAI_REQUEST_TIMEOUT, connect=5.0)
+    )
+    return AsyncAzureOpenAI(
+        azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+        api_key=settings.AZURE_OPENAI_API_KEY,
+        api_version=settings.AZURE_OPENAI_API_VERSION,
+        http_client=http_client
+    )
+
+
+@lru_cache()
+def get_instructor_client() -> instructor.AsyncInstructor:
+    """
+    Get the instructor client shared by all services for structured outputs.
+
+    It wraps the shared async client in JSON schema mode, so the response
+    schema goes in response_format rather than a tool definition.
+    """
+    return instructor.from_openai(get_async_openai_client(), mode=instructor.Mode.JSON_SCHEMA)
@@ -1,17 +1,29 @@
 """Service for summarizing document content."""
 
+import asyncio
 import logging
 import re
-from typing import List
-import instructor
-from openai import AzureOpenAI
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 from app.core.config import get_settings
 from app.core.exceptions import RFPAgentException
+from app.core.tokens import count_tokens
+from app.services.llm_cache import LLMCache, get_llm_cache
+from app.services.openai_client import get_instructor_client
 
 logger = logging.getLogger(__name__)
 
+# Markdown headings, captured so that split() keeps them; [ \t] rather than
+# \s keeps a heading from running on into the following lines
+_HEADER_RE = re.compile(r'(^#{1,6}[ \t]+.*$)', re.MULTILINE)
+
+# Prompts of the map (per chunk) and reduce (combining) steps
+_MAP_SYSTEM_PROMPT = "You are an expert at summarizing technical and procurement documents."
+_MAP_PROMPT = "Summarize the key information, requirements, and objectives from this document chunk:\n\n"
+_REDUCE_SYSTEM_PROMPT = "You are an expert at synthesizing multiple summaries into a final, comprehensive summary."
+_REDUCE_PROMPT = "Create a single, coherent summary from the following chunk summaries:\n\n"
+
 
 class SummaryResult(BaseModel):
     """Model for summarization result."""
@@ -25,17 +37,14 @@ class SummarizationService:
         """Initialize the summarization service."""
         self.settings = get_settings()
         self.client = None
+        # Bounds concurrent map-step calls across all summarizations
+        self._semaphore = asyncio.Semaphore(self.settings.SUMMARIZATION_CONCURRENCY)
         
         if (self.settings.AZURE_OPENAI_ENDPOINT and 
             self.settings.AZURE_OPENAI_API_KEY and 
             self.settings.AZURE_OPENAI_DEPLOYMENT_NAME):
             try:
-                client = AzureOpenAI(
-                    azure_endpoint=self.settings.AZURE_OPENAI_ENDPOINT,
-                    api_key=self.settings.AZURE_OPENAI_API_KEY,
-                    api_version=self.settings.AZURE_OPENAI_API_VERSION
-                )
-                self.client = instructor.from_openai(client)
+                self.client = get_instructor_client()
                 logger.info("Summarization service initialized successfully")
             except Exception as e:
                 logger.warning(f"Failed to initialize Azure OpenAI client for summarization: {e}")
@@ -43,25 +52,65 @@ class SummarizationService:
         else:
             logger.warning("Azure OpenAI credentials not configured for summarization.")
 
-    def _split_content_semantically(self, content: str, chunk_size: int) -> List[str]:
-        """Splits content into semantic chunks."""
+    def _split_content_semantically(self, content: str, max_tokens: int) -> List[str]:
+        """Splits content into semantic chunks of up to about max_tokens tokens."""
         chunks = []
         current_chunk = ""
-        sections = re.split(r'(^#{1,6}\s+.*$)', content, flags=re.MULTILINE)
+        current_size = 0
+        sections = _HEADER_RE.split(content)
         
         for section in sections:
             if not section.strip():
                 continue
-            if len(current_chunk) + len(section) > chunk_size and current_chunk:
+            section_size = count_tokens(section)
+            if current_size + section_size > max_tokens and current_chunk:
                 chunks.append(current_chunk.strip())
                 current_chunk = section
+                current_size = section_size
             else:
                 current_chunk += "\n" + section if current_chunk else section
+                current_size += section_size
         
         if current_chunk.strip():
             chunks.append(current_chunk.strip())
         return chunks
 
+    async def _summarize_chunk(self, chunk: str) -> Optional[str]:
+        """
+        Summarize one chunk of content, returning None if the call fails.
+
+        Summaries are cached, so chunks repeated across documents, such as
+        standard terms and conditions, are not sent to the LLM again.
+        """
+        messages = [
+            {"role": "system", "content": _MAP_SYSTEM_PROMPT},
+            {"role": "user", "content": _MAP_PROMPT + chunk}
+        ]
+        cache = get_llm_cache()
+        cache_key = LLMCache.make_key(
+            self.settings.AZURE_OPENAI_DEPLOYMENT_NAME, *(m["content"] for m in messages)
+        )
+        
+        if cache:
+            cached = await cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        try:
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+                    response_model=SummaryResult,
+                    messages=messages
+                )
+        except Exception as e:
+            logger.error(f"Failed to summarize a chunk: {e}")
+            return None
+        
+        if cache:
+            await cache.set(cache_key, response.summary)
+        return response.summary
+
     async def summarize_content(self, content: str) -> str:
         """
         Summarize content using a map-reduce strategy.
@@ -76,24 +125,11 @@ class SummarizationService:
             raise RFPAgentException("Summarization service is not available.")
 
         # Map step: Summarize each chunk
-        chunk_size = 40000  # ~10k tokens
-        chunks = self._split_content_semantically(content, chunk_size)
+        chunks = self._split_content_semantically(content, self.settings.SUMMARIZATION_CHUNK_TOKENS)
         
-        summaries = []
-        for chunk in chunks:
-            prompt = f"Summarize the key information, requirements, and objectives from this document chunk:\n\n{chunk}"
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                    response_model=SummaryResult,
-                    messages=[
-                        {"role": "system", "content": "You are an expert at summarizing technical and procurement documents."},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                summaries.append(response.summary)
-            except Exception as e:
-                logger.error(f"Failed to summarize a chunk: {e}")
+        # Chunks are summarized concurrently; failed chunks are left out
+        results = await asyncio.gather(*(self._summarize_chunk(chunk) for chunk in chunks))
+        summaries = [summary for summary in results if summary is not None]
         
         if not summaries:
             return "Could not generate a summary."
@@ -103,15 +139,14 @@ class SummarizationService:
             return summaries[0]
         
         combined_summaries = "\n\n".join(summaries)
-        final_prompt = f"Create a single, coherent summary from the following chunk summaries:\n\n{combined_summaries}"
         
         try:
-            final_response = self.client.chat.completions.create(
+            final_response = await self.client.chat.completions.create(
                 model=self.settings.AZURE_OPENAI_DEPLOYMENT_NAME,
                 response_model=SummaryResult,
                 messages=[
-                    {"role": "system", "content": "You are an expert at synthesizing multiple summaries into a final, comprehensive summary."},
-                    {"role": "user", "content": final_prompt}
+                    {"role": "system", "content": _REDUCE_SYSTEM_PROMPT},
+                    {"role": "user", "content": _REDUCE_PROMPT + combined_summaries}
                 ]
             )
             return final_response.summary
@@ -31,7 +31,7 @@ async def lifespan(app: FastAPI):
     # Initialize AI agents
     try:
         from app.api.routes.documents import get_document_service
-        document_service = get_document_service()
+        document_service = await get_document_service()
         await document_service.initialize_ai_agents()
         logger.info("AI agents initialized successfully")
     except Exception as e:
@@ -47,11 +47,19 @@ async def lifespan(app: FastAPI):
     # Cleanup AI agents
     try:
         from app.api.routes.documents import get_document_service
-        document_service = get_document_service()
+        document_service = await get_document_service()
         await document_service.cleanup_ai_agents()
         logger.info("AI agents cleaned up successfully")
     except Exception as e:
         logger.warning(f"Failed to cleanup AI agents: {e}")
+    
+    # Stop criteria analysis worker processes
+    from app.services.criteria_extraction import shutdown_analysis_pool
+    shutdown_analysis_pool()
+    
+    # Stop sheet conversion worker processes
+    from app.services.excel_processing import shutdown_sheet_pool
+    shutdown_sheet_pool()
 
 # Create FastAPI application
 app = FastAPI(
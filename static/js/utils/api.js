@@ -6,11 +6,11 @@ export class APIClient {
     async request(endpoint, options = {}) {
         const url = `${this.baseURL}${endpoint}`;
         const config = {
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
                 ...options.headers
-            },
-            ...options
+            }
         };
 
         try {
@@ -216,27 +216,31 @@ export class APIClient {
         return this.request(`/criteria/${criterionId}`);
     }
 
+    reviewerHeaders(reviewedBy) {
+        return reviewedBy ? { 'X-Reviewer': reviewedBy } : {};
+    }
+
     async updateCriterion(criterionId, updates, reviewedBy = null) {
-        const params = reviewedBy ? `?reviewed_by=${encodeURIComponent(reviewedBy)}` : '';
-        return this.request(`/criteria/${criterionId}${params}`, {
+        return this.request(`/criteria/${criterionId}`, {
             method: 'PUT',
+            headers: this.reviewerHeaders(reviewedBy),
             body: JSON.stringify(updates)
         });
     }
 
     async approveCriterion(criterionId, reviewedBy = null) {
-        const params = reviewedBy ? `?reviewed_by=${encodeURIComponent(reviewedBy)}` : '';
-        return this.request(`/criteria/${criterionId}/approve${params}`, {
-            method: 'POST'
+        return this.request(`/criteria/${criterionId}/approve`, {
+            method: 'POST',
+            headers: this.reviewerHeaders(reviewedBy)
         });
     }
 
     async rejectCriterion(criterionId, reason, reviewedBy = null) {
         const params = new URLSearchParams({ reason });
-        if (reviewedBy) params.append('reviewed_by', reviewedBy);
         
         return this.request(`/criteria/${criterionId}/reject?${params}`, {
-            method: 'POST'
+            method: 'POST',
+            headers: this.reviewerHeaders(reviewedBy)
         });
     }
 